@@ -0,0 +1 @@
+"""Offline performance benchmarks (no OpenAI / Pinecone calls)."""
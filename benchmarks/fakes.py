@@ -0,0 +1,119 @@
+"""Deterministic local stand-ins for the OpenAI chat model and embeddings.
+
+Both fakes sleep for a configurable latency on every call, so benchmarks can
+model network-bound runs as well as pure framework overhead (latency 0).
+Outputs depend only on the inputs, so repeated runs do identical work.
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_CONTEXT_PATTERN = re.compile(
+    r"Context:\s*(.+?)(?:\n\s*(?:Current Question|Question|Draft Answer):|\Z)", re.DOTALL
+)
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers from the prompt, after `latency_seconds`.
+
+    - With tools bound and no tool result in the conversation yet, it calls
+      the first tool with the last message as the query (like the retrieval
+      agent does).
+    - Otherwise it answers with the first sentences of the prompt's
+      `Context:` section, or a fixed summary line when there is none.
+    """
+
+    latency_seconds: float = 0.0
+    model_name: str = "fake-chat"
+    tools: List[Any] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": self.model_name}
+
+    def _get_invocation_params(self, stop: Optional[List[str]] = None, **kwargs: Any) -> dict:
+        return {"model": self.model_name}
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        return self.model_copy(update={"tools": list(tools)})
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        last = str(messages[-1].content)
+        if self.tools and not any(isinstance(m, ToolMessage) for m in messages):
+            tool = self.tools[0]
+            name = getattr(tool, "name", None) or tool["name"]
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": name, "args": {"query": last[-200:]}, "id": "call-1"}],
+            )
+        else:
+            match = _CONTEXT_PATTERN.search(last)
+            if match:
+                body = re.sub(r"Chunk \d+ \(page=[^)]*\):", "", match.group(1))
+                content = " ".join(body.split()[:60])
+            else:
+                content = "- The conversation covered the indexed documents."
+            message = AIMessage(content=content)
+
+        prompt_tokens = sum(_estimate_tokens(str(m.content)) for m in messages)
+        completion_tokens = _estimate_tokens(str(message.content))
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={
+                "token_usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                }
+            },
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return self._respond(messages)
+
+
+class FakeEmbeddings(DeterministicFakeEmbedding):
+    """Hash-seeded embeddings with a per-request latency."""
+
+    latency_seconds: float = 0.0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return super().embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return super().embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return super().embed_query(text)
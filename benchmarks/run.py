@@ -0,0 +1,388 @@
+"""Offline benchmark suite.
+
+Runs the real graph, indexing pipeline, context helpers and session stores
+against deterministic fakes (see `benchmarks.fakes`) and the local vector
+backend, so no OpenAI or Pinecone account is needed and results are
+comparable between commits.
+
+Usage (from the repository root):
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --only graph history --llm-latency 0.05
+
+Results are printed (or written to `--output`) as one JSON document:
+`{"meta": {...}, "results": {<benchmark>: {...}}}`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from .fakes import FakeChatModel, FakeEmbeddings
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+UPLOADS_DIR = REPO_ROOT / "data" / "uploads"
+
+BENCHMARKS = ("indexing", "graph", "history", "chunks", "sessions", "startup")
+
+
+# --- Helpers ---
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+def _time_calls(func: Callable[[], Any], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _per_call_seconds(func: Callable[[], Any], min_seconds: float = 0.2) -> float:
+    """Mean time of a fast call, repeated until `min_seconds` have elapsed."""
+    calls, start = 0, time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+# --- Offline environment ---
+
+def configure_offline(workdir: Path, llm_latency: float, embedding_latency: float) -> None:
+    """Point the app at local fakes and a scratch directory.
+
+    Must run before the first request: agents, models and clients are built
+    lazily on first use, through the factory functions replaced here.
+    """
+    os.environ.update(
+        OPENAI_API_KEY="offline",
+        PINECONE_API_KEY="offline",
+        VECTOR_BACKEND="local",
+        LOCAL_INDEX_PATH=str(workdir / "local_index"),
+        LEXICAL_INDEX_PATH=str(workdir / "lexical.sqlite3"),
+        INDEX_MANIFEST_PATH=str(workdir / "manifest.sqlite3"),
+        SESSION_DB_PATH=str(workdir / "sessions.sqlite3"),
+        # Measure the graph, not the caches in front of it
+        ANSWER_CACHE_ENABLED="false",
+        EMBEDDING_CACHE_ENABLED="false",
+    )
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+
+    from src.app.core.agents import agents
+    from src.app.core.llm import factory
+    from src.app.core.metrics import get_llm_callback
+    from src.app.core.retrieval import clients
+
+    def create_fake_chat_model(
+        temperature: float = 0.0, model_name: str | None = None, priority: str = "interactive"
+    ):
+        return FakeChatModel(
+            latency_seconds=llm_latency,
+            model_name=model_name or "fake-chat",
+            callbacks=[get_llm_callback()],
+        )
+
+    def create_fake_embeddings_model():
+        return FakeEmbeddings(size=256, latency_seconds=embedding_latency)
+
+    # Replace every imported name, not just the factory module's
+    factory.create_chat_model = agents.create_chat_model = create_fake_chat_model
+    factory.create_embeddings_model = clients.create_embeddings_model = create_fake_embeddings_model
+    clients.reload_clients()
+
+
+def _index_bundled_pdfs() -> Dict[str, Any]:
+    from src.app.services.indexing_service import IndexingProgress, run_indexing_pipeline
+
+    results: Dict[str, Any] = {}
+    for pdf in sorted(UPLOADS_DIR.glob("*.pdf")):
+        runs = {}
+        # First run does all the work; the second exercises the unchanged-file skip
+        for label in ("cold", "unchanged"):
+            progress = IndexingProgress()
+            start = time.perf_counter()
+            run_indexing_pipeline(pdf, progress)
+            elapsed = time.perf_counter() - start
+            snapshot = progress.snapshot()
+            runs[label] = {
+                "seconds": round(elapsed, 4),
+                "pages": snapshot["pages_parsed"],
+                "chunks": snapshot["chunks_upserted"],
+                "pages_per_second": round(snapshot["pages_parsed"] / elapsed, 2),
+                "chunks_per_second": round(snapshot["chunks_upserted"] / elapsed, 2),
+            }
+        runs["megabytes"] = round(pdf.stat().st_size / 1e6, 3)
+        results[pdf.name] = runs
+    return results
+
+
+# --- Benchmarks ---
+
+def bench_indexing(args: argparse.Namespace) -> Dict[str, Any]:
+    """Parse -> split -> embed -> upsert throughput on the bundled PDFs."""
+    return _index_bundled_pdfs()
+
+
+def bench_graph(args: argparse.Namespace) -> Dict[str, Any]:
+    """End-to-end graph runs (sync and async), with and without history."""
+    from src.app.core.agents.graph import arun_conversational_qa_flow, run_conversational_qa_flow
+
+    history = [
+        {"turn": i, "question": f"What does section {i} say?", "answer": "It describes the system. " * 10}
+        for i in range(1, 6)
+    ]
+    questions = ["What is Project Phoenix?", "Summarize the Vitalis report.", "How is the app deployed?"]
+    results: Dict[str, Any] = {}
+    for label, turns in (("no_history", []), ("history_5", history)):
+        samples = _time_calls(
+            lambda: run_conversational_qa_flow(questions[0], history=turns), args.repeat
+        )
+        results[f"sync_{label}"] = _summary(samples)
+
+        async def run_async() -> List[float]:
+            out = []
+            for i in range(args.repeat):
+                start = time.perf_counter()
+                await arun_conversational_qa_flow(questions[i % len(questions)], history=turns)
+                out.append(time.perf_counter() - start)
+            return out
+
+        results[f"async_{label}"] = _summary(asyncio.run(run_async()))
+    results["llm_latency_seconds"] = args.llm_latency
+    return results
+
+
+def bench_history(args: argparse.Namespace) -> Dict[str, Any]:
+    """History formatting cost as the conversation grows.
+
+    `format_us` is the unbudgeted `_format_history`; `render_cold_us` renders
+    a session's history from scratch and `render_cached_us` the next request
+    of the same session, which only renders the newly added turn.
+    """
+    from src.app.core.agents.agents import _format_history
+    from src.app.core.agents.history import get_history_render_cache, render_history
+
+    cache = get_history_render_cache()
+    results = {}
+    for turns in (1, 10, 100, 1000):
+        history = [
+            {"turn": i, "question": f"Question number {i}?", "answer": "An answer sentence. " * 25}
+            for i in range(turns)
+        ]
+        session_id = f"bench-{turns}"
+
+        def render_cold() -> str:
+            cache.clear(session_id)
+            return render_history(history, session_id)
+
+        def render_next_turn() -> str:
+            history.append(
+                {"turn": len(history), "question": "One more?", "answer": "Another answer."}
+            )
+            return render_history(history[-turns:], session_id)
+
+        results[f"turns_{turns}"] = {
+            "format_us": round(_per_call_seconds(lambda: _format_history(history)) * 1e6, 2),
+            "output_chars": len(_format_history(history)),
+            "render_cold_us": round(_per_call_seconds(render_cold) * 1e6, 2),
+            "render_cached_us": round(_per_call_seconds(render_next_turn) * 1e6, 2),
+            "rendered_chars": len(render_history(history[-turns:], session_id)),
+        }
+    return results
+
+
+def bench_chunks(args: argparse.Namespace) -> Dict[str, Any]:
+    """`serialize_chunks` and context assembly cost as retrieved context grows."""
+    from langchain_core.documents import Document
+    from src.app.core.retrieval.context import assemble_context
+    from src.app.core.retrieval.serialization import serialize_chunks
+
+    words = "vector database retrieval agent memory summary verification context".split()
+    results = {}
+    for count in (4, 16, 64, 256):
+        docs = [
+            Document(
+                page_content=" ".join(words[(i + j) % len(words)] for j in range(150)) + f" {i}",
+                metadata={"page": i},
+            )
+            for i in range(count)
+        ]
+        results[f"chunks_{count}"] = {
+            "serialize_us": round(_per_call_seconds(lambda: serialize_chunks(docs)) * 1e6, 2),
+            "assemble_us": round(_per_call_seconds(lambda: assemble_context(docs)) * 1e6, 2),
+            "serialized_chars": len(serialize_chunks(docs)),
+        }
+    return results
+
+
+def bench_sessions(args: argparse.Namespace) -> Dict[str, Any]:
+    """Session store append / read latency as a session grows."""
+    from src.app.services.session_store import InMemorySessionStore, SQLiteSessionStore
+
+    workdir = Path(args.workdir)
+    results: Dict[str, Any] = {}
+    for backend in ("memory", "sqlite"):
+        db_path = workdir / f"bench_sessions_{backend}.sqlite3"
+        store = (
+            InMemorySessionStore(max_stored_turns=100_000)
+            if backend == "memory"
+            else SQLiteSessionStore(str(db_path), max_stored_turns=100_000)
+        )
+        turn = {"question": "What is in the report?", "answer": "A detailed answer. " * 20}
+        stored = 0
+        for size in (10, 100, 1000):
+            appends = _time_calls(lambda: store.append_turn("bench", dict(turn)), size - stored)
+            stored = size
+            results[f"{backend}_turns_{size}"] = {
+                "append": _summary(appends),
+                "read_last_20": _summary(
+                    _time_calls(lambda: store.get_history("bench", last_n=20), 50)
+                ),
+                "read_all": _summary(_time_calls(lambda: store.get_history("bench"), 20)),
+            }
+            if backend == "sqlite":
+                results[f"{backend}_turns_{size}"]["file_bytes"] = sum(
+                    p.stat().st_size for p in workdir.glob(db_path.name + "*")
+                )
+        store.close()
+    return results
+
+
+_STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import src.app.api
+imported = time.perf_counter() - start
+result = {"import_seconds": imported}
+if sys.argv[1] == "cold":
+    from pathlib import Path
+    from fastapi.testclient import TestClient
+    from benchmarks.run import _index_bundled_pdfs, configure_offline
+    configure_offline(Path(sys.argv[2]), 0.0, 0.0)
+    _index_bundled_pdfs()
+    with TestClient(src.app.api.app) as client:
+        for label in ("first_request_seconds", "second_request_seconds"):
+            start = time.perf_counter()
+            client.post("/qa", json={"question": "What is Project Phoenix?"})
+            result[label] = time.perf_counter() - start
+print(json.dumps(result))
+"""
+
+
+def bench_startup(args: argparse.Namespace) -> Dict[str, Any]:
+    """Fresh-process import time of the API and cold vs warm first request.
+
+    Every sample is a new interpreter, as when a worker is scaled up.
+    """
+    samples: Dict[str, List[float]] = {}
+    for mode in ("import", "cold"):
+        for attempt in range(args.startup_repeat):
+            workdir = Path(args.workdir) / f"startup_{mode}_{attempt}"
+            workdir.mkdir()
+            output = subprocess.run(
+                [sys.executable, "-c", _STARTUP_PROBE, mode, str(workdir)],
+                cwd=REPO_ROOT,
+                # No keys: importing the API must not need them
+                env={k: v for k, v in os.environ.items() if not k.endswith("_API_KEY")},
+                capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            for key, value in json.loads(output).items():
+                samples.setdefault(f"{mode}_{key}", []).append(value)
+    return {key: _summary(values) for key, values in samples.items()}
+
+
+_RUNNERS: Dict[str, Callable[[argparse.Namespace], Dict[str, Any]]] = {
+    "indexing": bench_indexing,
+    "graph": bench_graph,
+    "history": bench_history,
+    "chunks": bench_chunks,
+    "sessions": bench_sessions,
+    "startup": bench_startup,
+}
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="benchmarks to run")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake LLM call")
+    parser.add_argument("--embedding-latency", type=float, default=0.0, help="seconds per fake embedding call")
+    parser.add_argument("--repeat", type=int, default=10, help="graph runs per scenario")
+    parser.add_argument("--startup-repeat", type=int, default=3, help="fresh processes per startup scenario")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as workdir:
+        args.workdir = workdir
+        configure_offline(Path(workdir), args.llm_latency, args.embedding_latency)
+
+        selected = args.only or list(BENCHMARKS)
+        results: Dict[str, Any] = {}
+        if "graph" in selected and "indexing" not in selected:
+            # The graph needs something to retrieve
+            _index_bundled_pdfs()
+        for name in BENCHMARKS:
+            if name in selected:
+                print(f"running {name}...", file=sys.stderr)
+                results[name] = _RUNNERS[name](args)
+
+        from src.app.core.retrieval.clients import close_clients
+
+        close_clients()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "llm_latency_seconds": args.llm_latency,
+            "embedding_latency_seconds": args.embedding_latency,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
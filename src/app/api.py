@@ -2,32 +2,93 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
+import json
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import AsyncIterator, Dict, List, Any
 from datetime import datetime, timezone # timestamp
 
 from fastapi import FastAPI, File, HTTPException, Request, UploadFile, status
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
 from .models import (
     QuestionRequest, 
     QAResponse, 
+    BatchQARequest,
+    BatchQAResult,
     ConversationalQARequest, 
     ConversationalQAResponse,
-    ConversationHistory
+    ConversationHistory,
+    IndexingJobStatus,
 )
-from .core.agents.graph import run_conversational_qa_flow
-from .services.indexing_service import index_pdf_file
+from .core.agents.graph import (
+    arun_conversational_qa_flow,
+    astream_conversational_qa_flow,
+    warm_up_qa_graph,
+)
+from .core.config import get_settings
+from .core.metrics import REGISTRY, track_request_timings
+from .core.retrieval.clients import aclose_clients
+from .services.indexing_jobs import get_job_manager, shutdown_job_manager
+from .services.qa_service import run_qa_batch
+from .services.session_store import close_session_store, get_session_store
+from .services.upload_store import InvalidUpload, UploadTooLarge, store_upload
+
+
+async def _expire_sessions_periodically() -> None:
+    """Background task: drop idle sessions from the session store."""
+    interval = get_settings().session_expiry_interval_seconds
+    while True:
+        await asyncio.sleep(interval)
+        with suppress(Exception):
+            await run_in_threadpool(get_session_store().expire)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Manage process-wide resources for the lifetime of the app."""
+    if get_settings().warm_up_on_startup:
+        await run_in_threadpool(warm_up_qa_graph)
+    expiry_task = asyncio.create_task(_expire_sessions_periodically())
+    yield
+    expiry_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await expiry_task
+    close_session_store()
+    await run_in_threadpool(shutdown_job_manager)
+    # Release pooled embeddings / Pinecone / HTTP connections
+    await aclose_clients()
+
 
 app = FastAPI(
     title="Class 12 Multi-Agent RAG Demo",
     description="Demo API with Feature 5: Conversational Memory",
     version="0.2.1",
+    lifespan=lifespan,
 )
 
-# --- In-Memory Session Store ---
-SESSIONS: Dict[str, List[Dict[str, Any]]] = {}
-SESSIONS_METADATA: Dict[str, Dict[str, Any]] = {}
+# Room for multipart boundaries and part headers around the file itself
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized uploads from Content-Length, before the body is read.
+
+    Uploads without a Content-Length (chunked) are still capped while they
+    are copied to the store.
+    """
+    if request.method == "POST" and request.url.path == "/index-pdf":
+        content_length = request.headers.get("content-length", "")
+        limit = get_settings().upload_max_bytes + _MULTIPART_OVERHEAD_BYTES
+        if content_length.isdigit() and int(content_length) > limit:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": "File exceeds the upload size limit."},
+            )
+    return await call_next(request)
 
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception) -> JSONResponse:
@@ -38,7 +99,68 @@ async def unhandled_exception_handler(request: Request, exc: Exception) -> JSONR
         content={"detail": "Internal server error"},
     )
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    """Prometheus scrape endpoint (node, LLM, embedding, search and cache metrics)."""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 # --- Feature 5: Conversational Endpoints ---
+# The session store helpers below do blocking I/O (the SQLite backend may
+# wait up to its busy timeout for a write lock), so endpoints run them with
+# `run_in_threadpool` rather than on the event loop.
+
+def _session_history(session_id: str | None) -> List[Dict[str, Any]]:
+    """Recent turns of a session, capped to SESSION_HISTORY_TURNS."""
+    if not session_id:
+        return []
+    return get_session_store().get_history(
+        session_id, last_n=get_settings().session_history_turns
+    )
+
+
+def _session_memory(session_id: str | None) -> Dict[str, Any]:
+    """Stored rolling summary for a session, as flow keyword arguments."""
+    metadata = get_session_store().get_metadata(session_id) if session_id else {}
+    return {
+        "conversation_summary": metadata.get("conversation_summary"),
+        "summarized_turns": metadata.get("summarized_turns", 0),
+    }
+
+
+def _save_memory(session_id: str, result: Dict[str, Any]) -> None:
+    """Persist the summary produced by the memory summarizer node."""
+    if result.get("conversation_summary"):
+        get_session_store().set_metadata(session_id, {
+            "conversation_summary": result["conversation_summary"],
+            "summarized_turns": result.get("summarized_turns", 0),
+        })
+
+
+def _save_turn(session_id: str, question: str, answer: str, context: str) -> None:
+    """Append a completed question/answer turn to the session history.
+
+    The store assigns the turn number.
+    """
+    new_turn = {
+        "question": question,
+        "answer": answer,
+        "context_snippet": (context or "")[:200] + "...",
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+    get_session_store().append_turn(session_id, new_turn)
+
+
+def _response_timings(timings: Dict[str, float]) -> Dict[str, float] | None:
+    """Per-request duration breakdown, if enabled for responses."""
+    return dict(timings) if get_settings().response_timings_enabled else None
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 
 @app.post("/qa/conversation", response_model=ConversationalQAResponse)
 async def conversational_qa_endpoint(payload: ConversationalQARequest) -> ConversationalQAResponse:
@@ -49,18 +171,18 @@ async def conversational_qa_endpoint(payload: ConversationalQARequest) -> Conver
         raise HTTPException(status_code=400, detail="Question cannot be empty.")
 
     # 1. Retrieve history
-    current_history = []
     session_id = payload.session_id
+    current_history = await run_in_threadpool(_session_history, session_id)
+    memory = await run_in_threadpool(_session_memory, session_id)
 
-    if session_id and session_id in SESSIONS:
-        current_history = SESSIONS[session_id]
-    
     # 2. Run the Graph
-    result = run_conversational_qa_flow(
-        question=question,
-        history=current_history,
-        session_id=session_id
-    )
+    with track_request_timings() as timings:
+        result = await arun_conversational_qa_flow(
+            question=question,
+            history=current_history,
+            session_id=session_id,
+            **memory,
+        )
 
     # 3. Extract Results
     final_answer = result.get("answer", "I could not generate an answer.")
@@ -71,61 +193,167 @@ async def conversational_qa_endpoint(payload: ConversationalQARequest) -> Conver
     final_summary = result.get("conversation_summary", "")
 
     # 4. Save History
-    if final_session_id not in SESSIONS:
-        SESSIONS[final_session_id] = []
-    
-    turn_number = len(SESSIONS[final_session_id]) + 1
-    new_turn = {
-        "turn": turn_number,
-        "question": question,
-        "answer": final_answer,
-        "context_snippet": final_context[:200] + "...", 
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
-    SESSIONS[final_session_id].append(new_turn)
+    await run_in_threadpool(_save_turn, final_session_id, question, final_answer, final_context)
+    await run_in_threadpool(_save_memory, final_session_id, result)
 
     # 5. Return Response (Include Summary)
     return ConversationalQAResponse(
         answer=final_answer,
         session_id=final_session_id,
         context=final_context,
-        conversation_summary=final_summary # <--- Sending to UI
+        conversation_summary=final_summary, # <--- Sending to UI
+        verification_decision=result.get("verification_decision"),
+        grounding_score=result.get("grounding_score"),
+        timings=_response_timings(timings),
+    )
+
+@app.post("/qa/conversation/stream")
+async def conversational_qa_stream_endpoint(payload: ConversationalQARequest) -> StreamingResponse:
+    """Conversational QA as a Server-Sent Events stream.
+
+    Emits `stage` events as graph nodes finish, `token` events with the
+    answer text as it is generated, and a closing `done` event carrying the
+    full answer, session id, context and conversation summary.
+    """
+    question = payload.question.strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Question cannot be empty.")
+
+    session_id = payload.session_id
+    current_history = await run_in_threadpool(_session_history, session_id)
+    memory = await run_in_threadpool(_session_memory, session_id)
+
+    async def event_stream() -> AsyncIterator[str]:
+        with track_request_timings() as timings:
+            try:
+                async for event in astream_conversational_qa_flow(
+                    question=question,
+                    history=current_history,
+                    session_id=session_id,
+                    **memory,
+                ):
+                    if event["event"] != "final":
+                        yield _sse(event["event"], event["data"])
+                        continue
+
+                    result = event["data"]
+                    final_answer = result.get("answer") or "I could not generate an answer."
+                    final_session_id = result.get("session_id")
+                    final_context = result.get("context") or ""
+                    await run_in_threadpool(
+                        _save_turn, final_session_id, question, final_answer, final_context
+                    )
+                    await run_in_threadpool(_save_memory, final_session_id, result)
+
+                    yield _sse("done", ConversationalQAResponse(
+                        answer=final_answer,
+                        session_id=final_session_id,
+                        context=final_context,
+                        conversation_summary=result.get("conversation_summary") or "",
+                        verification_decision=result.get("verification_decision"),
+                        grounding_score=result.get("grounding_score"),
+                        timings=_response_timings(timings),
+                    ).model_dump())
+            except Exception:
+                # Headers are already sent, so report failures in-band
+                yield _sse("error", {"detail": "Internal server error"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 @app.get("/qa/session/{session_id}/history", response_model=ConversationHistory)
 async def get_session_history(session_id: str) -> ConversationHistory:
-    if session_id not in SESSIONS:
+    store = get_session_store()
+    if not await run_in_threadpool(store.exists, session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
     return ConversationHistory(
         session_id=session_id,
-        history=SESSIONS[session_id]
+        history=await run_in_threadpool(store.get_history, session_id)
     )
 
 # --- Legacy Endpoints ---
 @app.post("/qa", response_model=QAResponse)
 async def qa_endpoint(payload: QuestionRequest) -> QAResponse:
-    result = run_conversational_qa_flow(payload.question)
+    with track_request_timings() as timings:
+        result = await arun_conversational_qa_flow(payload.question)
     return QAResponse(
         answer=result.get("answer", ""),
         context=result.get("context", ""),
+        verification_decision=result.get("verification_decision"),
+        grounding_score=result.get("grounding_score"),
+        timings=_response_timings(timings),
     )
 
-@app.post("/index-pdf")
-async def index_pdf(file: UploadFile = File(...)) -> dict:
+@app.post("/qa/batch")
+async def qa_batch_endpoint(payload: BatchQARequest) -> StreamingResponse:
+    """Answer many independent questions; results stream back as NDJSON.
+
+    Each line is a `BatchQAResult`, emitted as soon as that question is
+    answered (so lines arrive out of order; use `index` to match them).
+    """
+    settings = get_settings()
+    questions = [question.strip() for question in payload.questions]
+    if not questions or not all(questions):
+        raise HTTPException(status_code=400, detail="Questions cannot be empty.")
+    if len(questions) > settings.qa_batch_max_questions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.qa_batch_max_questions} questions per batch.",
+        )
+
+    async def result_lines() -> AsyncIterator[str]:
+        async for result in run_qa_batch(questions, payload.max_concurrency):
+            yield BatchQAResult(**result).model_dump_json() + "\n"
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
+@app.post(
+    "/index-pdf",
+    response_model=IndexingJobStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def index_pdf(file: UploadFile = File(...)) -> IndexingJobStatus:
+    """Store an uploaded PDF and queue it for background indexing.
+
+    Poll `/index-pdf/jobs/{job_id}` for progress.
+    """
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
 
-    upload_dir = Path("data/uploads")
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    file_path = upload_dir / file.filename
-    contents = await file.read()
-    file_path.write_bytes(contents)
+    settings = get_settings()
+    try:
+        stored = await run_in_threadpool(
+            store_upload,
+            file.file,
+            file.filename,
+            Path(settings.upload_dir),
+            settings.upload_max_bytes,
+            settings.upload_block_size,
+        )
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    except InvalidUpload as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    finally:
+        await file.close()
 
-    chunks_indexed = index_pdf_file(file_path)
+    job = get_job_manager().submit(stored.path, stored.filename, file_hash=stored.sha256)
+    return IndexingJobStatus(**job.to_dict())
 
-    return {
-        "filename": file.filename,
-        "chunks_indexed": chunks_indexed,
-        "message": "PDF indexed successfully.",
-    }
\ No newline at end of file
+@app.get("/index-pdf/jobs/{job_id}", response_model=IndexingJobStatus)
+async def get_indexing_job(job_id: str) -> IndexingJobStatus:
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return IndexingJobStatus(**job.to_dict())
+
+@app.delete("/index-pdf/jobs/{job_id}", response_model=IndexingJobStatus)
+async def cancel_indexing_job(job_id: str) -> IndexingJobStatus:
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return IndexingJobStatus(**job.to_dict())
@@ -1,12 +1,29 @@
 """Agent implementations for the multi-agent RAG flow."""
 
-from typing import List, Dict, Any
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
 
-from langchain.agents import create_agent
+from langchain_core.documents import Document
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, SystemMessage
 
+from ..config import get_settings
 from ..llm.factory import create_chat_model
+from ..llm.rate_limit import PRIORITY_BACKGROUND
+from ..retrieval.context import assemble_context
+from ..retrieval.fusion import reciprocal_rank_fusion
+from ..retrieval.vector_store import aretrieve, aretrieve_many, retrieve, retrieve_many
+from .grounding import (
+    DECISION_FULL,
+    DECISION_LIGHT,
+    DECISION_SKIPPED,
+    check_grounding,
+    grounding_decision,
+)
+from .history import render_history
 from .prompts import (
+    MULTI_QUERY_SYSTEM_PROMPT,
+    QUERY_REWRITE_SYSTEM_PROMPT,
     RETRIEVAL_SYSTEM_PROMPT,
     SUMMARIZATION_SYSTEM_PROMPT,
     VERIFICATION_SYSTEM_PROMPT,
@@ -39,112 +56,504 @@ def _format_history(history: List[Dict[str, Any]]) -> str:
 
 
 # Define agents
-retrieval_agent = create_agent(
-    model=create_chat_model(),
-    tools=[retrieval_tool],
-    system_prompt=RETRIEVAL_SYSTEM_PROMPT,
-)
+# Built on first use rather than at import: constructing them needs the
+# OpenAI settings and imports langchain.agents, neither of which should be
+# paid for by importing the API module (worker boot, tests, tooling).
 
-summarization_agent = create_agent(
-    model=create_chat_model(),
-    tools=[],
-    system_prompt=SUMMARIZATION_SYSTEM_PROMPT,
-)
+def _build_agent(system_prompt: str, tools: List[Any], model_name: Optional[str] = None) -> Any:
+    from langchain.agents import create_agent
 
-verification_agent = create_agent(
-    model=create_chat_model(),
-    tools=[],
-    system_prompt=VERIFICATION_SYSTEM_PROMPT,
-)
+    return create_agent(
+        model=create_chat_model(model_name=model_name),
+        tools=tools,
+        system_prompt=system_prompt,
+    )
 
 
-def retrieval_node(state: QAState) -> QAState:
-    """Retrieval Agent node: gathers context considering history."""
+@lru_cache(maxsize=1)
+def get_retrieval_agent() -> Any:
+    return _build_agent(RETRIEVAL_SYSTEM_PROMPT, [retrieval_tool])
+
+
+@lru_cache(maxsize=1)
+def get_summarization_agent() -> Any:
+    return _build_agent(SUMMARIZATION_SYSTEM_PROMPT, [])
+
+
+@lru_cache(maxsize=1)
+def get_verification_agent() -> Any:
+    return _build_agent(VERIFICATION_SYSTEM_PROMPT, [])
+
+
+@lru_cache(maxsize=1)
+def get_verification_light_agent() -> Any:
+    """Same prompt on a cheaper model, for drafts the grounding check finds mostly supported."""
+    return _build_agent(
+        VERIFICATION_SYSTEM_PROMPT, [], model_name=get_settings().openai_light_model_name
+    )
+
+
+@lru_cache(maxsize=1)
+def get_chat_model() -> Any:
+    """Shared plain chat model for query rewriting."""
+    return create_chat_model()
+
+
+@lru_cache(maxsize=1)
+def get_background_chat_model() -> Any:
+    """Chat model for memory summaries; yields rate limit budget to user-facing calls."""
+    return create_chat_model(priority=PRIORITY_BACKGROUND)
+
+
+def warm_up_agents() -> None:
+    """Build every agent and model now instead of on the first request."""
+    get_retrieval_agent()
+    get_summarization_agent()
+    get_verification_agent()
+    if get_settings().verification_mode == "adaptive":
+        get_verification_light_agent()
+    get_chat_model()
+    get_background_chat_model()
+
+
+def _incremental_memory_mode() -> bool:
+    return get_settings().memory_mode == "incremental"
+
+
+def history_block(
+    history: List[Dict[str, Any]],
+    session_id: Optional[str] = None,
+    conversation_summary: Optional[str] = None,
+) -> str:
+    """Render the conversation memory section of an agent prompt.
+
+    In "full" memory mode this is the history, trimmed oldest-first to
+    `history_token_budget`. In "incremental" mode it is the rolling summary
+    plus only the last few verbatim turns, so the prompt size stays flat as
+    the session grows.
+    """
+    if not _incremental_memory_mode():
+        return f"Conversation History:\n{render_history(history, session_id)}"
+
+    recent = history[-get_settings().memory_recent_turns:] if history else []
+    if not conversation_summary:
+        return f"Conversation History:\n{render_history(recent, session_id)}"
+    return (
+        f"Conversation Summary:\n{conversation_summary}\n\n"
+        f"Recent Conversation:\n{render_history(recent, session_id)}"
+    )
+
+
+def _history_block(state: QAState) -> str:
+    """History section computed once per request (`history_text`), or now if missing."""
+    text = state.get("history_text")
+    if text is None:
+        text = history_block(
+            state.get("history", []),
+            state.get("session_id"),
+            state.get("conversation_summary"),
+        )
+    return text
+
+
+def _retrieval_messages(state: QAState) -> List[HumanMessage]:
     question = state["question"]
-    history = state.get("history", [])
     
     # Format the input to include history
-    history_str = _format_history(history)
     user_content = (
-        f"Conversation History:\n{history_str}\n\n"
+        f"{_history_block(state)}\n\n"
         f"Current Question: {question}"
     )
+    return [HumanMessage(content=user_content)]
 
-    result = retrieval_agent.invoke({"messages": [HumanMessage(content=user_content)]})
 
-    messages = result.get("messages", [])
-    context = ""
+def _tool_artifacts(messages: List[object]) -> List[List[Document]]:
+    """Document lists returned by every retrieval tool call, in call order."""
+    return [
+        list(msg.artifact)
+        for msg in messages
+        if isinstance(msg, ToolMessage) and isinstance(msg.artifact, list)
+    ]
 
-    for msg in reversed(messages):
-        if isinstance(msg, ToolMessage):
-            context = str(msg.content)
-            break
 
-    return {"context": context}
+def _merge_tool_results(messages: List[object]) -> List[Document]:
+    """Merge the candidates of all tool calls, not just the last one.
 
+    Each call's artifact is its full ranked candidate list; fusing them
+    deduplicates by chunk id and ranks chunks found by several searches
+    highest. Context assembly then runs once, on the fused list.
+    """
+    artifacts = _tool_artifacts(messages)
+    if not artifacts:
+        return []
+    settings = get_settings()
+    return reciprocal_rank_fusion(
+        artifacts, k=sum(map(len, artifacts)), rrf_k=settings.rrf_k
+    )
 
-def summarization_node(state: QAState) -> QAState:
-    """Summarization Agent node: generates draft answer using context & history."""
+
+# --- Direct retrieval (no tool-calling agent) ---
+
+# Words that usually point back at something said earlier in the conversation
+_FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|they|them|their|theirs|this|that|these|those|he|him|his|she|her"
+    r"|there|former|latter|above|previous|same)\b",
+    re.IGNORECASE,
+)
+_SHORT_FOLLOW_UP_WORDS = 4
+
+
+def _needs_query_rewrite(question: str, history: List[Dict[str, Any]]) -> bool:
+    """Heuristic: does the question refer back to the conversation history?"""
+    if not history:
+        return False
+    if len(question.split()) <= _SHORT_FOLLOW_UP_WORDS:
+        return True
+    return bool(_FOLLOW_UP_PATTERN.search(question))
+
+
+def _rewrite_messages(question: str, history: List[Dict[str, Any]]) -> List[object]:
+    recent = history[-get_settings().query_rewrite_history_turns:]
+    return [
+        SystemMessage(content=QUERY_REWRITE_SYSTEM_PROMPT),
+        HumanMessage(content=(
+            f"Conversation History:\n{_format_history(recent)}\n\n"
+            f"Latest Question: {question}"
+        )),
+    ]
+
+
+def rewrite_query(question: str, history: List[Dict[str, Any]]) -> str:
+    """Turn a follow-up question into a standalone search query."""
+    if not _needs_query_rewrite(question, history):
+        return question
+    response = get_chat_model().invoke(_rewrite_messages(question, history))
+    return str(response.content).strip() or question
+
+
+async def arewrite_query(question: str, history: List[Dict[str, Any]]) -> str:
+    """Async variant of `rewrite_query`."""
+    if not _needs_query_rewrite(question, history):
+        return question
+    response = await get_chat_model().ainvoke(_rewrite_messages(question, history))
+    return str(response.content).strip() or question
+
+
+# --- Multi-query retrieval ---
+
+# Leading list markers the model sometimes adds despite the instructions
+_QUERY_MARKER_PATTERN = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s*")
+
+
+def _multi_query_messages(question: str, history: List[Dict[str, Any]]) -> List[object]:
+    settings = get_settings()
+    recent = history[-settings.query_rewrite_history_turns:]
+    return [
+        SystemMessage(
+            content=MULTI_QUERY_SYSTEM_PROMPT.format(count=settings.multi_query_count)
+        ),
+        HumanMessage(content=(
+            f"Conversation History:\n{_format_history(recent)}\n\n"
+            f"Latest Question: {question}"
+        )),
+    ]
+
+
+def _parse_query_variants(question: str, text: str) -> List[str]:
+    """The question itself plus up to `multi_query_count` generated variants."""
+    variants = [
+        _QUERY_MARKER_PATTERN.sub("", line).strip().strip('"')
+        for line in text.splitlines()
+    ]
+    variants = [variant for variant in variants if variant]
+    return [question, *variants[:get_settings().multi_query_count]]
+
+
+def generate_query_variants(question: str, history: List[Dict[str, Any]]) -> List[str]:
+    """Write several search queries for a question with one LLM call."""
+    response = get_chat_model().invoke(_multi_query_messages(question, history))
+    return _parse_query_variants(question, str(response.content))
+
+
+async def agenerate_query_variants(
+    question: str, history: List[Dict[str, Any]]
+) -> List[str]:
+    """Async variant of `generate_query_variants`."""
+    response = await get_chat_model().ainvoke(_multi_query_messages(question, history))
+    return _parse_query_variants(question, str(response.content))
+
+
+def _retrieval_update(docs: List[Document]) -> QAState:
+    context, _ = assemble_context(docs)
+    return {"context": context, "retrieved_docs": docs}
+
+
+def retrieval_node(state: QAState) -> QAState:
+    """Retrieval Agent node: gathers context considering history."""
+    settings = get_settings()
+    question = state["question"]
+    history = state.get("history", [])
+    if settings.retrieval_mode == "direct":
+        query = rewrite_query(question, history)
+        return _retrieval_update(retrieve(query, k=settings.context_candidate_k))
+    if settings.retrieval_mode == "multi_query":
+        queries = generate_query_variants(question, history)
+        return _retrieval_update(retrieve_many(queries, k=settings.context_candidate_k))
+
+    result = get_retrieval_agent().invoke({"messages": _retrieval_messages(state)})
+    return _retrieval_update(_merge_tool_results(result.get("messages", [])))
+
+
+async def aretrieval_node(state: QAState) -> QAState:
+    """Async variant of `retrieval_node`."""
+    settings = get_settings()
     question = state["question"]
-    context = state.get("context")
     history = state.get("history", [])
+    if settings.retrieval_mode == "direct":
+        query = await arewrite_query(question, history)
+        return _retrieval_update(await aretrieve(query, k=settings.context_candidate_k))
+    if settings.retrieval_mode == "multi_query":
+        queries = await agenerate_query_variants(question, history)
+        docs = await aretrieve_many(queries, k=settings.context_candidate_k)
+        return _retrieval_update(docs)
 
-    history_str = _format_history(history)
+    result = await get_retrieval_agent().ainvoke({"messages": _retrieval_messages(state)})
+    return _retrieval_update(_merge_tool_results(result.get("messages", [])))
+
+
+def _summarization_messages(state: QAState) -> List[HumanMessage]:
+    question = state["question"]
+    context = state.get("context")
+
+    # Stable parts first (history grows append-only within a session, the
+    # context is shared by re-asked questions) so provider prefix caching
+    # can reuse them; the question goes last
     user_content = (
-        f"Conversation History:\n{history_str}\n\n"
-        f"Current Question: {question}\n\n"
-        f"Context:\n{context}"
+        f"{_history_block(state)}\n\n"
+        f"Context:\n{context}\n\n"
+        f"Current Question: {question}"
     )
+    return [HumanMessage(content=user_content)]
+
 
-    result = summarization_agent.invoke(
-        {"messages": [HumanMessage(content=user_content)]}
+def summarization_node(state: QAState) -> QAState:
+    """Summarization Agent node: generates draft answer using context & history."""
+    result = get_summarization_agent().invoke(
+        {"messages": _summarization_messages(state)}
     )
-    messages = result.get("messages", [])
-    draft_answer = _extract_last_ai_content(messages)
+    draft_answer = _extract_last_ai_content(result.get("messages", []))
+    return {"draft_answer": draft_answer}
+
 
+async def asummarization_node(state: QAState) -> QAState:
+    """Async variant of `summarization_node`."""
+    result = await get_summarization_agent().ainvoke(
+        {"messages": _summarization_messages(state)}
+    )
+    draft_answer = _extract_last_ai_content(result.get("messages", []))
     return {"draft_answer": draft_answer}
 
 
-def verification_node(state: QAState) -> QAState:
-    """Verification Agent node: verifies answer."""
+def _verification_messages(state: QAState) -> List[HumanMessage]:
     question = state["question"]
     context = state.get("context", "")
     draft_answer = state.get("draft_answer", "")
     
-    user_content = f"""Question: {question}
-    Context: {context}
-    Draft Answer: {draft_answer}
-    Please verify and correct the draft answer."""
+    # Context before the question and draft, as in the summarization prompt
+    user_content = (
+        f"Context: {context}\n"
+        f"Question: {question}\n"
+        f"Draft Answer: {draft_answer}\n"
+        "Please verify and correct the draft answer."
+    )
+    return [HumanMessage(content=user_content)]
 
-    result = verification_agent.invoke(
-        {"messages": [HumanMessage(content=user_content)]}
+
+def verification_node(state: QAState) -> QAState:
+    """Verification Agent node: verifies answer."""
+    result = get_verification_agent().invoke(
+        {"messages": _verification_messages(state)}
     )
-    messages = result.get("messages", [])
-    answer = _extract_last_ai_content(messages)
+    answer = _extract_last_ai_content(result.get("messages", []))
+    return {"answer": answer}
+
 
+async def averification_node(state: QAState) -> QAState:
+    """Async variant of `verification_node`."""
+    result = await get_verification_agent().ainvoke(
+        {"messages": _verification_messages(state)}
+    )
+    answer = _extract_last_ai_content(result.get("messages", []))
     return {"answer": answer}
 
+
+def verification_light_node(state: QAState) -> QAState:
+    """Verification on the light model for mostly grounded drafts."""
+    result = get_verification_light_agent().invoke(
+        {"messages": _verification_messages(state)}
+    )
+    answer = _extract_last_ai_content(result.get("messages", []))
+    return {"answer": answer}
+
+
+async def averification_light_node(state: QAState) -> QAState:
+    """Async variant of `verification_light_node`."""
+    result = await get_verification_light_agent().ainvoke(
+        {"messages": _verification_messages(state)}
+    )
+    answer = _extract_last_ai_content(result.get("messages", []))
+    return {"answer": answer}
+
+# --- Conditional Verification ---
+
+def grounding_check_node(state: QAState) -> QAState:
+    """Score the draft against the context and pick a verification level.
+
+    Purely local (no LLM call), so it has no async variant of its own.
+    """
+    settings = get_settings()
+    report = check_grounding(
+        state.get("draft_answer") or "",
+        state.get("context") or "",
+        support_threshold=settings.grounding_support_threshold,
+    )
+    if settings.verification_mode == "adaptive":
+        decision = grounding_decision(
+            report,
+            skip_threshold=settings.grounding_skip_threshold,
+            light_threshold=settings.grounding_light_threshold,
+        )
+    else:
+        decision = DECISION_FULL
+    return {"grounding_score": round(report.score, 3), "verification_decision": decision}
+
+
+def route_verification(state: QAState) -> str:
+    """Conditional edge: name of the node that produces the final answer."""
+    decision = state.get("verification_decision")
+    if decision == DECISION_SKIPPED:
+        return "finalize_draft"
+    if decision == DECISION_LIGHT:
+        return "verification_light"
+    return "verification"
+
+
+def finalize_draft_node(state: QAState) -> QAState:
+    """Use the draft as the answer when verification was skipped."""
+    return {"answer": state.get("draft_answer") or ""}
+
 # --- Feature 5 Extension: Memory Summarizer ---
 
-def summarize_conversation(history: List[Dict[str, Any]]) -> str:
-    """Helper to compress history using an LLM."""
-    llm = create_chat_model()
+def _summary_request(history: List[Dict[str, Any]]) -> HumanMessage:
     history_text = _format_history(history)
-    
-    msg = HumanMessage(content=(
+    return HumanMessage(content=(
         f"Summarize the key points of this conversation in 3 bullet points:\n\n{history_text}"
     ))
-    response = llm.invoke([msg])
+
+
+def summarize_conversation(history: List[Dict[str, Any]]) -> str:
+    """Helper to compress history using an LLM."""
+    llm = get_background_chat_model()
+    response = llm.invoke([_summary_request(history)])
     return str(response.content)
 
+
+async def asummarize_conversation(history: List[Dict[str, Any]]) -> str:
+    """Async variant of `summarize_conversation`."""
+    llm = get_background_chat_model()
+    response = await llm.ainvoke([_summary_request(history)])
+    return str(response.content)
+
+
+def _turn_number(turn: Dict[str, Any], position: int) -> int:
+    return int(turn.get("turn") or position)
+
+
+def _unsummarized_turns(
+    history: List[Dict[str, Any]], summarized_turns: int
+) -> List[Dict[str, Any]]:
+    """Turns newer than the last one folded into the rolling summary."""
+    return [
+        turn
+        for position, turn in enumerate(history, start=1)
+        if _turn_number(turn, position) > summarized_turns
+    ]
+
+
+def _summary_update_request(summary: str, new_turns: List[Dict[str, Any]]) -> HumanMessage:
+    return HumanMessage(content=(
+        "Update this conversation summary with the new exchange. Keep it to "
+        "3 bullet points and preserve facts that later questions may refer to.\n\n"
+        f"Current Summary:\n{summary}\n\n"
+        f"New Exchange:\n{_format_history(new_turns)}"
+    ))
+
+
+def update_conversation_summary(summary: str, new_turns: List[Dict[str, Any]]) -> str:
+    """Fold only the newest turns into an existing rolling summary."""
+    if not summary:
+        return summarize_conversation(new_turns)
+    llm = get_background_chat_model()
+    response = llm.invoke([_summary_update_request(summary, new_turns)])
+    return str(response.content)
+
+
+async def aupdate_conversation_summary(
+    summary: str, new_turns: List[Dict[str, Any]]
+) -> str:
+    """Async variant of `update_conversation_summary`."""
+    if not summary:
+        return await asummarize_conversation(new_turns)
+    llm = get_background_chat_model()
+    response = await llm.ainvoke([_summary_update_request(summary, new_turns)])
+    return str(response.content)
+
+
 def memory_summarizer_node(state: QAState) -> QAState:
-    """Optional: Summarize conversation if it gets too long."""
+    """Optional: Summarize conversation if it gets too long.
+
+    In "incremental" memory mode only turns not yet covered by the stored
+    summary are sent to the LLM, so each turn costs the same regardless of
+    how long the session is.
+    """
     history = state.get("history", [])
     existing_summary = state.get("conversation_summary", "")
 
     # TRIGGER: Summarize after just 3 turns
     if len(history) >= 2:
-        new_summary = summarize_conversation(history)
-        return {"conversation_summary": new_summary}
+        if _incremental_memory_mode():
+            new_turns = _unsummarized_turns(history, state.get("summarized_turns") or 0)
+            if not new_turns:
+                return {"conversation_summary": existing_summary}
+            new_summary = update_conversation_summary(existing_summary or "", new_turns)
+        else:
+            new_summary = summarize_conversation(history)
+        return {
+            "conversation_summary": new_summary,
+            "summarized_turns": _turn_number(history[-1], len(history)),
+        }
     
-    return {"conversation_summary": existing_summary}
\ No newline at end of file
+    return {"conversation_summary": existing_summary}
+
+
+async def amemory_summarizer_node(state: QAState) -> QAState:
+    """Async variant of `memory_summarizer_node`."""
+    history = state.get("history", [])
+    existing_summary = state.get("conversation_summary", "")
+
+    if len(history) >= 2:
+        if _incremental_memory_mode():
+            new_turns = _unsummarized_turns(history, state.get("summarized_turns") or 0)
+            if not new_turns:
+                return {"conversation_summary": existing_summary}
+            new_summary = await aupdate_conversation_summary(
+                existing_summary or "", new_turns
+            )
+        else:
+            new_summary = await asummarize_conversation(history)
+        return {
+            "conversation_summary": new_summary,
+            "summarized_turns": _turn_number(history[-1], len(history)),
+        }
+
+    return {"conversation_summary": existing_summary}
@@ -0,0 +1,233 @@
+"""Semantic answer cache for the QA graph.
+
+FAQ-style traffic asks the same handful of questions again and again. The
+cache sits in front of `graph.invoke` and returns a previous final state when
+the new question is an exact (normalized) match of one already answered.
+Matching near-duplicates by embedding similarity is opt-in: two questions
+can be very close in embedding space and still ask different things ("How
+do I enable X?" / "How do I disable X?"), and a wrong cached answer is
+worse than a slow one.
+
+Entries are scoped by:
+- a fingerprint of the conversation history, so follow-up questions only hit
+  when the preceding conversation is identical (history-free turns share the
+  empty fingerprint), and
+- the index version from `vector_store.get_index_version()`, so indexing new
+  content implicitly invalidates every answer computed before it.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import get_settings
+from ..metrics import REGISTRY, Sample
+from ..retrieval.embedding_cache import normalize_query
+
+
+def history_fingerprint(history: Optional[List[Dict[str, Any]]]) -> str:
+    """Hash the question/answer pairs of a history ("" when empty)."""
+    if not history:
+        return ""
+    digest = hashlib.sha256()
+    for turn in history:
+        digest.update(normalize_query(str(turn.get("question", ""))).encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(str(turn.get("answer", "")).encode("utf-8"))
+        digest.update(b"\x01")
+    return digest.hexdigest()
+
+
+@dataclass
+class _Entry:
+    vector: Optional[np.ndarray]
+    fingerprint: str
+    index_version: int
+    result: Dict[str, Any]
+    created_at: float
+
+
+class AnswerCache:
+    """Bounded LRU of final QA states with exact and near-duplicate lookup.
+
+    Args:
+        max_entries: Maximum number of cached answers.
+        ttl_seconds: Entry lifetime; `None` or `0` disables expiry.
+        similarity_threshold: Minimum cosine similarity for a near-duplicate hit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: Optional[float] = None,
+        similarity_threshold: float = 0.95,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds or None
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _is_stale(self, entry: _Entry, index_version: int, now: float) -> bool:
+        if entry.index_version != index_version:
+            return True
+        return self.ttl_seconds is not None and now - entry.created_at > self.ttl_seconds
+
+    def get_exact(
+        self, question: str, fingerprint: str, index_version: int
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached result for an identical normalized question."""
+        key = (normalize_query(question), fingerprint)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._is_stale(entry, index_version, now):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return dict(entry.result)
+
+    def record_miss(self) -> None:
+        """Count a lookup that ended after `get_exact` (similarity disabled)."""
+        with self._lock:
+            self.misses += 1
+
+    def get_similar(
+        self, vector: List[float], fingerprint: str, index_version: int
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached result of the most similar question, if close enough.
+
+        Counts a miss when nothing qualifies, so call it after `get_exact`.
+        """
+        query = _unit(vector)
+        now = time.time()
+        with self._lock:
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if self._is_stale(entry, index_version, now)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+            candidates = [
+                (key, entry)
+                for key, entry in self._entries.items()
+                if entry.fingerprint == fingerprint and entry.vector is not None
+            ]
+            if query is None or not candidates:
+                self.misses += 1
+                return None
+
+            matrix = np.stack([entry.vector for _, entry in candidates])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            self.similar_hits += 1
+            return dict(entry.result)
+
+    def put(
+        self,
+        question: str,
+        vector: Optional[List[float]],
+        fingerprint: str,
+        index_version: int,
+        result: Dict[str, Any],
+    ) -> None:
+        """Store a final QA state for later reuse."""
+        key = (normalize_query(question), fingerprint)
+        entry = _Entry(
+            vector=_unit(vector) if vector is not None else None,
+            fingerprint=fingerprint,
+            index_version=index_version,
+            result=dict(result),
+            created_at=time.time(),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached answer."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+def _unit(vector: Optional[List[float]]) -> Optional[np.ndarray]:
+    if vector is None:
+        return None
+    arr = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    if norm == 0.0:
+        return None
+    return arr / norm
+
+
+_cache: AnswerCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Get the process-wide answer cache (built from settings)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                _cache = AnswerCache(
+                    max_entries=settings.answer_cache_max_entries,
+                    ttl_seconds=settings.answer_cache_ttl_seconds,
+                    similarity_threshold=settings.answer_cache_similarity_threshold,
+                )
+    return _cache
+
+
+def _collect_metrics() -> List[Sample]:
+    cache = _cache
+    if cache is None:
+        return []
+    stats = cache.stats()
+    return [
+        ("rag_answer_cache_hits_total", "counter", "Answer cache hits.",
+         [({"match": "exact"}, stats["exact_hits"]),
+          ({"match": "similar"}, stats["similar_hits"])]),
+        ("rag_answer_cache_misses_total", "counter", "Answer cache misses.",
+         [({}, stats["misses"])]),
+        ("rag_answer_cache_entries", "gauge", "Answers held in the cache.",
+         [({}, stats["size"])]),
+    ]
+
+
+REGISTRY.register_collector(_collect_metrics)
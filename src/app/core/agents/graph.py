@@ -1,37 +1,98 @@
-"""LangGraph orchestration for the linear multi-agent QA flow."""
+"""LangGraph orchestration for the multi-agent QA flow.
+
+Two branches start together and the run ends once both have finished:
+
+- answer: retrieval -> summarization -> grounding_check, then one of
+  verification, verification_light or finalize_draft (chosen by the
+  grounding check),
+- memory: memory_summarizer, which only reads the history and so never
+  waits for (or delays) the answer's LLM calls.
+"""
 
 from functools import lru_cache
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 import uuid
 
-from langgraph.constants import END, START
-from langgraph.graph import StateGraph
+from langchain_core.messages import AIMessageChunk
 
+from ..config import get_settings
+from ..metrics import timed_node
+from ..retrieval.clients import get_clients
+from ..retrieval.vector_store import get_index_version
 # IMPORT THE NEW NODE HERE
 from .agents import (
     retrieval_node, 
     summarization_node, 
     verification_node, 
-    memory_summarizer_node
+    memory_summarizer_node,
+    aretrieval_node,
+    asummarization_node,
+    averification_node,
+    amemory_summarizer_node,
+    averification_light_node,
+    finalize_draft_node,
+    grounding_check_node,
+    history_block,
+    route_verification,
+    verification_light_node,
+    warm_up_agents,
 )
+from .answer_cache import get_answer_cache, history_fingerprint
 from .state import QAState
 
+# Nodes whose LLM output is the user-facing answer (streamed token by token)
+ANSWER_NODES = ("verification", "verification_light")
+# Nodes whose state update is the whole answer at once (no LLM tokens)
+PASSTHROUGH_ANSWER_NODES = ("finalize_draft",)
+# Per-session memory in the state (and the history rendered with it),
+# never taken from a cached answer
+_SESSION_MEMORY_FIELDS = ("conversation_summary", "summarized_turns", "history_text")
+
 
 def create_qa_graph() -> Any:
-    """Create and compile the conversational multi-agent QA graph."""
+    """Create and compile the conversational multi-agent QA graph.
+
+    Every node carries a sync and an async implementation, so the same
+    compiled graph serves `invoke` (scripts) and `ainvoke` (the API).
+    """
+    # LangGraph is imported here, on first use, to keep `import app.api` cheap
+    from langgraph.graph import END, START, StateGraph
+
     builder = StateGraph(QAState)
 
-    # Add nodes
-    builder.add_node("retrieval", retrieval_node)
-    builder.add_node("summarization", summarization_node)
-    builder.add_node("verification", verification_node)
-    builder.add_node("memory_summarizer", memory_summarizer_node) # <--- New Node
+    # Add nodes (each timed into the node latency histogram)
+    builder.add_node("retrieval", timed_node("retrieval", retrieval_node, aretrieval_node))
+    builder.add_node(
+        "summarization", timed_node("summarization", summarization_node, asummarization_node)
+    )
+    builder.add_node("grounding_check", timed_node("grounding_check", grounding_check_node))
+    builder.add_node(
+        "verification", timed_node("verification", verification_node, averification_node)
+    )
+    builder.add_node(
+        "verification_light",
+        timed_node("verification_light", verification_light_node, averification_light_node),
+    )
+    builder.add_node("finalize_draft", timed_node("finalize_draft", finalize_draft_node))
+    builder.add_node(
+        "memory_summarizer",
+        timed_node("memory_summarizer", memory_summarizer_node, amemory_summarizer_node),
+    ) # <--- New Node
 
-    # Define flow
+    # Define flow: memory summarization runs alongside the answer pipeline
     builder.add_edge(START, "retrieval")
+    builder.add_edge(START, "memory_summarizer")
     builder.add_edge("retrieval", "summarization")
-    builder.add_edge("summarization", "verification")
-    builder.add_edge("verification", "memory_summarizer") # <--- Route through summarizer
+    builder.add_edge("summarization", "grounding_check")
+    # Well-grounded drafts skip the verification LLM call or use a cheaper model
+    builder.add_conditional_edges(
+        "grounding_check",
+        route_verification,
+        ["verification", "verification_light", "finalize_draft"],
+    )
+    # Both branches end here; the graph returns when the slower one finishes
+    for answer_node in ("verification", "verification_light", "finalize_draft"):
+        builder.add_edge(answer_node, END)
     builder.add_edge("memory_summarizer", END)
 
     return builder.compile()
@@ -42,30 +103,266 @@ def get_qa_graph() -> Any:
     return create_qa_graph()
 
 
+def warm_up_qa_graph() -> None:
+    """Build clients, agents and the compiled graph ahead of the first request."""
+    get_clients()
+    warm_up_agents()
+    get_qa_graph()
+
+
 def run_qa_flow(question: str) -> Dict[str, Any]:
     return run_conversational_qa_flow(question)
 
 
+async def arun_qa_flow(question: str) -> Dict[str, Any]:
+    return await arun_conversational_qa_flow(question)
+
+
+class _AnswerCacheProbe:
+    """Answer cache lookup/store bound to a single request."""
+
+    def __init__(self, question: str, history: Optional[List[Dict[str, Any]]]) -> None:
+        self.cache = get_answer_cache()
+        self.question = question
+        self.fingerprint = history_fingerprint(history)
+        self.index_version = get_index_version()
+        self.query_vector: Optional[List[float]] = None
+
+    def exact(self) -> Optional[Dict[str, Any]]:
+        return self.cache.get_exact(self.question, self.fingerprint, self.index_version)
+
+    def similar(self, query_vector: List[float]) -> Optional[Dict[str, Any]]:
+        self.query_vector = query_vector
+        return self.cache.get_similar(query_vector, self.fingerprint, self.index_version)
+
+    def lookup(self) -> Optional[Dict[str, Any]]:
+        """Exact match, then (if enabled) a near-duplicate match."""
+        cached = self.exact()
+        if cached is not None:
+            return cached
+        if not get_settings().answer_cache_similarity_enabled:
+            self.cache.record_miss()
+            return None
+        return self.similar(get_clients().embeddings.embed_query(self.question))
+
+    async def alookup(self) -> Optional[Dict[str, Any]]:
+        """Async variant of `lookup`."""
+        cached = self.exact()
+        if cached is not None:
+            return cached
+        if not get_settings().answer_cache_similarity_enabled:
+            self.cache.record_miss()
+            return None
+        return self.similar(await get_clients().embeddings.aembed_query(self.question))
+
+    def store(self, final_state: Dict[str, Any]) -> None:
+        if final_state.get("answer"):
+            self.cache.put(
+                self.question,
+                self.query_vector,
+                self.fingerprint,
+                self.index_version,
+                final_state,
+            )
+
+
+def _initial_state(
+    question: str,
+    history: Optional[List[Dict[str, Any]]],
+    session_id: str,
+    conversation_summary: Optional[str] = None,
+    summarized_turns: int = 0,
+) -> QAState:
+    history = history or []
+    return {
+        "question": question,
+        "history": history,
+        "session_id": session_id,
+        # Rendered once here instead of by every node that prompts with it
+        "history_text": history_block(history, session_id, conversation_summary),
+        "context": None,
+        "retrieved_docs": None,
+        "draft_answer": None,
+        "answer": None,
+        "grounding_score": None,
+        "verification_decision": None,
+        # Stored rolling summary from earlier turns (None on a new session)
+        "conversation_summary": conversation_summary,
+        "summarized_turns": summarized_turns,
+    }
+
+
 def run_conversational_qa_flow(
     question: str,
     history: Optional[List[Dict[str, Any]]] = None,
-    session_id: Optional[str] = None
+    session_id: Optional[str] = None,
+    conversation_summary: Optional[str] = None,
+    summarized_turns: int = 0,
 ) -> Dict[str, Any]:
-    """Run the complete multi-agent QA flow with memory."""
+    """Run the complete multi-agent QA flow with memory.
+
+    `conversation_summary` and `summarized_turns` carry the session's stored
+    rolling summary into the graph (used by the "incremental" memory mode).
+
+    When the answer cache is enabled, repeated questions (exact normalized
+    matches, plus near-duplicates if `answer_cache_similarity_enabled`) with
+    the same history are answered from the cache without running the graph;
+    the returned state then has `cache_hit` set to True.
+    """
     graph = get_qa_graph()
 
     if not session_id:
         session_id = str(uuid.uuid4())
 
-    initial_state: QAState = {
+    probe = None
+    if get_settings().answer_cache_enabled:
+        probe = _AnswerCacheProbe(question, history)
+        cached = probe.lookup()
+        if cached is not None:
+            return _from_cache(
+                cached, question, history, session_id, conversation_summary, summarized_turns
+            )
+
+    final_state = graph.invoke(_initial_state(
+        question, history, session_id, conversation_summary, summarized_turns
+    ))
+
+    if probe is not None:
+        probe.store(final_state)
+
+    return final_state
+
+
+async def arun_conversational_qa_flow(
+    question: str,
+    history: Optional[List[Dict[str, Any]]] = None,
+    session_id: Optional[str] = None,
+    conversation_summary: Optional[str] = None,
+    summarized_turns: int = 0,
+) -> Dict[str, Any]:
+    """Async variant of `run_conversational_qa_flow`.
+
+    Runs the graph with `ainvoke`, so LLM, embedding and Pinecone calls do
+    not block the event loop.
+    """
+    graph = get_qa_graph()
+
+    if not session_id:
+        session_id = str(uuid.uuid4())
+
+    probe = None
+    if get_settings().answer_cache_enabled:
+        probe = _AnswerCacheProbe(question, history)
+        cached = await probe.alookup()
+        if cached is not None:
+            return _from_cache(
+                cached, question, history, session_id, conversation_summary, summarized_turns
+            )
+
+    final_state = await graph.ainvoke(_initial_state(
+        question, history, session_id, conversation_summary, summarized_turns
+    ))
+
+    if probe is not None:
+        probe.store(final_state)
+
+    return final_state
+
+
+async def astream_conversational_qa_flow(
+    question: str,
+    history: Optional[List[Dict[str, Any]]] = None,
+    session_id: Optional[str] = None,
+    conversation_summary: Optional[str] = None,
+    summarized_turns: int = 0,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Run the QA flow and yield progress events as they happen.
+
+    Yields dictionaries with an `event` name and a `data` payload:
+    - `stage`: a graph node finished (`{"node": ..., "status": "completed"}`)
+    - `token`: a piece of the answer text from one of `ANSWER_NODES` (the
+      whole draft at once when verification was skipped)
+    - `final`: the complete final state, always the last event
+    """
+    graph = get_qa_graph()
+
+    if not session_id:
+        session_id = str(uuid.uuid4())
+
+    probe = None
+    if get_settings().answer_cache_enabled:
+        probe = _AnswerCacheProbe(question, history)
+        cached = await probe.alookup()
+        if cached is not None:
+            final_state = _from_cache(
+                cached, question, history, session_id, conversation_summary, summarized_turns
+            )
+            yield {"event": "token", "data": {"text": final_state.get("answer", "")}}
+            yield {"event": "final", "data": final_state}
+            return
+
+    initial_state = _initial_state(
+        question, history, session_id, conversation_summary, summarized_turns
+    )
+    final_state: Dict[str, Any] = dict(initial_state)
+
+    # The agents are compiled graphs of their own, so their model tokens are
+    # only visible with `subgraphs=True`; the namespace tells us which of our
+    # nodes they belong to.
+    async for namespace, mode, chunk in graph.astream(
+        initial_state,
+        stream_mode=["updates", "messages"],
+        subgraphs=True,
+    ):
+        if mode == "updates":
+            if namespace:
+                continue
+            for node, update in chunk.items():
+                if update:
+                    final_state.update(update)
+                if node in PASSTHROUGH_ANSWER_NODES and update and update.get("answer"):
+                    yield {"event": "token", "data": {"text": update["answer"]}}
+                yield {"event": "stage", "data": {"node": node, "status": "completed"}}
+
+        elif mode == "messages":
+            message, metadata = chunk
+            node = namespace[0].split(":")[0] if namespace else metadata.get("langgraph_node")
+            if (
+                node in ANSWER_NODES
+                and isinstance(message, AIMessageChunk)
+                and isinstance(message.content, str)
+                and message.content
+            ):
+                yield {"event": "token", "data": {"text": message.content}}
+
+    if probe is not None:
+        probe.store(final_state)
+
+    yield {"event": "final", "data": final_state}
+
+
+def _from_cache(
+    cached: Dict[str, Any],
+    question: str,
+    history: Optional[List[Dict[str, Any]]],
+    session_id: str,
+    conversation_summary: Optional[str],
+    summarized_turns: int,
+) -> Dict[str, Any]:
+    """Rebind a cached final state to the current request.
+
+    The cached state may come from another session, so its rolling summary
+    is replaced by this session's own; otherwise the API would store the
+    other session's summary as this one's memory.
+    """
+    state = {key: value for key, value in cached.items() if key not in _SESSION_MEMORY_FIELDS}
+    if conversation_summary:
+        state["conversation_summary"] = conversation_summary
+        state["summarized_turns"] = summarized_turns
+    return {
+        **state,
         "question": question,
         "history": history or [],
         "session_id": session_id,
-        "context": None,
-        "draft_answer": None,
-        "answer": None,
-        "conversation_summary": None, # Initializing as None
+        "cache_hit": True,
     }
-
-    final_state = graph.invoke(initial_state)
-    return final_state
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""Cheap, local grounding check for draft answers.
+
+Decides how much verification a draft needs without an LLM call. Each
+sentence of the draft is compared with the retrieved context. A sentence is
+supported when most of its content words occur in the context and every
+number it quotes does too. The grounding score is the share of supported
+sentences.
+
+Drafts in which every sentence says the context is insufficient have
+nothing to hallucinate, so they are flagged as abstentions. A draft that
+abstains in one sentence and answers in another is scored like any other.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import FrozenSet, List
+
+# Verification levels, also reported to clients as `verification_decision`
+DECISION_FULL = "full"
+DECISION_LIGHT = "light"
+DECISION_SKIPPED = "skipped"
+
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD_PATTERN = re.compile(r"[^\W\d_]+|\d+(?:[.,]\d+)*", re.UNICODE)
+_NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+
+_ABSTENTION_PATTERN = re.compile(
+    r"\b(context (does not|doesn't|did not) (contain|provide|include|mention)"
+    r"|not enough information|insufficient (information|context)"
+    r"|(cannot|can't|unable to) (find|answer|determine)"
+    r"|no (relevant )?information (about|on|regarding))\b",
+    re.IGNORECASE,
+)
+
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by can could did do does for from had has "
+    "have he her his how i if in into is it its may more most no not of on or "
+    "our she so such than that the their them then there these they this those "
+    "to was we were what when where which while who why will with would you "
+    "your also about based provided context document answer question".split()
+)
+
+
+@dataclass
+class GroundingReport:
+    """Result of `check_grounding`."""
+
+    score: float  # share of draft sentences supported by the context
+    sentences: int
+    supported: int
+    abstained: bool  # every sentence of the draft says the context is insufficient
+
+
+def _content_words(text: str) -> FrozenSet[str]:
+    return frozenset(
+        word for word in _WORD_PATTERN.findall(text.lower())
+        if (len(word) > 2 and word not in _STOPWORDS) or word.isdigit()
+    )
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences / list items, dropping empty pieces."""
+    return [part.strip() for part in _SENTENCE_PATTERN.split(text) if part.strip()]
+
+
+def check_grounding(
+    answer: str,
+    context: str,
+    support_threshold: float = 0.6,
+) -> GroundingReport:
+    """Measure how well `answer` is supported by `context`.
+
+    Args:
+        answer: Draft answer text.
+        context: Retrieved context the answer should be based on.
+        support_threshold: Share of a sentence's content words that must
+            occur in the context for it to count as supported.
+
+    Returns:
+        A `GroundingReport`; `score` is 0.0 for an empty draft, which is
+        therefore sent to full verification.
+    """
+    context_words = _content_words(context)
+    context_numbers = set(_NUMBER_PATTERN.findall(context))
+
+    sentences = [s for s in split_sentences(answer) if _content_words(s)]
+    supported = 0
+    for sentence in sentences:
+        words = _content_words(sentence)
+        overlap = len(words & context_words) / len(words)
+        numbers_found = all(n in context_numbers for n in _NUMBER_PATTERN.findall(sentence))
+        if overlap >= support_threshold and numbers_found:
+            supported += 1
+
+    return GroundingReport(
+        score=supported / len(sentences) if sentences else 0.0,
+        sentences=len(sentences),
+        supported=supported,
+        abstained=bool(sentences) and all(_ABSTENTION_PATTERN.search(s) for s in sentences),
+    )
+
+
+def grounding_decision(
+    report: GroundingReport,
+    skip_threshold: float,
+    light_threshold: float,
+) -> str:
+    """Map a grounding report to a verification level.
+
+    Returns:
+        `DECISION_SKIPPED` for abstentions and drafts scoring at least
+        `skip_threshold`, `DECISION_LIGHT` down to `light_threshold`, and
+        `DECISION_FULL` below that.
+    """
+    if report.abstained or report.score >= skip_threshold:
+        return DECISION_SKIPPED
+    if report.score >= light_threshold:
+        return DECISION_LIGHT
+    return DECISION_FULL
@@ -0,0 +1,130 @@
+"""Token-budgeted conversation history rendering with a per-session cache.
+
+Prompts used to inline every stored turn, re-formatted from scratch by each
+node on every request. Here each turn is rendered and token-counted once
+per session and cached; a new request only renders the turn added since
+the previous one. The history handed to the model is the newest turns that
+fit in `history_token_budget`, dropping the oldest first.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import get_settings
+from ..tokens import count_tokens, truncate_to_tokens
+
+NO_HISTORY = "No previous conversation."
+TURN_SEPARATOR = "\n---\n"
+
+# Sessions whose rendered turns are kept; least recently used are dropped
+_MAX_CACHED_SESSIONS = 1024
+
+# (turn number, question, answer): identifies a turn across requests even
+# though the window of loaded turns slides as the session grows
+TurnKey = Tuple[Any, str, str]
+RenderedTurn = Tuple[str, int]
+
+
+def _turn_key(turn: Dict[str, Any]) -> TurnKey:
+    return (turn.get("turn"), turn.get("question", ""), turn.get("answer", ""))
+
+
+def _render_turn(turn: Dict[str, Any]) -> Optional[RenderedTurn]:
+    question = turn.get("question", "")
+    answer = turn.get("answer", "")
+    if not (question and answer):
+        return None
+    text = f"User: {question}\nAssistant: {answer}"
+    return text, count_tokens(text)
+
+
+class HistoryRenderCache:
+    """Rendered turns and their token counts, per session (LRU).
+
+    Args:
+        max_sessions: Sessions kept before the least recently used is dropped.
+    """
+
+    def __init__(self, max_sessions: int = _MAX_CACHED_SESSIONS) -> None:
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict[TurnKey, Optional[RenderedTurn]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Dict[TurnKey, Optional[RenderedTurn]]:
+        with self._lock:
+            return self._sessions.get(session_id) or {}
+
+    def put(self, session_id: str, turns: Dict[TurnKey, Optional[RenderedTurn]]) -> None:
+        with self._lock:
+            self._sessions[session_id] = turns
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def clear(self, session_id: Optional[str] = None) -> None:
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(session_id, None)
+
+
+_cache = HistoryRenderCache()
+
+
+def get_history_render_cache() -> HistoryRenderCache:
+    """Return the process-wide history render cache."""
+    return _cache
+
+
+def render_history(
+    history: List[Dict[str, Any]],
+    session_id: Optional[str] = None,
+    token_budget: Optional[int] = None,
+) -> str:
+    """Format conversation turns for a prompt within a token budget.
+
+    Turns are visited newest first and only until the budget is spent, so
+    the cost per request depends on the budget, not on the session length.
+
+    Args:
+        history: Turns as `{"question", "answer", "turn"}` dicts, oldest first.
+        session_id: Session whose cached renderings may be reused.
+        token_budget: Token cap (default: `history_token_budget` from settings).
+
+    Returns:
+        The newest turns that fit the budget, oldest first, or a placeholder
+        when there is no history. A single newest turn larger than the whole
+        budget is truncated rather than dropped.
+    """
+    budget = get_settings().history_token_budget if token_budget is None else token_budget
+    separator_tokens = count_tokens(TURN_SEPARATOR)
+    cached = _cache.get(session_id) if session_id else {}
+    # Only turns visited this time are kept, so turns that fell out of the
+    # budget or the loaded window are freed
+    visited: Dict[TurnKey, Optional[RenderedTurn]] = {}
+
+    kept: List[str] = []
+    newest: Optional[str] = None
+    used = 0
+    for turn in reversed(history):
+        key = _turn_key(turn)
+        rendered = visited[key] = cached[key] if key in cached else _render_turn(turn)
+        if rendered is None:
+            continue
+        text, tokens = rendered
+        newest = newest or text
+        cost = tokens + (separator_tokens if kept else 0)
+        if used + cost > budget:
+            break
+        kept.append(text)
+        used += cost
+
+    if session_id and visited:
+        _cache.put(session_id, visited)
+    if newest is None:
+        return NO_HISTORY
+    if not kept:
+        return truncate_to_tokens(newest, budget)
+    return TURN_SEPARATOR.join(reversed(kept))
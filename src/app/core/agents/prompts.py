@@ -10,6 +10,7 @@ Tasks:
 1. Analyze the user's current question in the context of the conversation history provided.
 2. If the user refers to previous topics (e.g., "what about its limitations?"), infer the subject from the history.
 3. Use the retrieval tool to search for relevant document chunks.
+   If you need several searches, request them together in one step so they run in parallel.
 4. Consolidate all retrieved information into a single, clean CONTEXT section.
 5. DO NOT answer the user's question directly — only provide context.
 """
@@ -31,4 +32,22 @@ Instructions:
 - Compare every claim in the draft answer against the provided context.
 - Ensure the answer is consistent with the conversation history (e.g., doesn't contradict previous turns).
 - Return ONLY the final, corrected answer text.
-"""
\ No newline at end of file
+"""
+QUERY_REWRITE_SYSTEM_PROMPT = """You rewrite follow-up questions for document search.
+
+Given the recent conversation and the user's latest question, produce a single
+standalone search query that replaces pronouns and vague references (e.g. "it",
+"that method") with the subject they refer to in the conversation.
+
+Return ONLY the rewritten query, with no explanation or quotes.
+"""
+
+MULTI_QUERY_SYSTEM_PROMPT = """You write search queries for a document retrieval system.
+
+Given the recent conversation and the user's latest question, write {count}
+different standalone search queries that could each find passages answering
+the question. Replace pronouns and vague references with the subject they
+refer to, and vary the wording (synonyms, more specific or more general terms).
+
+Return ONLY the queries, one per line, with no numbering or explanation.
+"""
@@ -2,6 +2,8 @@
 
 from typing import TypedDict, List, Optional, Any
 
+from langchain_core.documents import Document
+
 
 class QAState(TypedDict):
     """State schema for the conversational multi-agent QA flow.
@@ -13,10 +15,22 @@ class QAState(TypedDict):
     # Feature 5: Memory fields
     history: List[dict]  # List of {"question": "...", "answer": "..."}
     session_id: str | None
+    # Rendered, token-budgeted history section shared by the prompt builders
+    history_text: Optional[str]
     
     context: str | None
+    # Every chunk retrieval found, deduplicated and ranked (tool artifacts
+    # in agent mode); `context` is assembled from these
+    retrieved_docs: Optional[List[Document]]
     draft_answer: str | None
     answer: str | None
 
+    # Grounding check: share of draft sentences supported by the context
+    # and the verification level chosen from it ("full", "light", "skipped")
+    grounding_score: Optional[float]
+    verification_decision: Optional[str]
+
     # Feature 5 Extension: Conversation Summary
-    conversation_summary: Optional[str]
\ No newline at end of file
+    conversation_summary: Optional[str]
+    # Highest turn number already folded into conversation_summary
+    summarized_turns: int
\ No newline at end of file
@@ -1,13 +1,16 @@
 """Tools available to agents in the multi-agent RAG system."""
 
-from langchain_core.tools import tool
+from typing import List, Tuple
 
-from ..retrieval.vector_store import retrieve
-from ..retrieval.serialization import serialize_chunks
+from langchain_core.documents import Document
+from langchain_core.tools import StructuredTool
 
+from ..config import get_settings
+from ..retrieval.context import assemble_context
+from ..retrieval.vector_store import aretrieve, retrieve
 
-@tool(response_format="content_and_artifact")
-def retrieval_tool(query: str):
+
+def _retrieval(query: str) -> Tuple[str, List[Document]]:
     """Search the vector database for relevant document chunks.
 
     This tool retrieves the top 4 most relevant chunks from the Pinecone
@@ -21,14 +24,34 @@ def retrieval_tool(query: str):
         Tuple of (serialized_content, artifact) where:
         - serialized_content: A formatted string containing the retrieved chunks
           with metadata. Format: "Chunk 1 (page=X): ...\n\nChunk 2 (page=Y): ..."
-        - artifact: List of Document objects with full metadata for reference
+        - artifact: Every retrieved candidate, in rank order, with full metadata
     """
-    # Retrieve documents from vector store
-    docs = retrieve(query, k=4)
+    docs = retrieve(query, k=get_settings().context_candidate_k)
+    return _tool_response(docs)
+
+
+async def _aretrieval(query: str) -> Tuple[str, List[Document]]:
+    """Async implementation of `retrieval_tool` (non-blocking I/O)."""
+    docs = await aretrieve(query, k=get_settings().context_candidate_k)
+    return _tool_response(docs)
 
-    # Serialize chunks into formatted string (content)
-    context = serialize_chunks(docs)
 
-    # Return tuple: (serialized content, artifact documents)
+def _tool_response(docs: List[Document]) -> Tuple[str, List[Document]]:
+    # The agent reads a short context (best 4 chunks) to judge whether to
+    # search again. The artifact keeps all candidates: the retrieval node
+    # fuses them across calls and assembles the answer context once, so
+    # fusion is not limited to what survived this call's budget.
     # This follows LangChain's content_and_artifact response format
+    context, _ = assemble_context(docs, max_chunks=4)
     return context, docs
+
+
+# Exposes both a sync and an async implementation, so the retrieval agent
+# works under `invoke` (scripts) as well as `ainvoke` (API event loop).
+retrieval_tool = StructuredTool.from_function(
+    func=_retrieval,
+    coroutine=_aretrieval,
+    name="retrieval_tool",
+    description=_retrieval.__doc__,
+    response_format="content_and_artifact",
+)
@@ -4,6 +4,8 @@ This module uses Pydantic Settings to load and validate environment variables
 for OpenAI models, Pinecone settings, and other system parameters.
 """
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,14 +15,173 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     openai_api_key: str
     openai_model_name: str = "gpt-4o-mini"
-    openai_embedding_model_name: str = "text-embedding-3-large"
+    # Cheaper model for the light verification pass
+    openai_light_model_name: str = "gpt-4.1-nano"
+    # The existing Pinecone index was built with the small embedding model
+    openai_embedding_model_name: str = "text-embedding-3-small"
 
     # Pinecone Configuration
     pinecone_api_key: str
-    pinecone_index_name: str
+    pinecone_index_name: str = "knowledge-index"
+    pinecone_pool_threads: int = 4
+
+    # Vector Store Backend
+    # "pinecone": managed Pinecone index (network round trip per query)
+    # "local": in-process NumPy matrix memory-mapped from local_index_path,
+    #          for corpora small enough to search on one machine
+    vector_backend: Literal["pinecone", "local"] = "pinecone"
+    local_index_path: str = "data/local_index"
+    # float16 halves memory and disk at a negligible cost in ranking quality
+    local_index_dtype: Literal["float32", "float16"] = "float32"
+
+    # HTTP Connection Pool Configuration (shared by OpenAI clients)
+    http_max_connections: int = 50
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http_timeout_seconds: float = 60.0
+
+    # LLM Rate Limits (shared by every chat model in the process)
+    # Requests / tokens per minute; unset disables that limit
+    llm_requests_per_minute: int | None = None
+    llm_tokens_per_minute: int | None = None
+    # Share of each budget background calls (memory summaries) leave unused
+    llm_background_reserve: float = 0.2
+    # Completion size assumed when reserving tokens before a call
+    llm_expected_completion_tokens: int = 512
+    llm_max_retries: int = 4
+    llm_retry_backoff_seconds: float = 0.5
+    llm_retry_max_backoff_seconds: float = 20.0
+
+    # LLM Response Cache (temperature-0 calls only)
+    llm_cache_enabled: bool = False
+    llm_cache_max_entries: int = 1024
+    llm_cache_ttl_seconds: float | None = 24 * 3600
+    # SQLite file behind the in-memory LRU; unset keeps the cache in memory
+    llm_cache_path: str | None = "data/llm_cache.sqlite3"
+    # Rows kept in that file; expired and oldest rows are pruned as it grows
+    llm_cache_max_persistent_entries: int | None = 10_000
 
     # Retrieval Configuration
     retrieval_k: int = 4
+    # "agent": tool-calling retrieval agent decides how to search
+    # "direct": call the retriever straight away, rewriting the query with a
+    #           small prompt only for follow-up questions (one LLM call fewer)
+    # "multi_query": one LLM call writes several query variants, which are
+    #                embedded in one batch, searched concurrently and fused
+    retrieval_mode: Literal["agent", "direct", "multi_query"] = "agent"
+    # Verbatim turns shown to the query rewriter in direct/multi_query mode
+    query_rewrite_history_turns: int = 3
+    # Variants generated per question in multi_query mode (plus the question)
+    multi_query_count: int = 3
+    # "dense": vector similarity only
+    # "hybrid": dense + BM25 lexical search in parallel, merged with
+    #           reciprocal rank fusion (better recall on exact identifiers)
+    retrieval_search: Literal["dense", "hybrid"] = "dense"
+    # Candidates fetched from each search before fusion
+    hybrid_candidate_k: int = 20
+    rrf_k: int = 60
+
+    # Context Assembly
+    # Candidates retrieved before MMR selection picks `retrieval_k` of them
+    context_candidate_k: int = 12
+    # Token cap for the CONTEXT sent to summarization and verification
+    context_token_budget: int = 1500
+    # 1.0 = pure retrieval order, lower = more diverse chunks
+    context_mmr_lambda: float = 0.7
+    # Jaccard word-set similarity at which a chunk counts as a duplicate
+    context_duplicate_threshold: float = 0.85
+
+    # Verification
+    # "always": every draft goes through the full verification agent
+    # "adaptive": a local grounding check skips verification for well
+    #             supported drafts and uses the light model for borderline ones
+    verification_mode: Literal["always", "adaptive"] = "always"
+    grounding_skip_threshold: float = 0.9
+    grounding_light_threshold: float = 0.6
+    # Share of a sentence's content words that must appear in the context
+    grounding_support_threshold: float = 0.6
+
+    # Batch QA (/qa/batch)
+    qa_batch_concurrency: int = 8
+    qa_batch_max_questions: int = 1000
+
+    # Observability
+    # Instrument chat model and embedding calls for /metrics (graph node
+    # and search timings are always recorded; they cost next to nothing)
+    metrics_enabled: bool = True
+    # Attach a per-request duration breakdown (`timings`) to QA responses
+    response_timings_enabled: bool = False
+
+    # Startup
+    # Build clients, agents and the graph during app startup instead of on
+    # the first request (slower worker boot, no cold first request)
+    warm_up_on_startup: bool = False
+
+    # Lexical (BM25) index, written next to the vector upserts
+    lexical_index_enabled: bool = True
+    lexical_index_path: str = "data/lexical_index.sqlite3"
+
+    # Conversation Memory
+    # "full": re-summarize and inline the whole history every turn
+    # "incremental": fold only the newest turn into the stored summary and
+    #                build prompts from summary + last N verbatim turns
+    memory_mode: Literal["full", "incremental"] = "full"
+    memory_recent_turns: int = 3
+    # Token cap on the history section of prompts (oldest turns dropped first)
+    history_token_budget: int = 2000
+
+    # Session Store
+    # "memory": per-process LRU; "sqlite": local WAL database shared by workers
+    session_backend: Literal["memory", "sqlite"] = "memory"
+    session_db_path: str = "data/sessions.sqlite3"
+    session_ttl_seconds: float | None = 24 * 3600
+    session_max_sessions: int = 10_000
+    session_max_stored_turns: int = 200
+    # Turns loaded into the graph per request
+    session_history_turns: int = 20
+    session_expiry_interval_seconds: float = 300
+
+    # PDF Uploads (/index-pdf), stored as <upload_dir>/<sha256>.pdf
+    upload_dir: str = "data/uploads"
+    upload_max_bytes: int = 50 * 1024 * 1024
+    # Bytes copied per step while streaming an upload to disk
+    upload_block_size: int = 1024 * 1024
+
+    # Background Indexing
+    indexing_workers: int = 2
+    indexing_parse_processes: int = 2
+    indexing_upsert_threads: int = 4
+    indexing_max_finished_jobs: int = 100
+    # Pages extracted per parse task, and parse tasks kept ahead of embedding
+    indexing_pages_per_task: int = 8
+    indexing_parse_lookahead: int = 2
+
+    # Chunking / Embedding / Upsert Pipeline
+    chunk_size: int = 1000
+    chunk_overlap: int = 150
+    embedding_batch_size: int = 64
+    upsert_concurrency: int = 4
+    upsert_max_retries: int = 3
+    upsert_retry_backoff_seconds: float = 0.5
+    # Records indexed files/chunks for dedup and incremental re-indexing
+    index_manifest_path: str = "data/index_manifest.sqlite3"
+
+    # Query Embedding Cache
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 4096
+    embedding_cache_ttl_seconds: float | None = 7 * 24 * 3600
+    # Optional SQLite file for a cache that survives restarts
+    embedding_cache_path: str | None = None
+    # Rows kept in that file; expired and oldest rows are pruned as it grows
+    embedding_cache_max_persistent_entries: int | None = 100_000
+
+    # Semantic Answer Cache
+    answer_cache_enabled: bool = False
+    # Exact (normalized) matches only, unless near-duplicates are opted into
+    answer_cache_similarity_enabled: bool = False
+    answer_cache_similarity_threshold: float = 0.95
+    answer_cache_max_entries: int = 512
+    answer_cache_ttl_seconds: float | None = 3600
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -44,3 +205,14 @@ def get_settings() -> Settings:
     if _settings is None:
         _settings = Settings()
     return _settings
+
+
+def reload_settings() -> Settings:
+    """Discard the cached settings and load them again from the environment.
+
+    Returns:
+        The freshly loaded Settings instance.
+    """
+    global _settings
+    _settings = None
+    return get_settings()
@@ -0,0 +1,72 @@
+"""Shared HTTP connection pools for outbound API clients.
+
+OpenAI clients accept an externally managed `httpx` client. Handing every
+client the same pool means TLS sessions and keep-alive connections are
+reused across requests instead of being rebuilt for each new client.
+"""
+
+import threading
+
+import httpx
+
+from .config import get_settings
+
+_lock = threading.Lock()
+_http_client: httpx.Client | None = None
+_async_http_client: httpx.AsyncClient | None = None
+
+
+def _pool_options() -> dict:
+    settings = get_settings()
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+        "timeout": httpx.Timeout(settings.http_timeout_seconds),
+    }
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide synchronous HTTP client."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        with _lock:
+            if _http_client is None or _http_client.is_closed:
+                _http_client = httpx.Client(**_pool_options())
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the process-wide asynchronous HTTP client."""
+    global _async_http_client
+    if _async_http_client is None or _async_http_client.is_closed:
+        with _lock:
+            if _async_http_client is None or _async_http_client.is_closed:
+                _async_http_client = httpx.AsyncClient(**_pool_options())
+    return _async_http_client
+
+
+def close_http_clients() -> None:
+    """Close the synchronous pool and drop the asynchronous one.
+
+    The async client is only dropped here; use `aclose_http_clients` from
+    inside an event loop to close its connections gracefully.
+    """
+    global _http_client, _async_http_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = None
+        _async_http_client = None
+
+
+async def aclose_http_clients() -> None:
+    """Close both pools from inside a running event loop."""
+    global _async_http_client
+    with _lock:
+        client, _async_http_client = _async_http_client, None
+    if client is not None:
+        await client.aclose()
+    close_http_clients()
@@ -1,22 +1,100 @@
 """Factory functions for creating LangChain v1 LLM instances."""
 
-from langchain_openai import ChatOpenAI
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 
 from ..config import get_settings
+from ..http import get_async_http_client, get_http_client
+from ..metrics import get_llm_callback
+from .rate_limit import PRIORITY_INTERACTIVE, Priority, reset_llm_scheduler
+from .response_cache import close_llm_response_cache, get_llm_response_cache
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
-def create_chat_model(temperature: float = 0.0) -> ChatOpenAI:
-    """Create a LangChain v1 ChatOpenAI instance.
+_chat_models: Dict[Tuple[str, float, str], "ChatOpenAI"] = {}
+_chat_models_lock = threading.Lock()
+
+
+def create_chat_model(
+    temperature: float = 0.0,
+    model_name: Optional[str] = None,
+    priority: Priority = PRIORITY_INTERACTIVE,
+) -> "ChatOpenAI":
+    """Return the pooled chat model for a model/temperature/priority combination.
+
+    Models are cached, so every caller asking for the same combination shares
+    one client. All of them use the process-wide HTTP connection pools and
+    are admitted by the shared rate limit scheduler. With `llm_cache_enabled`,
+    temperature-0 models also answer repeated prompts from the response cache.
 
     Args:
         temperature: Model temperature (default: 0.0 for deterministic outputs).
+        model_name: Model to use (default: `openai_model_name` from settings).
+        priority: "interactive" for user-facing calls, "background" for work
+            such as conversation summaries that should yield to them.
 
     Returns:
         Configured ChatOpenAI instance.
     """
+    model_name = model_name or get_settings().openai_model_name
+    key = (model_name, temperature, priority)
+    model = _chat_models.get(key)
+    if model is None:
+        with _chat_models_lock:
+            model = _chat_models.get(key)
+            if model is None:
+                model = _chat_models[key] = _build_chat_model(temperature, model_name, priority)
+    return model
+
+
+def _build_chat_model(temperature: float, model_name: str, priority: Priority) -> "ChatOpenAI":
+    # Imported on first use: langchain_openai alone takes ~1s to import
+    from .pooled import PooledChatOpenAI
+
     settings = get_settings()
-    return ChatOpenAI(
-        model=settings.openai_model_name,
+    # Only deterministic calls are memoized
+    use_cache = settings.llm_cache_enabled and temperature == 0
+    return PooledChatOpenAI(
+        model=model_name,
         api_key=settings.openai_api_key,
         temperature=temperature,
+        priority=priority,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        # Retries happen in PooledChatOpenAI, after the scheduler admits the
+        # call again; SDK retries would bypass it
+        max_retries=0,
+        # Usage on the last streamed chunk lets the scheduler settle streams
+        stream_usage=True,
+        callbacks=[get_llm_callback()] if settings.metrics_enabled else None,
+        cache=get_llm_response_cache() if use_cache else None,
+    )
+
+
+def clear_chat_models() -> None:
+    """Drop the cached chat models, scheduler and response cache.
+
+    Used after settings were reloaded and at shutdown.
+    """
+    with _chat_models_lock:
+        _chat_models.clear()
+    reset_llm_scheduler()
+    close_llm_response_cache()
+
+
+def create_embeddings_model() -> "OpenAIEmbeddings":
+    """Create the OpenAI embeddings client on the shared HTTP pools.
+
+    Returns:
+        Configured OpenAIEmbeddings instance.
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    settings = get_settings()
+    return OpenAIEmbeddings(
+        model=settings.openai_embedding_model_name,
+        api_key=settings.openai_api_key,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
     )
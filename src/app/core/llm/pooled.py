@@ -0,0 +1,232 @@
+"""ChatOpenAI that goes through the shared scheduler and retries transient errors.
+
+Cache hits (see `response_cache`) are served by LangChain before `_generate`
+runs, so they neither wait for rate limit budget nor count against it.
+
+Kept apart from `factory.py` because subclassing ChatOpenAI imports
+langchain_openai, which the factory only does on first use.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import openai
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+
+from ..config import get_settings
+from ..metrics import LLM_RETRIES, LLM_THROTTLE_SECONDS
+from ..tokens import count_tokens
+from .rate_limit import PRIORITY_INTERACTIVE, Priority, get_llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Worth another attempt: throttling, timeouts, dropped connections and 5xx
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+def _retry_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    settings = get_settings()
+    ceiling = min(
+        settings.llm_retry_max_backoff_seconds,
+        settings.llm_retry_backoff_seconds * (2 ** attempt),
+    )
+    return random.uniform(0, ceiling)
+
+
+def _used_tokens(result: ChatResult) -> int:
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    return int(usage.get("total_tokens") or 0)
+
+
+class _StreamUsage:
+    """Token usage of a stream, for settling its reservation once it ends.
+
+    Uses the usage the provider reports on the chunks (OpenAI sends it on
+    the last one); without it, the prompt plus the streamed text is counted.
+    """
+
+    def __init__(self, prompt_tokens: int, model_name: str) -> None:
+        self.prompt_tokens = prompt_tokens
+        self.model_name = model_name
+        self.reported = 0
+        self.text: List[str] = []
+
+    def add(self, chunk: ChatGenerationChunk) -> None:
+        usage = getattr(chunk.message, "usage_metadata", None)
+        if usage:
+            self.reported += int(usage.get("total_tokens") or 0)
+        self.text.append(chunk.text)
+
+    def total(self) -> int:
+        if self.reported:
+            return self.reported
+        return self.prompt_tokens + count_tokens("".join(self.text), self.model_name)
+
+
+class PooledChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose calls are admitted by `LLMScheduler` and retried with backoff.
+
+    The OpenAI SDK's own retries are turned off by the factory
+    (`max_retries=0`) so a 429 is retried here, after the scheduler has
+    admitted the call again, rather than immediately by the SDK.
+    """
+
+    priority: Priority = PRIORITY_INTERACTIVE
+
+    def _get_llm_string(self, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        """Stable response cache key part: model, temperature and call parameters.
+
+        LangChain's default serializes the whole client, including the
+        `repr` of the shared HTTP clients, which changes on every restart
+        and would make the persistent cache tier useless.
+        """
+        params = str(sorted({**kwargs, "stop": stop}.items()))
+        return f"{self.model_name}\x00{self.temperature}\x00{params}"
+
+    def _prompt_tokens(self, messages: List[BaseMessage]) -> int:
+        prompt = "\n".join(str(message.content) for message in messages)
+        return count_tokens(prompt, self.model_name)
+
+    def _completion_budget(self) -> int:
+        return self.max_tokens or get_settings().llm_expected_completion_tokens
+
+    def _estimate_tokens(self, messages: List[BaseMessage]) -> int:
+        return self._prompt_tokens(messages) + self._completion_budget()
+
+    def _admit(self, tokens: int) -> None:
+        waited = get_llm_scheduler().acquire(tokens, self.priority)
+        if waited:
+            LLM_THROTTLE_SECONDS.observe(waited, priority=self.priority)
+
+    async def _aadmit(self, tokens: int) -> None:
+        waited = await get_llm_scheduler().aacquire(tokens, self.priority)
+        if waited:
+            LLM_THROTTLE_SECONDS.observe(waited, priority=self.priority)
+
+    def _give_up(self, attempt: int, error: BaseException) -> bool:
+        if not isinstance(error, RETRYABLE_ERRORS) or attempt >= get_settings().llm_max_retries:
+            return True
+        LLM_RETRIES.inc(model=self.model_name, error=type(error).__name__)
+        logger.info("Retrying %s call after %s (attempt %d)", self.model_name, error, attempt + 1)
+        return False
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._estimate_tokens(messages)
+        attempt = 0
+        while True:
+            self._admit(tokens)
+            try:
+                result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except BaseException as error:
+                get_llm_scheduler().refund(tokens)
+                if self._give_up(attempt, error):
+                    raise
+                time.sleep(_retry_delay(attempt))
+                attempt += 1
+                continue
+            get_llm_scheduler().settle(tokens, _used_tokens(result))
+            return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._estimate_tokens(messages)
+        attempt = 0
+        while True:
+            await self._aadmit(tokens)
+            try:
+                result = await super()._agenerate(
+                    messages, stop=stop, run_manager=run_manager, **kwargs
+                )
+            except BaseException as error:
+                get_llm_scheduler().refund(tokens)
+                if self._give_up(attempt, error):
+                    raise
+                await asyncio.sleep(_retry_delay(attempt))
+                attempt += 1
+                continue
+            get_llm_scheduler().settle(tokens, _used_tokens(result))
+            return result
+
+    # Streaming calls are admitted the same way. They are only retried if
+    # they fail before the first chunk; after that the caller has already
+    # seen part of the answer. Once a stream has started, its reservation is
+    # settled when it ends, however it ends (exhausted, failed or closed).
+    # Any attempt that fails before producing output refunds its reservation.
+
+    def _stream(
+        self, messages: List[BaseMessage], *args: Any, **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        prompt_tokens = self._prompt_tokens(messages)
+        tokens = prompt_tokens + self._completion_budget()
+        attempt = 0
+        while True:
+            self._admit(tokens)
+            usage = _StreamUsage(prompt_tokens, self.model_name)
+            started = False
+            try:
+                for chunk in super()._stream(messages, *args, **kwargs):
+                    started = True
+                    usage.add(chunk)
+                    yield chunk
+                return
+            except BaseException as error:
+                if started:
+                    raise
+                get_llm_scheduler().refund(tokens)
+                if self._give_up(attempt, error):
+                    raise
+                time.sleep(_retry_delay(attempt))
+                attempt += 1
+            finally:
+                if started:
+                    get_llm_scheduler().settle(tokens, usage.total())
+
+    async def _astream(
+        self, messages: List[BaseMessage], *args: Any, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        prompt_tokens = self._prompt_tokens(messages)
+        tokens = prompt_tokens + self._completion_budget()
+        attempt = 0
+        while True:
+            await self._aadmit(tokens)
+            usage = _StreamUsage(prompt_tokens, self.model_name)
+            started = False
+            try:
+                async for chunk in super()._astream(messages, *args, **kwargs):
+                    started = True
+                    usage.add(chunk)
+                    yield chunk
+                return
+            except BaseException as error:
+                if started:
+                    raise
+                get_llm_scheduler().refund(tokens)
+                if self._give_up(attempt, error):
+                    raise
+                await asyncio.sleep(_retry_delay(attempt))
+                attempt += 1
+            finally:
+                if started:
+                    get_llm_scheduler().settle(tokens, usage.total())
@@ -0,0 +1,204 @@
+"""Token-bucket scheduling of chat model calls against provider rate limits.
+
+OpenAI limits each key by requests per minute (RPM) and tokens per minute
+(TPM). Every chat model in the process shares one `LLMScheduler`, so the
+retrieval, summarization and verification agents, the query rewriter and
+the memory summarizer all draw from the same two buckets instead of each
+discovering the limit through 429 responses.
+
+Calls carry a priority. Interactive (user-facing) calls may drain the
+buckets completely; background calls such as conversation summaries only
+run while a reserve is left over and no interactive call is waiting, so a
+burst of summaries never delays an answer.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Literal, Optional
+
+from ..config import get_settings
+
+Priority = Literal["interactive", "background"]
+
+PRIORITY_INTERACTIVE: Priority = "interactive"
+PRIORITY_BACKGROUND: Priority = "background"
+
+# Upper bound on a single sleep so waiters re-check the buckets regularly
+# (tokens refunded by `settle` or freed by a finished call are picked up)
+_MAX_POLL_SECONDS = 0.25
+
+
+class TokenBucket:
+    """Bucket refilled continuously at `per_minute / 60` units per second.
+
+    The level may go negative when a call turns out to use more tokens than
+    were reserved for it; later callers then wait for the debt to refill.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, reserve: float = 0.0) -> float:
+        """Seconds until `amount` can be taken while keeping `reserve` in the bucket."""
+        # A call larger than the whole bucket can never fit; let it through
+        # once the bucket is full rather than blocking it forever
+        needed = min(amount + reserve, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+
+class LLMScheduler:
+    """Admits chat model calls at the configured RPM/TPM, interactive calls first.
+
+    Args:
+        requests_per_minute: Request budget; `None` or 0 disables the limit.
+        tokens_per_minute: Token budget; `None` or 0 disables the limit.
+        background_reserve: Share of each bucket background calls must leave
+            untouched for interactive calls.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        background_reserve: float = 0.2,
+    ) -> None:
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._background_reserve = min(max(background_reserve, 0.0), 1.0)
+        self._interactive_waiting = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._requests is not None or self._tokens is not None
+
+    def _try_acquire(self, tokens: int, priority: Priority) -> float:
+        """Take the budget for one call, or return how long to wait before retrying."""
+        now = time.monotonic()
+        background = priority == PRIORITY_BACKGROUND
+        wait = 0.0
+        for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+            if bucket is None:
+                continue
+            bucket.refill(now)
+            reserve = bucket.capacity * self._background_reserve if background else 0.0
+            wait = max(wait, bucket.wait_time(amount, reserve))
+        if background and self._interactive_waiting:
+            wait = max(wait, _MAX_POLL_SECONDS)
+        if wait > 0:
+            return wait
+        if self._requests is not None:
+            self._requests.level -= 1
+        if self._tokens is not None:
+            self._tokens.level -= tokens
+        return 0.0
+
+    def _enter(self, tokens: int, priority: Priority) -> float:
+        with self._lock:
+            wait = self._try_acquire(tokens, priority)
+            if wait and priority == PRIORITY_INTERACTIVE:
+                self._interactive_waiting += 1
+            return wait
+
+    def _retry(self, tokens: int, priority: Priority) -> float:
+        with self._lock:
+            wait = self._try_acquire(tokens, priority)
+            if not wait and priority == PRIORITY_INTERACTIVE:
+                self._interactive_waiting -= 1
+            return wait
+
+    def acquire(self, tokens: int, priority: Priority = PRIORITY_INTERACTIVE) -> float:
+        """Block until one call using about `tokens` tokens may start.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        if not self.enabled:
+            return 0.0
+        started = time.monotonic()
+        wait = self._enter(tokens, priority)
+        try:
+            while wait:
+                time.sleep(min(wait, _MAX_POLL_SECONDS))
+                wait = self._retry(tokens, priority)
+        finally:
+            # Interrupted while waiting (e.g. KeyboardInterrupt): stop
+            # holding background calls back on behalf of this one
+            if wait and priority == PRIORITY_INTERACTIVE:
+                with self._lock:
+                    self._interactive_waiting -= 1
+        return time.monotonic() - started
+
+    async def aacquire(self, tokens: int, priority: Priority = PRIORITY_INTERACTIVE) -> float:
+        """Async variant of `acquire`; waits without blocking the event loop."""
+        if not self.enabled:
+            return 0.0
+        started = time.monotonic()
+        wait = self._enter(tokens, priority)
+        try:
+            while wait:
+                await asyncio.sleep(min(wait, _MAX_POLL_SECONDS))
+                wait = self._retry(tokens, priority)
+        except asyncio.CancelledError:
+            if priority == PRIORITY_INTERACTIVE:
+                with self._lock:
+                    self._interactive_waiting -= 1
+            raise
+        return time.monotonic() - started
+
+    def settle(self, reserved_tokens: int, used_tokens: int) -> None:
+        """Correct the token bucket once a call reports its real usage."""
+        if used_tokens <= 0:
+            return
+        self._return_tokens(reserved_tokens - used_tokens)
+
+    def refund(self, reserved_tokens: int) -> None:
+        """Give back the tokens reserved for a call that failed without using them.
+
+        The request itself still counts against the RPM budget: it reached
+        the provider.
+        """
+        self._return_tokens(reserved_tokens)
+
+    def _return_tokens(self, amount: int) -> None:
+        if self._tokens is None:
+            return
+        with self._lock:
+            self._tokens.refill(time.monotonic())
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level + amount)
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Return the process-wide scheduler built from the rate limit settings."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                settings = get_settings()
+                _scheduler = LLMScheduler(
+                    requests_per_minute=settings.llm_requests_per_minute,
+                    tokens_per_minute=settings.llm_tokens_per_minute,
+                    background_reserve=settings.llm_background_reserve,
+                )
+    return _scheduler
+
+
+def reset_llm_scheduler() -> None:
+    """Drop the scheduler so the next call rebuilds it from current settings."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = None
@@ -0,0 +1,190 @@
+"""Memoization of chat model responses.
+
+Identical prompts reach the model again and again: a re-asked question
+retrieves the same context, evaluation runs repeat whole conversations,
+and memory summaries are requested for histories that have not changed.
+`LLMResponseCache` plugs into LangChain's chat model cache hook
+(`BaseCache`) and answers those calls from a bounded in-memory LRU, backed
+by a local SQLite file that survives restarts (see `tiered_cache`).
+
+Keys are a SHA-256 over the model name, temperature, call parameters
+(bound tools, stop words) and a canonical form of the messages. The
+factory only attaches the cache to temperature-0 models; sampled outputs
+are not meant to repeat.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from ..config import get_settings
+from ..metrics import CACHED_GENERATION_FLAG, REGISTRY, Sample
+from ..tiered_cache import TieredCache
+
+# Message fields that differ between otherwise identical calls (provider
+# response ids, timings, token usage of earlier turns in a tool loop)
+_VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        if value.get("lc") == 1 and isinstance(value.get("kwargs"), dict):
+            kwargs = {
+                key: item
+                for key, item in value["kwargs"].items()
+                if key not in _VOLATILE_MESSAGE_FIELDS
+            }
+            return {**value, "kwargs": _canonical(kwargs)}
+        return {key: _canonical(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def canonical_prompt(prompt: str) -> str:
+    """Normalize LangChain's serialized messages so equal prompts compare equal."""
+    try:
+        return json.dumps(_canonical(json.loads(prompt)), sort_keys=True, ensure_ascii=False)
+    except ValueError:
+        return prompt
+
+
+def response_cache_key(prompt: str, llm_string: str) -> str:
+    """Build the cache key for a serialized prompt under a model configuration."""
+    raw = f"{llm_string}\x00{canonical_prompt(prompt)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _serialize(generations: Sequence[Generation]) -> str:
+    return json.dumps([
+        {
+            "message": message_to_dict(generation.message),
+            "generation_info": generation.generation_info,
+        }
+        if isinstance(generation, ChatGeneration)
+        else {"text": generation.text, "generation_info": generation.generation_info}
+        for generation in generations
+    ])
+
+
+def _deserialize(payload: str) -> List[Generation]:
+    generations: List[Generation] = []
+    for item in json.loads(payload):
+        # Flagged so the metrics callback does not count the hit as a model call
+        info = {**(item["generation_info"] or {}), CACHED_GENERATION_FLAG: True}
+        if "message" in item:
+            message = messages_from_dict([item["message"]])[0]
+            generations.append(ChatGeneration(message=message, generation_info=info))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=info))
+    return generations
+
+
+class LLMResponseCache(BaseCache):
+    """Two-tier (memory LRU + optional SQLite) store of chat model responses.
+
+    Args:
+        max_entries: Maximum number of responses kept in memory.
+        ttl_seconds: Entry lifetime; `None` or `0` disables expiry.
+        path: Optional SQLite file for the persistent tier.
+        max_persistent_entries: Maximum number of rows kept in the SQLite
+            tier; the oldest are deleted beyond this. `None` or `0` = unbounded.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        path: Optional[str] = None,
+        max_persistent_entries: Optional[int] = None,
+    ) -> None:
+        # Serialized generations are kept in both tiers; each hit is
+        # deserialized afresh so callers never share message objects
+        self._store: TieredCache[str] = TieredCache(
+            "llm_responses",
+            "generations",
+            str,
+            str,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            path=path,
+            max_persistent_entries=max_persistent_entries,
+        )
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return the cached generations for a prompt, promoting persistent hits."""
+        payload = self._store.get(response_cache_key(prompt, llm_string))
+        return _deserialize(payload) if payload is not None else None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store the generations of a completed call in both tiers."""
+        self._store.put(response_cache_key(prompt, llm_string), _serialize(return_val))
+
+    def prune(self) -> int:
+        """Delete expired and over-cap rows from the persistent tier; return how many."""
+        return self._store.prune()
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop every cached response from both tiers."""
+        self._store.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current in-memory size."""
+        return self._store.stats()
+
+    def close(self) -> None:
+        """Close the persistent tier, if any."""
+        self._store.close()
+
+
+_cache: LLMResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Get the process-wide chat model response cache (built from settings)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                _cache = LLMResponseCache(
+                    max_entries=settings.llm_cache_max_entries,
+                    ttl_seconds=settings.llm_cache_ttl_seconds,
+                    path=settings.llm_cache_path,
+                    max_persistent_entries=settings.llm_cache_max_persistent_entries,
+                )
+    return _cache
+
+
+def close_llm_response_cache() -> None:
+    """Close and forget the process-wide cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = None
+
+
+def _collect_metrics() -> List[Sample]:
+    cache = _cache
+    if cache is None:
+        return []
+    stats = cache.stats()
+    return [
+        ("rag_llm_cache_hits_total", "counter", "Chat model response cache hits.",
+         [({"tier": "memory"}, stats["hits"] - stats["disk_hits"]),
+          ({"tier": "disk"}, stats["disk_hits"])]),
+        ("rag_llm_cache_misses_total", "counter", "Chat model response cache misses.",
+         [({}, stats["misses"])]),
+        ("rag_llm_cache_entries", "gauge", "Chat model responses held in memory.",
+         [({}, stats["size"])]),
+    ]
+
+
+REGISTRY.register_collector(_collect_metrics)
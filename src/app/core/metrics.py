@@ -0,0 +1,431 @@
+"""In-process metrics with Prometheus text exposition.
+
+A deliberately small registry (counters, histograms and scrape-time
+collectors) so the API can expose `/metrics` without another dependency.
+Instrumented here:
+
+- every graph node (`timed_node`),
+- every chat model call, with token usage and estimated cost
+  (`MetricsCallbackHandler`, attached by the LLM factory),
+- embedding API calls (`TimedEmbeddings`),
+- vector and lexical queries (`observe`),
+- cache hit/miss counters (collectors registered by the caches).
+
+`track_request_timings` additionally collects a per-request breakdown of the
+same durations, which the API can attach to its responses.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableLambda
+
+LabelValues = Tuple[str, ...]
+# (metric name, type, help, [(labels, value), ...])
+Sample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# USD per 1M tokens (prompt, completion); list prices, used for estimates only
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            labels = dict(zip(self.labelnames, key))
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # labels -> (per-bucket counts, sum, count)
+        self._series: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total, count = self._series.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[position] += 1
+                    break
+            self._series[key] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(c), s, n)) for key, (c, s, n) in self._series.items())
+        for key, (counts, total, count) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and scrape-time collectors, and renders them."""
+
+    def __init__(self) -> None:
+        self._metrics: List[Any] = []
+        self._collectors: List[Callable[[], List[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[Sample]]) -> None:
+        """Add a callable producing samples at scrape time (e.g. cache stats)."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+NODE_SECONDS = REGISTRY.histogram(
+    "rag_node_duration_seconds", "Graph node latency.", ["node"]
+)
+NODE_ERRORS = REGISTRY.counter(
+    "rag_node_errors_total", "Graph node executions that raised.", ["node"]
+)
+LLM_SECONDS = REGISTRY.histogram(
+    "rag_llm_duration_seconds", "Chat model call latency.", ["model"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "rag_llm_tokens_total", "Tokens used by chat model calls.", ["model", "type"]
+)
+LLM_COST = REGISTRY.counter(
+    "rag_llm_cost_usd_total", "Estimated chat model spend (list prices).", ["model"]
+)
+LLM_ERRORS = REGISTRY.counter(
+    "rag_llm_errors_total", "Chat model calls that raised.", ["model"]
+)
+LLM_RETRIES = REGISTRY.counter(
+    "rag_llm_retries_total", "Chat model calls retried after a transient error.", ["model", "error"]
+)
+LLM_THROTTLE_SECONDS = REGISTRY.histogram(
+    "rag_llm_throttle_seconds", "Time chat model calls waited for rate limit budget.", ["priority"]
+)
+EMBEDDING_SECONDS = REGISTRY.histogram(
+    "rag_embedding_duration_seconds", "Embedding API call latency.", ["kind"]
+)
+EMBEDDING_TEXTS = REGISTRY.counter(
+    "rag_embedding_texts_total", "Texts sent to the embedding API.", ["kind"]
+)
+EMBEDDING_ERRORS = REGISTRY.counter(
+    "rag_embedding_errors_total", "Embedding API calls that raised.", ["kind"]
+)
+SEARCH_SECONDS = REGISTRY.histogram(
+    "rag_search_duration_seconds", "Vector / lexical query latency.", ["search"]
+)
+SEARCH_ERRORS = REGISTRY.counter(
+    "rag_search_errors_total", "Vector / lexical queries that raised.", ["search"]
+)
+
+
+# --- Per-request timings ---
+
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def track_request_timings() -> Iterator[Dict[str, float]]:
+    """Collect a duration breakdown (seconds by component) for this request.
+
+    Everything timed inside the block, including graph nodes running in
+    other threads or tasks started from it, adds to the yielded dict.
+    """
+    timings: Dict[str, float] = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        try:
+            _request_timings.reset(token)
+        except ValueError:
+            # Exited from another context (e.g. a streaming generator
+            # finalized elsewhere); nothing of ours is left to undo there
+            pass
+
+
+def _record_timing(component: str, seconds: float) -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[component] = round(timings.get(component, 0.0) + seconds, 4)
+
+
+@contextmanager
+def observe(
+    histogram: Histogram,
+    errors: Optional[Counter] = None,
+    component: Optional[str] = None,
+    **labels: str,
+) -> Iterator[None]:
+    """Time a block into `histogram`, counting exceptions in `errors`."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        if errors is not None:
+            errors.inc(**labels)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, **labels)
+        if component:
+            _record_timing(component, elapsed)
+
+
+# --- Graph nodes ---
+
+def timed_node(
+    name: str,
+    func: Callable[[Any], Any],
+    afunc: Optional[Callable[[Any], Any]] = None,
+) -> RunnableLambda:
+    """Wrap a node's sync (and optional async) implementation with timing."""
+
+    def run(state: Any) -> Any:
+        with observe(NODE_SECONDS, NODE_ERRORS, f"node:{name}", node=name):
+            return func(state)
+
+    if afunc is None:
+        return RunnableLambda(run, name=name)
+
+    async def arun(state: Any) -> Any:
+        with observe(NODE_SECONDS, NODE_ERRORS, f"node:{name}", node=name):
+            return await afunc(state)
+
+    return RunnableLambda(run, afunc=arun, name=name)
+
+
+# --- LLM calls ---
+
+# `generation_info` key set on generations served by the response cache
+CACHED_GENERATION_FLAG = "cached"
+
+def _model_prices(model: str) -> Optional[Tuple[float, float]]:
+    # Dated snapshots ("gpt-4o-mini-2024-07-18") use their family's price
+    matches = [name for name in MODEL_PRICES if model == name or model.startswith(name + "-")]
+    return MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def _token_usage(response: LLMResult) -> Tuple[int, int]:
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    prompt = usage.get("prompt_tokens", 0)
+    completion = usage.get("completion_tokens", 0)
+    if prompt or completion:
+        return prompt, completion
+    # Streaming responses report usage on the message instead
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                prompt += metadata.get("input_tokens", 0)
+                completion += metadata.get("output_tokens", 0)
+    return prompt, completion
+
+
+def _is_cache_hit(response: LLMResult) -> bool:
+    """True when the response was served by the chat model response cache.
+
+    `LLMResponseCache` marks the generations it returns; LangChain itself
+    zeroes `total_cost` in the usage of every cache hit, whatever the cache.
+    """
+    for generations in response.generations:
+        for generation in generations:
+            if (generation.generation_info or {}).get(CACHED_GENERATION_FLAG):
+                return True
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata and metadata.get("total_cost") == 0:
+                return True
+    return False
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records latency, token usage, cost and errors of chat model calls.
+
+    Responses served from the LLM response cache made no API call, so they
+    are left out of the latency, token and cost series (the cache reports
+    its own hit counters); per-request timings list them as `llm_cache:<model>`.
+    """
+
+    def __init__(self) -> None:
+        self._started: Dict[UUID, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, kwargs: Dict[str, Any]) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or "unknown"
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), str(model))
+
+    def _finish(self, run_id: UUID, cached: bool = False) -> Tuple[float, str]:
+        with self._lock:
+            start, model = self._started.pop(run_id, (time.perf_counter(), "unknown"))
+        elapsed = time.perf_counter() - start
+        if cached:
+            _record_timing(f"llm_cache:{model}", elapsed)
+            return elapsed, model
+        LLM_SECONDS.observe(elapsed, model=model)
+        _record_timing(f"llm:{model}", elapsed)
+        return elapsed, model
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._start(run_id, kwargs)
+
+    def on_llm_start(
+        self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._start(run_id, kwargs)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        cached = _is_cache_hit(response)
+        _, model = self._finish(run_id, cached=cached)
+        if cached:
+            return
+        prompt, completion = _token_usage(response)
+        LLM_TOKENS.inc(prompt, model=model, type="prompt")
+        LLM_TOKENS.inc(completion, model=model, type="completion")
+        prices = _model_prices(model)
+        if prices:
+            LLM_COST.inc((prompt * prices[0] + completion * prices[1]) / 1_000_000, model=model)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        _, model = self._finish(run_id)
+        LLM_ERRORS.inc(model=model)
+
+
+_llm_callback = MetricsCallbackHandler()
+
+
+def get_llm_callback() -> MetricsCallbackHandler:
+    """Shared callback handler for chat models built by the LLM factory."""
+    return _llm_callback
+
+
+# --- Embeddings ---
+
+class TimedEmbeddings(Embeddings):
+    """Embeddings wrapper that times every call to the underlying API."""
+
+    def __init__(self, embeddings: Embeddings) -> None:
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        EMBEDDING_TEXTS.inc(len(texts), kind="documents")
+        with observe(EMBEDDING_SECONDS, EMBEDDING_ERRORS, "embedding", kind="documents"):
+            return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        EMBEDDING_TEXTS.inc(len(texts), kind="documents")
+        with observe(EMBEDDING_SECONDS, EMBEDDING_ERRORS, "embedding", kind="documents"):
+            return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        EMBEDDING_TEXTS.inc(kind="query")
+        with observe(EMBEDDING_SECONDS, EMBEDDING_ERRORS, "embedding", kind="query"):
+            return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        EMBEDDING_TEXTS.inc(kind="query")
+        with observe(EMBEDDING_SECONDS, EMBEDDING_ERRORS, "embedding", kind="query"):
+            return await self.embeddings.aembed_query(text)
@@ -0,0 +1,198 @@
+"""Process-wide embeddings and vector store clients.
+
+Building `OpenAIEmbeddings` and `PineconeVectorStore` is not free: every new
+instance resolves settings, looks up the index host and opens fresh HTTP
+connections. This module builds them once per process, hands the same
+instances to every caller and lets the API reload or close them explicitly.
+
+With `vector_backend="local"` the Pinecone client is skipped and the store
+is a memory-mapped `LocalVectorStore` instead.
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from ..config import get_settings, reload_settings
+from ..http import aclose_http_clients, close_http_clients
+from ..llm.factory import clear_chat_models, create_embeddings_model
+from ..metrics import TimedEmbeddings
+from .embedding_cache import (
+    CachedQueryEmbeddings,
+    close_query_embedding_cache,
+    get_query_embedding_cache,
+)
+from .local_store import LocalVectorStore
+
+if TYPE_CHECKING:
+    from langchain_pinecone import PineconeVectorStore
+    from pinecone import Pinecone
+
+
+@dataclass
+class RetrievalClients:
+    """Bundle of long-lived clients used by retrieval and indexing."""
+
+    embeddings: Embeddings
+    vector_store: VectorStore
+    # Scope for the indexing manifest (Pinecone index name or local path)
+    index_name: str
+    # Only set for the Pinecone backend
+    pinecone: Optional["Pinecone"] = None
+    index: Any = None
+
+    # Async Pinecone sessions are bound to the event loop that opened them
+    _async_store: Optional["PineconeVectorStore"] = field(default=None, init=False)
+    _async_loop: asyncio.AbstractEventLoop | None = field(default=None, init=False)
+
+    @property
+    def is_local(self) -> bool:
+        return isinstance(self.vector_store, LocalVectorStore)
+
+    async def async_vector_store(self) -> VectorStore:
+        """Return a vector store whose async index connection stays open.
+
+        Without an open context, every async query would create and tear
+        down its own Pinecone asyncio client. The local store has no
+        connection and is returned as is.
+        """
+        if self.is_local:
+            return self.vector_store
+        from langchain_pinecone import PineconeVectorStore
+
+        loop = asyncio.get_running_loop()
+        if self._async_store is None or self._async_loop is not loop:
+            store = PineconeVectorStore(index=self.index, embedding=self.embeddings)
+            await store.__aenter__()
+            if self._async_store is not None and self._async_loop is loop:
+                # Another coroutine opened one while we were awaiting
+                await store.aclose()
+            else:
+                self._async_store, self._async_loop = store, loop
+        return self._async_store
+
+    def close(self) -> None:
+        """Release the Pinecone connection pool."""
+        close = getattr(self.index, "close", None)
+        if callable(close):
+            close()
+
+    async def aclose(self) -> None:
+        """Release both the async and the sync Pinecone connections."""
+        store, self._async_store = self._async_store, None
+        if store is not None and self._async_loop is asyncio.get_running_loop():
+            await store.aclose()
+        self._async_loop = None
+        self.close()
+
+
+_lock = threading.Lock()
+_clients: RetrievalClients | None = None
+
+
+def _build_clients() -> RetrievalClients:
+    settings = get_settings()
+
+    embeddings: Embeddings = create_embeddings_model()
+    if settings.metrics_enabled:
+        # Below the cache, so only real API calls are timed
+        embeddings = TimedEmbeddings(embeddings)
+    if settings.embedding_cache_enabled:
+        # Repeated queries skip the embeddings round trip entirely
+        embeddings = CachedQueryEmbeddings(
+            embeddings,
+            model_name=settings.openai_embedding_model_name,
+            cache=get_query_embedding_cache(),
+        )
+
+    if settings.vector_backend == "local":
+        return RetrievalClients(
+            embeddings=embeddings,
+            vector_store=LocalVectorStore(
+                settings.local_index_path,
+                embeddings,
+                dtype=settings.local_index_dtype,
+            ),
+            index_name=f"local:{settings.local_index_path}",
+        )
+
+    # Imported here so the local backend never loads the Pinecone SDK
+    from langchain_pinecone import PineconeVectorStore
+    from pinecone import Pinecone
+
+    # Resolve the index host once; the handle keeps its own connection pool
+    pinecone = Pinecone(
+        api_key=settings.pinecone_api_key,
+        pool_threads=settings.pinecone_pool_threads,
+    )
+    index = pinecone.Index(settings.pinecone_index_name)
+
+    vector_store = PineconeVectorStore(index=index, embedding=embeddings)
+
+    return RetrievalClients(
+        embeddings=embeddings,
+        vector_store=vector_store,
+        index_name=settings.pinecone_index_name,
+        pinecone=pinecone,
+        index=index,
+    )
+
+
+def get_clients() -> RetrievalClients:
+    """Get the shared retrieval clients, building them on first use."""
+    global _clients
+    if _clients is None:
+        with _lock:
+            if _clients is None:
+                _clients = _build_clients()
+    return _clients
+
+
+def reload_clients(refresh_settings: bool = True) -> RetrievalClients:
+    """Rebuild the shared clients, e.g. after the environment changed.
+
+    Args:
+        refresh_settings: Re-read settings from the environment first.
+
+    Returns:
+        The newly built clients.
+    """
+    global _clients
+    with _lock:
+        old, _clients = _clients, None
+    if old is not None:
+        old.close()
+    if refresh_settings:
+        reload_settings()
+        close_http_clients()
+        close_query_embedding_cache()
+        clear_chat_models()
+    return get_clients()
+
+
+def close_clients() -> None:
+    """Close the shared clients and HTTP pools (synchronous callers)."""
+    global _clients
+    with _lock:
+        old, _clients = _clients, None
+    if old is not None:
+        old.close()
+    close_http_clients()
+    close_query_embedding_cache()
+    clear_chat_models()
+
+
+async def aclose_clients() -> None:
+    """Close the shared clients and HTTP pools from inside an event loop."""
+    global _clients
+    with _lock:
+        old, _clients = _clients, None
+    if old is not None:
+        await old.aclose()
+    await aclose_http_clients()
+    close_query_embedding_cache()
+    clear_chat_models()
@@ -0,0 +1,129 @@
+"""Context assembly: pick, dedupe and budget retrieved chunks.
+
+Retrieval returns more candidates than the prompt should carry. This stage
+turns them into the CONTEXT shared by the summarization and verification
+prompts:
+
+1. Near-duplicate chunks (overlapping splits, repeated boilerplate) are dropped.
+2. The rest are ordered by maximal marginal relevance, trading retrieval
+   rank against redundancy with the chunks already selected.
+3. Chunks are added until the token budget is spent; the last one may be
+   truncated. Page metadata is left intact, so citations still work.
+
+Similarity is lexical (Jaccard over word sets): retrieved documents carry
+no vectors and re-embedding them would cost an API call per request.
+"""
+
+import re
+from typing import FrozenSet, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from ..config import get_settings
+from ..tokens import count_tokens, truncate_to_tokens
+from .serialization import serialize_chunks
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Below this many tokens a truncated chunk is more noise than evidence
+_MIN_TRUNCATED_TOKENS = 40
+
+
+def _word_set(text: str) -> FrozenSet[str]:
+    return frozenset(_WORD_PATTERN.findall(text.lower()))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two word sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def select_chunks(
+    docs: List[Document],
+    max_chunks: int,
+    mmr_lambda: float = 0.7,
+    duplicate_threshold: float = 0.85,
+) -> List[Document]:
+    """Drop near-duplicates and order the rest by maximal marginal relevance.
+
+    Args:
+        docs: Candidates in retrieval order (best first).
+        max_chunks: Maximum number of chunks to select.
+        mmr_lambda: 1.0 keeps retrieval order, lower values favour diversity.
+        duplicate_threshold: Jaccard similarity above which a chunk counts
+            as a duplicate of a better-ranked one.
+
+    Returns:
+        Selected documents, most useful first.
+    """
+    words = [_word_set(doc.page_content) for doc in docs]
+
+    # 1. Near-duplicate removal, keeping the better-ranked copy
+    candidates: List[int] = []
+    for i in range(len(docs)):
+        if all(jaccard(words[i], words[j]) < duplicate_threshold for j in candidates):
+            candidates.append(i)
+
+    # 2. MMR with relevance derived from the retrieval rank
+    relevance = {i: 1.0 - rank / len(docs) for rank, i in enumerate(candidates)}
+    selected: List[int] = []
+    while candidates and len(selected) < max_chunks:
+        best = max(
+            candidates,
+            key=lambda i: mmr_lambda * relevance[i]
+            - (1.0 - mmr_lambda)
+            * max((jaccard(words[i], words[j]) for j in selected), default=0.0),
+        )
+        selected.append(best)
+        candidates.remove(best)
+    return [docs[i] for i in selected]
+
+
+def fit_to_budget(docs: List[Document], token_budget: int) -> List[Document]:
+    """Keep chunks in order until `token_budget` tokens are used.
+
+    The chunk that crosses the budget is truncated (with its metadata
+    kept) when enough room is left for it to be useful.
+    """
+    kept: List[Document] = []
+    remaining = token_budget
+    for doc in docs:
+        # Header ("Chunk N (page=X):") and separators
+        tokens = count_tokens(doc.page_content) + 10
+        if tokens <= remaining:
+            kept.append(doc)
+            remaining -= tokens
+            continue
+        if remaining - 10 >= _MIN_TRUNCATED_TOKENS:
+            text = truncate_to_tokens(doc.page_content, remaining - 10)
+            kept.append(Document(id=doc.id, page_content=text, metadata=doc.metadata))
+        break
+    return kept
+
+
+def assemble_context(
+    docs: List[Document],
+    max_chunks: Optional[int] = None,
+    token_budget: Optional[int] = None,
+) -> Tuple[str, List[Document]]:
+    """Build the CONTEXT string for the answer prompts from retrieved chunks.
+
+    Args:
+        docs: Retrieved candidates, best first.
+        max_chunks: Chunk limit (default: `retrieval_k`).
+        token_budget: Token limit (default: `context_token_budget`).
+
+    Returns:
+        Tuple of (serialized context, documents it contains).
+    """
+    settings = get_settings()
+    selected = select_chunks(
+        docs,
+        max_chunks=max_chunks or settings.retrieval_k,
+        mmr_lambda=settings.context_mmr_lambda,
+        duplicate_threshold=settings.context_duplicate_threshold,
+    )
+    kept = fit_to_budget(selected, token_budget or settings.context_token_budget)
+    return serialize_chunks(kept), kept
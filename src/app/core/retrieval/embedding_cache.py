@@ -0,0 +1,213 @@
+"""Cache for query embeddings.
+
+Users repeat questions and the retrieval agent tends to rewrite follow-ups
+into the same few query forms, so the same query text is embedded over and
+over. `CachedQueryEmbeddings` wraps the real embeddings client and answers
+repeated queries from a bounded in-memory LRU, optionally backed by a local
+SQLite file that survives restarts (see `tiered_cache`).
+
+Only query embeddings are cached; document embeddings during indexing are
+passed straight through.
+"""
+
+import hashlib
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from ..config import get_settings
+from ..metrics import REGISTRY, Sample
+from ..tiered_cache import TieredCache
+
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace and case so trivially different queries match."""
+    return " ".join(text.split()).casefold()
+
+
+def cache_key(text: str, model_name: str) -> str:
+    """Build the cache key for a query under a given embedding model."""
+    raw = f"{model_name}\x00{normalize_query(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _encode_vector(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _decode_vector(blob: bytes) -> List[float]:
+    return array("f", blob).tolist()
+
+
+class QueryEmbeddingCache(TieredCache[List[float]]):
+    """Two-tier (memory LRU + optional SQLite) store of embedding vectors.
+
+    Args:
+        max_entries: Maximum number of vectors kept in memory.
+        ttl_seconds: Entry lifetime; `None` or `0` disables expiry.
+        path: Optional SQLite file for the persistent tier.
+        max_persistent_entries: Maximum number of rows kept in the SQLite
+            tier; the oldest are deleted beyond this. `None` or `0` = unbounded.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl_seconds: Optional[float] = None,
+        path: Optional[str] = None,
+        max_persistent_entries: Optional[int] = None,
+    ) -> None:
+        super().__init__(
+            "query_embeddings",
+            "vector",
+            _encode_vector,
+            _decode_vector,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            path=path,
+            max_persistent_entries=max_persistent_entries,
+        )
+
+    def put(self, key: str, vector: List[float]) -> None:
+        """Store a vector in both tiers."""
+        super().put(key, list(vector))
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated queries from a cache.
+
+    Args:
+        embeddings: The real embeddings client.
+        model_name: Embedding model name, part of every cache key.
+        cache: Shared cache instance.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache: QueryEmbeddingCache,
+    ) -> None:
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = cache_key(text, self.model_name)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = cache_key(text, self.model_name)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self.cache.put(key, vector)
+        return vector
+
+    def _split_cached(
+        self, texts: List[str]
+    ) -> Tuple[List[Optional[List[float]]], Dict[str, List[int]]]:
+        # Cached vectors by position, and positions still missing per key
+        vectors: List[Optional[List[float]]] = []
+        missing: Dict[str, List[int]] = {}
+        for position, text in enumerate(texts):
+            key = cache_key(text, self.model_name)
+            vector = self.cache.get(key)
+            vectors.append(vector)
+            if vector is None:
+                missing.setdefault(key, []).append(position)
+        return vectors, missing
+
+    def _fill_missing(
+        self,
+        vectors: List[Optional[List[float]]],
+        missing: Dict[str, List[int]],
+        embedded: List[List[float]],
+    ) -> List[List[float]]:
+        for (key, positions), vector in zip(missing.items(), embedded):
+            self.cache.put(key, vector)
+            for position in positions:
+                vectors[position] = vector
+        return vectors  # type: ignore[return-value]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many queries with one request for all cache misses.
+
+        Repeated queries (after normalization) are embedded once. Results
+        are cached, so later `embed_query` calls for them are free.
+        """
+        vectors, missing = self._split_cached(texts)
+        if not missing:
+            return vectors  # type: ignore[return-value]
+        unique = [texts[positions[0]] for positions in missing.values()]
+        embedded = self.embeddings.embed_documents(unique)
+        return self._fill_missing(vectors, missing, embedded)
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of `embed_queries`."""
+        vectors, missing = self._split_cached(texts)
+        if not missing:
+            return vectors  # type: ignore[return-value]
+        unique = [texts[positions[0]] for positions in missing.values()]
+        embedded = await self.embeddings.aembed_documents(unique)
+        return self._fill_missing(vectors, missing, embedded)
+
+
+_cache: QueryEmbeddingCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Get the process-wide query embedding cache (built from settings)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                _cache = QueryEmbeddingCache(
+                    max_entries=settings.embedding_cache_max_entries,
+                    ttl_seconds=settings.embedding_cache_ttl_seconds,
+                    path=settings.embedding_cache_path,
+                    max_persistent_entries=settings.embedding_cache_max_persistent_entries,
+                )
+    return _cache
+
+
+def close_query_embedding_cache() -> None:
+    """Close and forget the process-wide cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = None
+
+
+def _collect_metrics() -> List[Sample]:
+    cache = _cache
+    if cache is None:
+        return []
+    stats = cache.stats()
+    return [
+        ("rag_embedding_cache_hits_total", "counter", "Query embedding cache hits.",
+         [({"tier": "memory"}, stats["hits"] - stats["disk_hits"]),
+          ({"tier": "disk"}, stats["disk_hits"])]),
+        ("rag_embedding_cache_misses_total", "counter", "Query embedding cache misses.",
+         [({}, stats["misses"])]),
+        ("rag_embedding_cache_entries", "gauge", "Query embeddings held in memory.",
+         [({}, stats["size"])]),
+    ]
+
+
+REGISTRY.register_collector(_collect_metrics)
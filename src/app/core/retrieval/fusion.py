@@ -0,0 +1,40 @@
+"""Merging of ranked result lists from several searches."""
+
+from typing import Dict, List, Sequence
+
+from langchain_core.documents import Document
+
+
+def _doc_key(doc: Document) -> str:
+    # Chunk ids are deterministic; fall back to content for id-less docs
+    return doc.id or doc.page_content
+
+
+def reciprocal_rank_fusion(
+    result_lists: Sequence[List[Document]],
+    k: int = 8,
+    rrf_k: int = 60,
+) -> List[Document]:
+    """Fuse ranked lists with reciprocal rank fusion.
+
+    Each document scores `sum(1 / (rrf_k + rank))` over the lists it appears
+    in, so documents ranked well by several searches rise to the top without
+    having to compare the searches' raw scores.
+
+    Args:
+        result_lists: Ranked results, best first, one list per search.
+        k: Number of fused documents to return.
+        rrf_k: Rank damping constant (60 in the original RRF paper).
+
+    Returns:
+        The `k` best documents, each appearing once.
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ranked[:k]]
@@ -0,0 +1,180 @@
+"""BM25 inverted index over indexed chunks.
+
+Dense embeddings are good at paraphrases but weak at exact identifiers
+(project names, metric names, acronyms). This module keeps a lexical index
+next to the vector store, in SQLite's FTS5 extension, which stores an
+inverted index and ranks matches with BM25.
+
+Rows are keyed by the same chunk ids as the vectors, scoped by vector index
+name, and written/deleted by the indexing pipeline alongside the upserts.
+Chunks indexed before this index existed are filled in later by
+`indexing_service.backfill_lexical_index` (or when their file is uploaded
+again).
+"""
+
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+from langchain_core.documents import Document
+
+from ..config import get_settings
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_MAX_QUERY_TERMS = 32
+# Ids per `IN (...)` lookup, below SQLite's bound parameter limit
+_LOOKUP_BATCH_SIZE = 500
+
+
+def build_match_query(query: str) -> str:
+    """Turn free text into an FTS5 MATCH expression (any term may match).
+
+    Each term is quoted so user input can never be parsed as FTS5 syntax.
+    """
+    terms: Dict[str, None] = {}
+    for token in _TOKEN_PATTERN.findall(query.lower()):
+        if len(token) > 1:
+            terms[token] = None
+    return " OR ".join(f'"{term}"' for term in list(terms)[:_MAX_QUERY_TERMS])
+
+
+class LexicalIndex:
+    """SQLite FTS5 table of chunk texts, searchable with BM25.
+
+    Args:
+        path: Database file; created (with parent directories) if missing.
+    """
+
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "rowid INTEGER PRIMARY KEY, "
+                "index_name TEXT NOT NULL, "
+                "chunk_id TEXT NOT NULL, "
+                "text TEXT NOT NULL, "
+                "metadata TEXT NOT NULL, "
+                "UNIQUE (index_name, chunk_id))"
+            )
+            # External-content FTS table: the inverted index only, texts
+            # live once in `chunks` and are kept in sync by triggers
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5("
+                "text, content='chunks', content_rowid='rowid', "
+                "tokenize='porter unicode61')"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN "
+                "INSERT INTO chunks_fts(rowid, text) VALUES (new.rowid, new.text); END"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN "
+                "INSERT INTO chunks_fts(chunks_fts, rowid, text) "
+                "VALUES ('delete', old.rowid, old.text); END"
+            )
+
+    def add(
+        self,
+        index_name: str,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+    ) -> int:
+        """Insert or replace chunks."""
+        rows = [
+            (index_name, id_, text, json.dumps(metadata))
+            for id_, text, metadata in zip(ids, texts, metadatas)
+        ]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Delete + insert (not REPLACE) so the delete trigger fires
+                self._db.executemany(
+                    "DELETE FROM chunks WHERE index_name = ? AND chunk_id = ?",
+                    [(index_name, id_) for id_ in ids],
+                )
+                self._db.executemany(
+                    "INSERT INTO chunks (index_name, chunk_id, text, metadata) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def delete(self, index_name: str, ids: List[str]) -> int:
+        """Remove chunks by id."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "DELETE FROM chunks WHERE index_name = ? AND chunk_id = ?",
+                    [(index_name, id_) for id_ in ids],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return len(ids)
+
+    def missing_ids(self, index_name: str, ids: List[str]) -> List[str]:
+        """Return the ids, in order, that have no row in the index."""
+        present: Set[str] = set()
+        with self._lock:
+            for offset in range(0, len(ids), _LOOKUP_BATCH_SIZE):
+                batch = ids[offset:offset + _LOOKUP_BATCH_SIZE]
+                placeholders = ", ".join("?" for _ in batch)
+                rows = self._db.execute(
+                    f"SELECT chunk_id FROM chunks WHERE index_name = ? "
+                    f"AND chunk_id IN ({placeholders})",
+                    (index_name, *batch),
+                ).fetchall()
+                present.update(row[0] for row in rows)
+        return [id_ for id_ in ids if id_ not in present]
+
+    def search(self, index_name: str, query: str, k: int = 8) -> List[Document]:
+        """Return the `k` best BM25 matches for `query`, best first."""
+        match = build_match_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT c.chunk_id, c.text, c.metadata, bm25(chunks_fts) AS score "
+                "FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? AND c.index_name = ? "
+                "ORDER BY score LIMIT ?",
+                (match, index_name, k),
+            ).fetchall()
+        return [
+            Document(id=id_, page_content=text, metadata=json.loads(metadata))
+            for id_, text, metadata, _ in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_lexical_index: LexicalIndex | None = None
+_lexical_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> LexicalIndex:
+    """Get the process-wide lexical index."""
+    global _lexical_index
+    if _lexical_index is None:
+        with _lexical_index_lock:
+            if _lexical_index is None:
+                _lexical_index = LexicalIndex(get_settings().lexical_index_path)
+    return _lexical_index
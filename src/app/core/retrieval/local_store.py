@@ -0,0 +1,374 @@
+"""In-process vector store backed by a memory-mapped NumPy matrix.
+
+For small corpora a network round trip to Pinecone costs far more than the
+search itself. `LocalVectorStore` keeps every embedding as one row of a
+contiguous float32 (or float16) matrix stored in a flat file and memory
+mapped on load, so a query is a single vectorized dot product plus a top-k
+partition.
+
+On-disk layout (in `path`):
+- `meta.json`: embedding dimension and storage dtype,
+- `vectors.bin`: unit-normalized embeddings, one row per record, append-only,
+- `records.jsonl`: one line per row (`id`, `text`, `metadata`) or a
+  tombstone (`{"delete": id}`), replayed on load.
+
+Appends extend both files in place; deleting or overwriting an id writes a
+tombstone, and the row is masked out of future searches. Once tombstoned
+rows make up most of the matrix, `compact` rewrites both files with only
+the live rows.
+
+The two files are written one after the other, so a crash can leave one of
+them longer than the other or end `records.jsonl` with a partial line. On
+load both are cut back to the rows present in each, before anything is
+appended again.
+"""
+
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# Compact automatically once dead rows outnumber live ones, and at least
+# this many rows would be reclaimed
+_COMPACT_MIN_DEAD_ROWS = 1024
+
+
+class LocalVectorStore(VectorStore):
+    """LangChain vector store over a memory-mapped embedding matrix.
+
+    Args:
+        path: Directory holding the store files (created if missing).
+        embedding: Embeddings client used for queries and `add_texts`.
+        dtype: "float32" or "float16" storage for the matrix.
+    """
+
+    def __init__(self, path: str, embedding: Embeddings, dtype: str = "float32") -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._embedding = embedding
+        self._lock = threading.Lock()
+
+        self._meta_path = self.path / "meta.json"
+        self._vectors_path = self.path / "vectors.bin"
+        self._records_path = self.path / "records.jsonl"
+        # Present only between writing compacted files and renaming them
+        self._compact_marker = self.path / "compact.ready"
+
+        self.dim: Optional[int] = None
+        self.dtype = np.dtype(dtype)
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text())
+            self.dim = meta["dim"]
+            self.dtype = np.dtype(meta["dtype"])
+
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_of: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    # --- Persistence ---
+
+    @property
+    def _row_bytes(self) -> int:
+        return (self.dim or 0) * self.dtype.itemsize
+
+    def _load(self) -> None:
+        self._finish_compaction()
+        vector_rows = 0
+        if self.dim is not None and self._vectors_path.exists():
+            vector_rows = self._vectors_path.stat().st_size // self._row_bytes
+
+        if self._records_path.exists():
+            alive: List[bool] = []
+            # Offset just past the last record that is complete and has its vector
+            valid_end = 0
+            with open(self._records_path, "rb") as handle:
+                for line in handle:
+                    try:
+                        record = json.loads(line) if line.endswith(b"\n") else None
+                    except ValueError:
+                        record = None
+                    if record is None:
+                        break
+                    if "delete" in record:
+                        row = self._row_of.pop(record["delete"], None)
+                        if row is not None:
+                            alive[row] = False
+                    else:
+                        if len(self._ids) >= vector_rows:
+                            break
+                        self._row_of[record["id"]] = len(self._ids)
+                        self._ids.append(record["id"])
+                        self._texts.append(record["text"])
+                        self._metadatas.append(record["metadata"])
+                        alive.append(True)
+                    valid_end += len(line)
+            self._alive = np.array(alive, dtype=bool)
+            if valid_end < self._records_path.stat().st_size:
+                os.truncate(self._records_path, valid_end)
+
+        if vector_rows > len(self._ids):
+            os.truncate(self._vectors_path, len(self._ids) * self._row_bytes)
+        self._remap()
+
+    def _remap(self) -> None:
+        rows = len(self._ids)
+        if self.dim is None or rows == 0:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(
+            self._vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim)
+        )
+
+    # --- Writes ---
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        vectors: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Append pre-computed embeddings (ids that already exist are replaced)."""
+        if not texts:
+            return []
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = (matrix / np.where(norms == 0, 1, norms)).astype(self.dtype)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(matrix.shape[1])
+                self._meta_path.write_text(
+                    json.dumps({"dim": self.dim, "dtype": self.dtype.name})
+                )
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(
+                    f"Embedding dimension {matrix.shape[1]} does not match store ({self.dim})"
+                )
+
+            replaced = [id_ for id_ in ids if id_ in self._row_of]
+            with open(self._vectors_path, "ab") as vectors_file:
+                vectors_file.write(matrix.tobytes())
+            with open(self._records_path, "a", encoding="utf-8") as records_file:
+                for id_ in replaced:
+                    records_file.write(json.dumps({"delete": id_}) + "\n")
+                for id_, text, metadata in zip(ids, texts, metadatas):
+                    records_file.write(
+                        json.dumps({"id": id_, "text": text, "metadata": metadata}) + "\n"
+                    )
+
+            alive = self._alive.copy()
+            for id_ in replaced:
+                alive[self._row_of.pop(id_)] = False
+            start = len(self._ids)
+            for offset, (id_, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                self._row_of[id_] = start + offset
+                self._ids.append(id_)
+                self._texts.append(text)
+                self._metadatas.append(dict(metadata))
+            self._alive = np.concatenate([alive, np.ones(len(ids), dtype=bool)])
+            self._remap()
+            if replaced:
+                self._maybe_compact()
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_embeddings(texts, vectors, metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            present = [id_ for id_ in ids if id_ in self._row_of]
+            if not present:
+                return False
+            with open(self._records_path, "a", encoding="utf-8") as records_file:
+                for id_ in present:
+                    records_file.write(json.dumps({"delete": id_}) + "\n")
+            alive = self._alive.copy()
+            for id_ in present:
+                alive[self._row_of.pop(id_)] = False
+            self._alive = alive
+            self._maybe_compact()
+        return True
+
+    # --- Compaction ---
+
+    def _maybe_compact(self) -> None:
+        # Caller holds the lock
+        dead = len(self._ids) - len(self._row_of)
+        if dead >= _COMPACT_MIN_DEAD_ROWS and dead > len(self._row_of):
+            self._compact()
+
+    def compact(self) -> int:
+        """Rewrite the store with only its live rows; return how many rows were dropped."""
+        with self._lock:
+            return self._compact()
+
+    def _compact(self) -> int:
+        # Caller holds the lock
+        dead = len(self._ids) - len(self._row_of)
+        if dead == 0:
+            return 0
+        rows = np.flatnonzero(self._alive)
+        vectors_tmp = self._vectors_path.with_suffix(".bin.compact")
+        records_tmp = self._records_path.with_suffix(".jsonl.compact")
+        with open(vectors_tmp, "wb") as vectors_file:
+            if self._matrix is not None and len(rows):
+                vectors_file.write(np.ascontiguousarray(self._matrix[rows]).tobytes())
+            vectors_file.flush()
+            os.fsync(vectors_file.fileno())
+        with open(records_tmp, "w", encoding="utf-8") as records_file:
+            for row in rows:
+                records_file.write(json.dumps({
+                    "id": self._ids[row],
+                    "text": self._texts[row],
+                    "metadata": self._metadatas[row],
+                }) + "\n")
+            records_file.flush()
+            os.fsync(records_file.fileno())
+        # From here on a restart completes the swap instead of mixing files
+        self._compact_marker.touch()
+        self._finish_compaction()
+
+        self._ids = [self._ids[row] for row in rows]
+        self._texts = [self._texts[row] for row in rows]
+        self._metadatas = [self._metadatas[row] for row in rows]
+        self._row_of = {id_: row for row, id_ in enumerate(self._ids)}
+        self._alive = np.ones(len(rows), dtype=bool)
+        self._remap()
+        return dead
+
+    def _finish_compaction(self) -> None:
+        vectors_tmp = self._vectors_path.with_suffix(".bin.compact")
+        records_tmp = self._records_path.with_suffix(".jsonl.compact")
+        if not self._compact_marker.exists():
+            # Interrupted before the compacted files were complete
+            vectors_tmp.unlink(missing_ok=True)
+            records_tmp.unlink(missing_ok=True)
+            return
+        if vectors_tmp.exists():
+            os.replace(vectors_tmp, self._vectors_path)
+        if records_tmp.exists():
+            os.replace(records_tmp, self._records_path)
+        self._compact_marker.unlink()
+
+    # --- Reads ---
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        """Return the live documents with the given ids (unknown ids are skipped)."""
+        with self._lock:
+            rows = [self._row_of[id_] for id_ in ids if id_ in self._row_of]
+            return [
+                Document(
+                    id=self._ids[row],
+                    page_content=self._texts[row],
+                    metadata=dict(self._metadatas[row]),
+                )
+                for row in rows
+            ]
+
+    # --- Search ---
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Cosine top-k over all live rows."""
+        with self._lock:
+            matrix, alive = self._matrix, self._alive
+            ids, texts, metadatas = self._ids, self._texts, self._metadatas
+        if matrix is None or not alive.any():
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return []
+        scores = matrix[: len(alive)] @ (query / norm).astype(matrix.dtype)
+        scores = np.where(alive, scores.astype(np.float32), -np.inf)
+
+        k = min(k, int(alive.sum()))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (
+                Document(id=ids[row], page_content=texts[row], metadata=dict(metadatas[row])),
+                float(scores[row]),
+            )
+            for row in top
+        ]
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self._embedding.embed_query(query), k
+        )
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        # Only the embedding call does I/O; the search itself is in-memory
+        vector = await self._embedding.aembed_query(query)
+        return self.similarity_search_by_vector_with_score(vector, k)
+
+    async def asimilarity_search(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        path: str = "data/local_index",
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(path=path, embedding=embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
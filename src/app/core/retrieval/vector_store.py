@@ -1,30 +1,48 @@
 # src/app/core/retrieval/vector_store.py
 
-import os
-from pathlib import Path
-from typing import List, Any
-
-# Switched to PyMuPDFLoader for better reliability
-from langchain_community.document_loaders import PyMuPDFLoader 
-from langchain_pinecone import PineconeVectorStore
-from langchain_openai import OpenAIEmbeddings
+import asyncio
+import contextvars
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
 from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
 
-def get_vector_store() -> PineconeVectorStore:
-    """Get the Pinecone vector store instance."""
-    
-    # Use the cheaper embedding model
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+from ..config import get_settings
+from ..metrics import SEARCH_ERRORS, SEARCH_SECONDS, observe
+from .clients import get_clients
+from .embedding_cache import CachedQueryEmbeddings
+from .fusion import reciprocal_rank_fusion
+from .lexical_index import get_lexical_index
 
-    index_name = os.getenv("PINECONE_INDEX_NAME", "knowledge-index")
+# Bumped whenever new content is indexed so caches built on earlier
+# retrieval results (e.g. the answer cache) know they are stale.
+_index_version = 0
+_index_version_lock = threading.Lock()
 
-    # Connect to existing index
-    vector_store = PineconeVectorStore(
-        index_name=index_name,
-        embedding=embeddings
-    )
-    
-    return vector_store
+
+def get_index_version() -> int:
+    """Return the current in-process index version."""
+    return _index_version
+
+
+def bump_index_version() -> int:
+    """Mark the index as changed and return the new version."""
+    global _index_version
+    with _index_version_lock:
+        _index_version += 1
+        return _index_version
+
+
+def get_vector_store() -> VectorStore:
+    """Get the shared vector store instance (Pinecone or local).
+
+    The store and its embeddings client are built once per process by
+    `clients.get_clients()` and reused across requests.
+    """
+    return get_clients().vector_store
 
 def get_retriever(k: int = 5) -> Any:
     """Get a retriever interface from the vector store."""
@@ -34,6 +52,39 @@ def get_retriever(k: int = 5) -> Any:
         search_kwargs={"k": k}
     )
 
+async def aget_vector_store() -> VectorStore:
+    """Get the shared vector store with its async index connection open."""
+    return await get_clients().async_vector_store()
+
+# Runs searches side by side for the sync paths: the lexical half of hybrid
+# search, and every query variant of multi-query retrieval
+_search_executor: ThreadPoolExecutor | None = None
+_search_executor_lock = threading.Lock()
+
+
+def _get_search_executor() -> ThreadPoolExecutor:
+    global _search_executor
+    if _search_executor is None:
+        with _search_executor_lock:
+            if _search_executor is None:
+                _search_executor = ThreadPoolExecutor(
+                    max_workers=8, thread_name_prefix="search"
+                )
+    return _search_executor
+
+def lexical_search(query: str, k: int = 8) -> List[Document]:
+    """BM25 search over the chunks of the active vector index."""
+    with observe(SEARCH_SECONDS, SEARCH_ERRORS, "search:lexical", search="lexical"):
+        return get_lexical_index().search(get_clients().index_name, query, k=k)
+
+def _dense_search(vector_store: VectorStore, query: str, k: int) -> List[Document]:
+    with observe(SEARCH_SECONDS, SEARCH_ERRORS, "search:dense", search="dense"):
+        return vector_store.similarity_search(query, k=k)
+
+async def _adense_search(vector_store: VectorStore, query: str, k: int) -> List[Document]:
+    with observe(SEARCH_SECONDS, SEARCH_ERRORS, "search:dense", search="dense"):
+        return await vector_store.asimilarity_search(query, k=k)
+
 def retrieve(query: str, k: int = 8) -> List[Document]:
     """Retrieve relevant documents for a query string.
     
@@ -42,26 +93,188 @@ def retrieve(query: str, k: int = 8) -> List[Document]:
         k: The number of documents to return (default 4).
     """
     vector_store = get_vector_store()
-    retriever = vector_store.as_retriever(
-        search_type="similarity",
-        search_kwargs={"k": k}
+    settings = get_settings()
+    if settings.retrieval_search != "hybrid":
+        return _dense_search(vector_store, query, k)
+
+    candidates = max(k, settings.hybrid_candidate_k)
+    # Copy the context so per-request timings see the lexical search too
+    lexical = _get_search_executor().submit(
+        contextvars.copy_context().run, lexical_search, query, candidates
+    )
+    dense = _dense_search(vector_store, query, candidates)
+    return reciprocal_rank_fusion([dense, lexical.result()], k=k, rrf_k=settings.rrf_k)
+
+async def aretrieve(query: str, k: int = 8) -> List[Document]:
+    """Async variant of `retrieve` (async embedding and Pinecone query)."""
+    vector_store = await aget_vector_store()
+    settings = get_settings()
+    if settings.retrieval_search != "hybrid":
+        return await _adense_search(vector_store, query, k)
+
+    candidates = max(k, settings.hybrid_candidate_k)
+    dense, lexical = await asyncio.gather(
+        _adense_search(vector_store, query, candidates),
+        asyncio.to_thread(lexical_search, query, candidates),
+    )
+    return reciprocal_rank_fusion([dense, lexical], k=k, rrf_k=settings.rrf_k)
+
+def _embed_queries(queries: List[str]) -> List[List[float]]:
+    """Embed several queries with a single embeddings request."""
+    embeddings = get_clients().embeddings
+    if isinstance(embeddings, CachedQueryEmbeddings):
+        return embeddings.embed_queries(queries)
+    return embeddings.embed_documents(queries)
+
+async def _aembed_queries(queries: List[str]) -> List[List[float]]:
+    embeddings = get_clients().embeddings
+    if isinstance(embeddings, CachedQueryEmbeddings):
+        return await embeddings.aembed_queries(queries)
+    return await embeddings.aembed_documents(queries)
+
+def _dense_search_by_vector(
+    vector_store: VectorStore, vector: List[float], k: int
+) -> List[Document]:
+    with observe(SEARCH_SECONDS, SEARCH_ERRORS, "search:dense", search="dense"):
+        return vector_store.similarity_search_by_vector(vector, k=k)
+
+async def _adense_search_by_vector(
+    vector_store: VectorStore, vector: List[float], k: int
+) -> List[Document]:
+    with observe(SEARCH_SECONDS, SEARCH_ERRORS, "search:dense", search="dense"):
+        return await vector_store.asimilarity_search_by_vector(vector, k=k)
+
+def _unique_queries(queries: List[str]) -> List[str]:
+    return list(dict.fromkeys(query.strip() for query in queries if query.strip()))
+
+def retrieve_many(queries: List[str], k: int = 8) -> List[Document]:
+    """Search several phrasings of one question and fuse the results.
+
+    All queries are embedded in one request, then every dense search (and,
+    in hybrid mode, every lexical search) runs concurrently. The ranked
+    lists are merged with reciprocal rank fusion, so each chunk appears once
+    and chunks found by several variants rank highest.
+
+    Args:
+        queries: Query variants, e.g. the question and its rewrites.
+        k: The number of fused documents to return.
+    """
+    queries = _unique_queries(queries)
+    if len(queries) <= 1:
+        return retrieve(queries[0], k=k) if queries else []
+
+    vector_store = get_vector_store()
+    settings = get_settings()
+    candidates = max(k, settings.hybrid_candidate_k)
+    executor = _get_search_executor()
+    # Lexical searches need no embedding, so they start first
+    lexical = [
+        executor.submit(contextvars.copy_context().run, lexical_search, query, candidates)
+        for query in queries
+    ] if settings.retrieval_search == "hybrid" else []
+    dense = [
+        executor.submit(
+            contextvars.copy_context().run,
+            _dense_search_by_vector, vector_store, vector, candidates,
+        )
+        for vector in _embed_queries(queries)
+    ]
+    return reciprocal_rank_fusion(
+        [future.result() for future in dense + lexical], k=k, rrf_k=settings.rrf_k
+    )
+
+async def aretrieve_many(queries: List[str], k: int = 8) -> List[Document]:
+    """Async variant of `retrieve_many`."""
+    queries = _unique_queries(queries)
+    if len(queries) <= 1:
+        return await aretrieve(queries[0], k=k) if queries else []
+
+    vector_store = await aget_vector_store()
+    settings = get_settings()
+    candidates = max(k, settings.hybrid_candidate_k)
+    hybrid = settings.retrieval_search == "hybrid"
+
+    async def dense_searches() -> List[List[Document]]:
+        vectors = await _aembed_queries(queries)
+        return await asyncio.gather(
+            *(_adense_search_by_vector(vector_store, vector, candidates) for vector in vectors)
+        )
+
+    dense, lexical = await asyncio.gather(
+        dense_searches(),
+        asyncio.gather(*(
+            asyncio.to_thread(lexical_search, query, candidates)
+            for query in (queries if hybrid else [])
+        )),
     )
-    return retriever.invoke(query)
+    return reciprocal_rank_fusion([*dense, *lexical], k=k, rrf_k=settings.rrf_k)
 
 def index_documents(documents: List[Document]) -> int:
     """Index a list of documents into Pinecone."""
     vector_store = get_vector_store()
     ids = vector_store.add_documents(documents)
+    if ids:
+        bump_index_version()
     return len(ids)
 
-def index_pdf_file(file_path: Path) -> int:
-    """Load a PDF and index its pages."""
-    
-    # 1. Use PyMuPDFLoader (As a solution against 'bbox' errors)
-    loader = PyMuPDFLoader(str(file_path))
-    
-    # 2. Load pages
-    docs = loader.load()
-    
-    # 3. Index them
-    return index_documents(docs)
\ No newline at end of file
+def upsert_embeddings(
+    texts: List[str],
+    vectors: List[List[float]],
+    metadatas: List[Dict[str, Any]],
+    ids: Optional[List[str]] = None,
+) -> int:
+    """Write already-embedded chunks to the vector store.
+
+    Lets the indexing pipeline embed and upsert as separate, separately
+    tracked steps instead of going through `add_documents`.
+    """
+    if not texts:
+        return 0
+    ids = ids or [str(uuid.uuid4()) for _ in texts]
+    clients = get_clients()
+    if clients.is_local:
+        clients.vector_store.add_embeddings(texts, vectors, metadatas, ids)
+        bump_index_version()
+        return len(ids)
+    records = [
+        # PineconeVectorStore reads the chunk text back from the "text" key
+        {"id": id_, "values": vector, "metadata": {**metadata, "text": text}}
+        for id_, text, vector, metadata in zip(ids, texts, vectors, metadatas)
+    ]
+    clients.index.upsert(vectors=records)
+    bump_index_version()
+    return len(records)
+
+def fetch_chunks(ids: List[str], batch_size: int = 100) -> List[Document]:
+    """Read stored chunks (text and metadata) back from the vector store by id.
+
+    Ids that are not in the store are skipped.
+    """
+    if not ids:
+        return []
+    clients = get_clients()
+    if clients.is_local:
+        return clients.vector_store.get_by_ids(ids)
+    docs: List[Document] = []
+    for offset in range(0, len(ids), batch_size):
+        response = clients.index.fetch(ids=ids[offset:offset + batch_size])
+        for id_, vector in response.vectors.items():
+            metadata = dict(vector.metadata or {})
+            text = metadata.pop("text", "")
+            docs.append(Document(id=id_, page_content=text, metadata=metadata))
+    return docs
+
+def delete_vectors(ids: List[str], batch_size: int = 1000) -> int:
+    """Delete chunks from the vector store by id."""
+    if not ids:
+        return 0
+    clients = get_clients()
+    if clients.is_local:
+        clients.vector_store.delete(ids)
+        bump_index_version()
+        return len(ids)
+    index = clients.index
+    for offset in range(0, len(ids), batch_size):
+        index.delete(ids=ids[offset:offset + batch_size])
+    bump_index_version()
+    return len(ids)
@@ -0,0 +1,202 @@
+"""Two-tier key/value store behind the query embedding and LLM response caches.
+
+Entries live in a bounded in-memory LRU, optionally backed by a table in a
+local SQLite file that survives restarts. Both tiers honour the same TTL.
+The persistent tier is bounded too: expired rows and the oldest rows beyond
+`max_persistent_entries` are deleted when the file is opened and then once
+every `_PRUNE_EVERY_WRITES` writes, so the file cannot grow without limit.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar, Union
+
+V = TypeVar("V")
+Stored = Union[bytes, str]
+
+# The persistent tier is pruned (expired rows, then oldest beyond the cap)
+# once per this many writes rather than on every write
+_PRUNE_EVERY_WRITES = 256
+
+
+class TieredCache(Generic[V]):
+    """Memory LRU + optional SQLite table with TTL expiry and a row cap.
+
+    Args:
+        table: Name of the SQLite table of the persistent tier.
+        value_column: Name of its value column (kept per cache so files
+            written before this class existed stay readable).
+        encode: Turns a value into what the persistent tier stores.
+        decode: Inverse of `encode`.
+        max_entries: Maximum number of values kept in memory.
+        ttl_seconds: Entry lifetime; `None` or `0` disables expiry.
+        path: Optional SQLite file for the persistent tier.
+        max_persistent_entries: Maximum number of rows kept in the SQLite
+            tier; the oldest are deleted beyond this. `None` or `0` = unbounded.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        value_column: str,
+        encode: Callable[[V], Stored],
+        decode: Callable[[Stored], V],
+        max_entries: int,
+        ttl_seconds: Optional[float] = None,
+        path: Optional[str] = None,
+        max_persistent_entries: Optional[int] = None,
+    ) -> None:
+        self.table = table
+        self.value_column = value_column
+        self._encode = encode
+        self._decode = decode
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds or None
+        self.max_persistent_entries = max_persistent_entries or None
+        self._memory: "OrderedDict[str, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes_since_prune = 0
+
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                f"key TEXT PRIMARY KEY, {value_column} BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_created_at ON {table} (created_at)"
+            )
+            self._db.commit()
+            self.prune()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[V]:
+        """Look up a value, promoting persistent hits into memory."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT {self.value_column}, created_at FROM {self.table} WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is not None:
+                    stored, created_at = row
+                    if not self._expired(created_at, now):
+                        value = self._decode(stored)
+                        self._remember(key, created_at, value)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: V) -> None:
+        """Store a value in both tiers."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} "
+                    f"(key, {self.value_column}, created_at) VALUES (?, ?, ?)",
+                    (key, self._encode(value), now),
+                )
+                self._db.commit()
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= _PRUNE_EVERY_WRITES:
+                    self._prune_persistent(now)
+
+    def prune(self) -> int:
+        """Delete expired and over-cap rows from the persistent tier; return how many."""
+        with self._lock:
+            if self._db is None:
+                return 0
+            return self._prune_persistent(time.time())
+
+    def _prune_persistent(self, now: float) -> int:
+        # Caller holds the lock and has checked that the database is open
+        assert self._db is not None
+        self._writes_since_prune = 0
+        deleted = 0
+        if self.ttl_seconds is not None:
+            deleted += self._db.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            ).rowcount
+        if self.max_persistent_entries is not None:
+            deleted += self._db.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY created_at DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_persistent_entries,),
+            ).rowcount
+        self._db.commit()
+        return deleted
+
+    def persistent_size(self) -> int:
+        """Number of rows in the persistent tier (0 without one)."""
+        with self._lock:
+            if self._db is None:
+                return 0
+            return self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def _remember(self, key: str, created_at: float, value: V) -> None:
+        # Caller holds the lock
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current in-memory size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._memory),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        """Close the persistent tier, if any."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,52 @@
+"""Token counting for prompt budgeting.
+
+Uses the model's real tokenizer (tiktoken) when it can be loaded. tiktoken
+downloads its BPE files on first use, so offline deployments fall back to a
+characters-per-token estimate instead of failing.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Average for English text with OpenAI tokenizers
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model_name: str) -> Optional[Any]:
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        logger.warning("tiktoken unavailable, estimating token counts", exc_info=True)
+        return None
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """Count the tokens `text` uses for `model_name` (default: chat model)."""
+    encoding = _get_encoding(model_name or get_settings().openai_model_name)
+    if encoding is None:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: Optional[str] = None) -> str:
+    """Cut `text` down to at most `max_tokens` tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding(model_name or get_settings().openai_model_name)
+    if encoding is None:
+        return text[: max_tokens * _CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
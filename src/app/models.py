@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 
 class QuestionRequest(BaseModel):
@@ -9,6 +9,26 @@ class QAResponse(BaseModel):
     """Legacy response body."""
     answer: str
     context: str
+    verification_decision: Optional[str] = None  # full | light | skipped
+    grounding_score: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None  # seconds by component
+
+class BatchQARequest(BaseModel):
+    """Request body for answering many independent questions at once."""
+    questions: List[str]
+    # Lower the limit for this request; capped at (and default) QA_BATCH_CONCURRENCY
+    max_concurrency: Optional[int] = Field(None, ge=1)
+
+class BatchQAResult(BaseModel):
+    """One line of the /qa/batch NDJSON stream."""
+    index: int  # position of the question in the request
+    question: str
+    answer: Optional[str] = None
+    context: Optional[str] = None
+    verification_decision: Optional[str] = None
+    grounding_score: Optional[float] = None
+    cache_hit: bool = False
+    error: Optional[str] = None
 
 # --- Feature 5: Conversational Models ---
 
@@ -31,8 +51,32 @@ class ConversationalQAResponse(BaseModel):
     session_id: str
     context: str
     conversation_summary: Optional[str] = None
+    # How the draft was verified (full | light | skipped) and why
+    verification_decision: Optional[str] = None
+    grounding_score: Optional[float] = None
+    # Seconds spent per node / model / search (RESPONSE_TIMINGS_ENABLED)
+    timings: Optional[Dict[str, float]] = None
 
 class ConversationHistory(BaseModel):
     """Model for retrieving full history."""
     session_id: str
-    history: List[Dict[str, Any]]
\ No newline at end of file
+    history: List[Dict[str, Any]]
+
+# --- Background Indexing ---
+
+class IndexingJobStatus(BaseModel):
+    """Status and progress of a background PDF indexing job."""
+    job_id: str
+    filename: str
+    status: str  # queued | running | completed | failed | cancelled
+    total_pages: int = 0
+    pages_parsed: int = 0
+    chunks_embedded: int = 0
+    chunks_upserted: int = 0
+    chunks_skipped: int = 0  # already indexed (unchanged content)
+    chunks_deleted: int = 0  # stale chunks of a replaced version
+    file_unchanged: bool = False  # same content hash as last run; nothing to do
+    errors: List[str] = []
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
@@ -0,0 +1,157 @@
+"""Local manifest of indexed files and chunks.
+
+Chunk ids are deterministic (see `chunk_id`), so the manifest only needs to
+remember, per source document, the hash of the file last indexed and the ids
+of the chunks it produced. With that the indexing pipeline can:
+
+- skip a file whose content hash is unchanged,
+- embed and upsert only chunks whose id is new,
+- delete chunks that disappeared from a replaced version of the file.
+
+The manifest is scoped by vector index name, since the same file may be
+indexed into several indexes.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+
+from ..core.config import get_settings
+
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_sha256(file_path: Path) -> str:
+    """Hash a file in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as handle:
+        while block := handle.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_sha256(text: str) -> str:
+    """Hash a chunk's text content."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(source: str, chunk_hash: str) -> str:
+    """Deterministic vector id for a chunk of a source document.
+
+    Derived from the document's identity and the chunk's content hash, so
+    an unchanged chunk keeps its id when other parts of the file change.
+    """
+    return hashlib.sha256(f"{source}\x00{chunk_hash}".encode("utf-8")).hexdigest()[:40]
+
+
+class IndexManifest:
+    """SQLite-backed record of what has been indexed.
+
+    Args:
+        path: Database file; created (with parent directories) if missing.
+    """
+
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "index_name TEXT NOT NULL, "
+                "source TEXT NOT NULL, "
+                "file_hash TEXT NOT NULL, "
+                "chunk_count INTEGER NOT NULL, "
+                "indexed_at REAL NOT NULL, "
+                "PRIMARY KEY (index_name, source))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "index_name TEXT NOT NULL, "
+                "source TEXT NOT NULL, "
+                "chunk_id TEXT NOT NULL, "
+                "PRIMARY KEY (index_name, source, chunk_id))"
+            )
+
+    def file_hash(self, index_name: str, source: str) -> Optional[str]:
+        """Hash of the file last fully indexed for `source`, if any."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT file_hash FROM files WHERE index_name = ? AND source = ?",
+                (index_name, source),
+            ).fetchone()
+        return row[0] if row else None
+
+    def sources(self, index_name: str) -> List[str]:
+        """Source documents with a completed indexing run in `index_name`."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT source FROM files WHERE index_name = ? ORDER BY source",
+                (index_name,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def chunk_ids(self, index_name: str, source: str) -> Set[str]:
+        """Ids of the chunks currently indexed for `source`."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT chunk_id FROM chunks WHERE index_name = ? AND source = ?",
+                (index_name, source),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def replace(
+        self,
+        index_name: str,
+        source: str,
+        file_hash: str,
+        chunk_ids: Iterable[str],
+    ) -> None:
+        """Record a completed indexing run for `source` atomically."""
+        ids = list(chunk_ids)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "DELETE FROM chunks WHERE index_name = ? AND source = ?",
+                    (index_name, source),
+                )
+                self._db.executemany(
+                    "INSERT INTO chunks (index_name, source, chunk_id) VALUES (?, ?, ?)",
+                    [(index_name, source, id_) for id_ in ids],
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO files "
+                    "(index_name, source, file_hash, chunk_count, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (index_name, source, file_hash, len(ids), time.time()),
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_manifest: IndexManifest | None = None
+_manifest_lock = threading.Lock()
+
+
+def get_index_manifest() -> IndexManifest:
+    """Get the process-wide index manifest."""
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = IndexManifest(get_settings().index_manifest_path)
+    return _manifest
+
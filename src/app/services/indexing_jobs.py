@@ -0,0 +1,223 @@
+"""Background indexing jobs.
+
+`/index-pdf` used to parse, embed and upsert a PDF inside the request
+handler. Jobs now run on a small worker pool instead:
+
+- PDF text extraction runs in a process pool (CPU-bound, PyMuPDF),
+- chunking and embedding run on the job's thread, upserts on a shared
+  thread pool (network-bound), see `indexing_service.run_indexing_pipeline`,
+- the API only submits a job and returns its id; clients poll the job's
+  status and may cancel it.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..core.config import get_settings
+from .index_manifest import file_sha256
+from .indexing_service import IndexingCancelled, IndexingProgress, run_indexing_pipeline
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+logger = logging.getLogger(__name__)
+
+
+def upload_source(file_hash: str) -> str:
+    """Manifest and chunk-id identity of an uploaded PDF: its content hash.
+
+    Upload filenames are display names picked by clients, and two different
+    files may share one, so they cannot identify a document: uploading a
+    second `report.pdf` must not replace the first. Uploading the same
+    content again is recognized as unchanged.
+    """
+    return f"upload:{file_hash}"
+
+
+@dataclass
+class IndexingJob:
+    """Progress and outcome of one PDF indexing job."""
+
+    job_id: str
+    filename: str
+    file_path: Path
+    file_hash: Optional[str] = None
+    status: str = QUEUED
+    progress: IndexingProgress = field(default_factory=IndexingProgress)
+    errors: List[str] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    future: Optional[Future] = field(default=None, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public, JSON-friendly view of the job."""
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "filename": self.filename,
+                "status": self.status,
+                **self.progress.snapshot(),
+                "errors": list(self.errors),
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class IndexingJobManager:
+    """Runs indexing jobs on worker pools and keeps their status.
+
+    Args:
+        max_workers: Jobs processed concurrently.
+        parse_processes: Size of the PDF parsing process pool.
+        upsert_threads: Size of the thread pool for vector store upserts.
+        max_finished_jobs: Finished jobs kept for status queries.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        parse_processes: int = 2,
+        upsert_threads: int = 4,
+        max_finished_jobs: int = 100,
+    ) -> None:
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs: "OrderedDict[str, IndexingJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._workers = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="indexing-job"
+        )
+        # "spawn" avoids forking a process that already runs threads
+        self._parsers = ProcessPoolExecutor(
+            max_workers=parse_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._upserters = ThreadPoolExecutor(
+            max_workers=upsert_threads, thread_name_prefix="indexing-upsert"
+        )
+
+    def submit(
+        self, file_path: Path, filename: str, file_hash: Optional[str] = None
+    ) -> IndexingJob:
+        """Queue a PDF for indexing and return its job.
+
+        `file_hash` is the file's SHA-256 when the caller already computed it.
+        """
+        job = IndexingJob(
+            job_id=str(uuid.uuid4()), filename=filename, file_path=file_path, file_hash=file_hash
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        job.future = self._workers.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[IndexingJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[IndexingJob]:
+        """Request cancellation; queued jobs never start, running ones stop
+        before their next batch."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.progress.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+        return job
+
+    def shutdown(self) -> None:
+        """Cancel outstanding jobs and stop all pools."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if job.status not in FINISHED_STATES:
+                self.cancel(job.job_id)
+        self._workers.shutdown(wait=True, cancel_futures=True)
+        self._upserters.shutdown(wait=True)
+        self._parsers.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self, job: IndexingJob) -> None:
+        with job._lock:
+            job.status = RUNNING
+            job.started_at = time.time()
+        try:
+            job.progress.check_cancelled()
+            file_hash = job.file_hash or file_sha256(job.file_path)
+            run_indexing_pipeline(
+                job.file_path,
+                progress=job.progress,
+                parse_executor=self._parsers,
+                upsert_executor=self._upserters,
+                source_name=upload_source(file_hash),
+                file_hash=file_hash,
+                document_name=job.filename,
+            )
+            self._finish(job, COMPLETED)
+        except IndexingCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as exc:
+            logger.exception("Indexing job %s failed", job.job_id)
+            with job._lock:
+                job.errors.append(f"{type(exc).__name__}: {exc}")
+            self._finish(job, FAILED)
+
+    def _finish(self, job: IndexingJob, status: str) -> None:
+        with job._lock:
+            job.status = status
+            job.finished_at = time.time()
+
+    def _prune(self) -> None:
+        # Caller holds the lock; drop the oldest finished jobs beyond the limit
+        finished = [
+            job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES
+        ]
+        for job_id in finished[: max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+
+_manager: IndexingJobManager | None = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> IndexingJobManager:
+    """Get the process-wide indexing job manager (built from settings)."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                settings = get_settings()
+                _manager = IndexingJobManager(
+                    max_workers=settings.indexing_workers,
+                    parse_processes=settings.indexing_parse_processes,
+                    upsert_threads=settings.indexing_upsert_threads,
+                    max_finished_jobs=settings.indexing_max_finished_jobs,
+                )
+    return _manager
+
+
+def shutdown_job_manager() -> None:
+    """Stop the process-wide job manager, if it was started."""
+    global _manager
+    with _manager_lock:
+        manager, _manager = _manager, None
+    if manager is not None:
+        manager.shutdown()
@@ -1,16 +1,420 @@
+"""PDF ingestion pipeline.
+
+Indexing is a chain of generators, so only a bounded window of the document
+is ever held in memory, whatever the size of the PDF:
+
+    pages (PyMuPDF, optionally in a process pool, a few pages per task)
+      -> chunks (configurable text splitter, page metadata preserved)
+      -> fixed-size embedding batches
+      -> concurrent, bounded upserts with retry (+ BM25 lexical index rows)
+
+Chunks get deterministic ids from the document name and their content hash,
+and `index_manifest` remembers what was indexed, so re-indexing a file only
+embeds new chunks, deletes vanished ones and skips unchanged files entirely.
+A run that fails or is cancelled deletes the chunks it had already written,
+since the manifest never learns about them.
+
+BM25 rows are written with new chunks. Chunks indexed before the lexical
+index was enabled get theirs when the file is indexed again (changed or
+not), or for every file in the manifest with `backfill_lexical_index`.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+import urllib3
+
+from ..core.config import get_settings
+from ..core.retrieval.clients import get_clients
+from ..core.retrieval.lexical_index import LexicalIndex, get_lexical_index
+from ..core.retrieval.vector_store import delete_vectors, fetch_chunks, upsert_embeddings
+from .index_manifest import chunk_id, chunk_sha256, file_sha256, get_index_manifest
+from .pdf_loader import PageRecord, count_pdf_pages, load_pdf_pages
+
+logger = logging.getLogger(__name__)
+
+# (chunk_text, metadata)
+ChunkRecord = Tuple[str, Dict[str, Any]]
+
+# Worth another upsert attempt: timeouts and dropped connections, raised by
+# urllib3 (under the Pinecone client) or the OS
+RETRYABLE_UPSERT_ERRORS = (
+    TimeoutError,
+    ConnectionError,
+    urllib3.exceptions.TimeoutError,
+    urllib3.exceptions.ProtocolError,
+    urllib3.exceptions.NewConnectionError,
+    urllib3.exceptions.MaxRetryError,
+)
+# Likewise for HTTP errors with these statuses (plus any 5xx)
+_RETRYABLE_STATUSES = frozenset({408, 429})
+
+
+class IndexingCancelled(Exception):
+    """Raised inside an indexing run when its job was cancelled."""
+
+
+@dataclass
+class IndexingProgress:
+    """Thread-safe progress counters updated while a PDF is indexed."""
+
+    total_pages: int = 0
+    pages_parsed: int = 0
+    chunks_embedded: int = 0
+    chunks_upserted: int = 0
+    chunks_skipped: int = 0
+    chunks_deleted: int = 0
+    file_unchanged: bool = False
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, counter: str, count: int) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + count)
+
+    def check_cancelled(self) -> None:
+        if self.cancel_event.is_set():
+            raise IndexingCancelled()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "total_pages": self.total_pages,
+                "pages_parsed": self.pages_parsed,
+                "chunks_embedded": self.chunks_embedded,
+                "chunks_upserted": self.chunks_upserted,
+                "chunks_skipped": self.chunks_skipped,
+                "chunks_deleted": self.chunks_deleted,
+                "file_unchanged": self.file_unchanged,
+            }
+
+
+def iter_pdf_pages(
+    file_path: Path,
+    progress: IndexingProgress,
+    parse_executor: Optional[Executor] = None,
+) -> Iterator[PageRecord]:
+    """Yield (text, metadata) per page, parsing a few pages per task.
+
+    With a `parse_executor` (e.g. a process pool) up to
+    `indexing_parse_lookahead` page ranges are parsed ahead of the consumer;
+    without one, ranges are parsed inline.
+    """
+    settings = get_settings()
+    path = str(file_path)
+    step = settings.indexing_pages_per_task
+
+    total_pages = count_pdf_pages(path)
+    progress.add("total_pages", total_pages)
+    ranges = iter(range(0, total_pages, step))
+
+    if parse_executor is None:
+        for start in ranges:
+            progress.check_cancelled()
+            pages = load_pdf_pages(path, start, start + step)
+            progress.add("pages_parsed", len(pages))
+            yield from pages
+        return
+
+    pending: Deque[Future] = deque()
+    for start in islice(ranges, settings.indexing_parse_lookahead):
+        pending.append(parse_executor.submit(load_pdf_pages, path, start, start + step))
+    try:
+        while pending:
+            progress.check_cancelled()
+            pages = pending.popleft().result()
+            next_start = next(ranges, None)
+            if next_start is not None:
+                pending.append(
+                    parse_executor.submit(load_pdf_pages, path, next_start, next_start + step)
+                )
+            progress.add("pages_parsed", len(pages))
+            yield from pages
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def iter_chunks(pages: Iterable[PageRecord]) -> Iterator[ChunkRecord]:
+    """Split each page into chunks, keeping the page's metadata."""
+    settings = get_settings()
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+    )
+    for text, metadata in pages:
+        for chunk_index, chunk in enumerate(splitter.split_text(text)):
+            if chunk.strip():
+                yield chunk, {**metadata, "chunk": chunk_index}
+
+
+def batched(records: Iterable[ChunkRecord], size: int) -> Iterator[List[ChunkRecord]]:
+    """Group records into lists of at most `size` items."""
+    iterator = iter(records)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _is_transient(error: Exception) -> bool:
+    """Timeouts, dropped connections, throttling and server errors.
+
+    Bad input (wrong dimension, oversized metadata) and auth failures fail
+    the same way on every attempt, so they are raised at once.
+    """
+    if isinstance(error, RETRYABLE_UPSERT_ERRORS):
+        return True
+    # Pinecone's API exceptions carry the HTTP status
+    status = getattr(error, "status", None)
+    return isinstance(status, int) and (status in _RETRYABLE_STATUSES or status >= 500)
+
+
+def _upsert_with_retry(
+    ids: List[str],
+    texts: List[str],
+    vectors: List[List[float]],
+    metadatas: List[Dict[str, Any]],
+) -> int:
+    """Upsert one batch, retrying transient failures with jittered backoff."""
+    settings = get_settings()
+    for attempt in range(settings.upsert_max_retries + 1):
+        try:
+            return upsert_embeddings(texts, vectors, metadatas, ids=ids)
+        except Exception as error:
+            if attempt == settings.upsert_max_retries or not _is_transient(error):
+                raise
+            delay = settings.upsert_retry_backoff_seconds * (2 ** attempt)
+            time.sleep(delay * random.uniform(0.5, 1.5))
+    return 0
+
+
+def _add_missing_lexical_rows(
+    lexical_index: LexicalIndex, index_name: str, chunks: List[Tuple[str, str, Dict[str, Any]]]
+) -> int:
+    """Add BM25 rows for the given (id, text, metadata) chunks that lack one."""
+    missing = set(lexical_index.missing_ids(index_name, [id_ for id_, _, _ in chunks]))
+    rows = [chunk for chunk in chunks if chunk[0] in missing]
+    if not rows:
+        return 0
+    return lexical_index.add(
+        index_name,
+        [id_ for id_, _, _ in rows],
+        [text for _, text, _ in rows],
+        [metadata for _, _, metadata in rows],
+    )
+
+
+def _backfill_lexical_from_store(
+    lexical_index: LexicalIndex, index_name: str, ids: List[str], batch_size: int = 500
+) -> int:
+    """Add BM25 rows for indexed chunks that lack one, reading texts from the vector store."""
+    added = 0
+    for offset in range(0, len(ids), batch_size):
+        missing = lexical_index.missing_ids(index_name, ids[offset:offset + batch_size])
+        docs = fetch_chunks(missing)
+        if docs:
+            added += lexical_index.add(
+                index_name,
+                [doc.id for doc in docs],
+                [doc.page_content for doc in docs],
+                [doc.metadata for doc in docs],
+            )
+    return added
+
+
+def backfill_lexical_index() -> int:
+    """Give every chunk listed in the manifest a BM25 row, if it has none.
+
+    For deployments that indexed documents before the lexical index was
+    enabled. Texts are read back from the vector store, so nothing is
+    parsed or embedded again; documents indexed before the manifest existed
+    are not known to it and have to be uploaded again.
+
+    Returns:
+        Number of rows added.
+    """
+    if not get_settings().lexical_index_enabled:
+        return 0
+    index_name = get_clients().index_name
+    manifest = get_index_manifest()
+    lexical_index = get_lexical_index()
+    added = 0
+    for source in manifest.sources(index_name):
+        ids = sorted(manifest.chunk_ids(index_name, source))
+        added += _backfill_lexical_from_store(lexical_index, index_name, ids)
+    return added
+
+
+def _discard_partial_run(
+    index_name: str, ids: List[str], lexical_index: Optional[Any]
+) -> None:
+    """Delete what an unfinished run wrote, so it is not left orphaned.
+
+    Only ids new to the manifest are passed in; chunks of the previous
+    version stay, as the manifest still lists them. Failures are logged
+    rather than raised so they do not hide the error that ended the run.
+    """
+    if not ids:
+        return
+    try:
+        delete_vectors(ids)
+        if lexical_index is not None:
+            lexical_index.delete(index_name, ids)
+    except Exception:
+        logger.exception(
+            "Could not delete %d chunks written by an unfinished indexing run", len(ids)
+        )
+
+
+def run_indexing_pipeline(
+    file_path: Path,
+    progress: Optional[IndexingProgress] = None,
+    parse_executor: Optional[Executor] = None,
+    upsert_executor: Optional[Executor] = None,
+    source_name: Optional[str] = None,
+    file_hash: Optional[str] = None,
+    document_name: Optional[str] = None,
+) -> int:
+    """Stream a PDF through parse -> split -> embed -> upsert.
+
+    Embedding runs on the calling thread in batches of
+    `embedding_batch_size`; each batch is then upserted on `upsert_executor`
+    while the next one is embedded, with at most `upsert_concurrency`
+    upserts in flight.
+
+    Re-indexing is incremental: an unchanged file is skipped (apart from
+    adding BM25 rows its chunks may lack), chunks already in the index (same
+    id) are not embedded again, and chunks of the previous
+    version that no longer exist are deleted once the run completes. If the
+    run fails or is cancelled, the chunks it wrote are deleted again and the
+    manifest is left as it was.
+
+    Args:
+        file_path: PDF to index.
+        progress: Counters to update (and cancellation flag to honour).
+        parse_executor: Optional pool for page extraction (process pool).
+        upsert_executor: Thread pool for upserts; a private one is used if omitted.
+        source_name: Document identity for chunk ids and the manifest
+            (default: file name). Runs for the same identity replace each
+            other's chunks.
+        file_hash: Precomputed SHA-256 of the file, if already known.
+        document_name: Name stored as the chunks' `document` metadata
+            (default: the source identity).
+
+    Returns:
+        Number of chunks upserted.
+    """
+    settings = get_settings()
+    progress = progress or IndexingProgress()
+    clients = get_clients()
+    embeddings = clients.embeddings
+
+    manifest = get_index_manifest()
+    index_name = clients.index_name
+    source = source_name or file_path.name
+    document = document_name or source
+    file_hash = file_hash or file_sha256(file_path)
+
+    lexical_index = get_lexical_index() if settings.lexical_index_enabled else None
+    known_ids = manifest.chunk_ids(index_name, source)
+
+    if manifest.file_hash(index_name, source) == file_hash:
+        progress.file_unchanged = True
+        if lexical_index is not None:
+            _backfill_lexical_from_store(lexical_index, index_name, sorted(known_ids))
+        return 0
+
+    seen_ids: Dict[str, None] = {}
+    # Already indexed chunks, checked for a BM25 row a batch at a time
+    known_chunks: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    own_executor = upsert_executor is None
+    if own_executor:
+        upsert_executor = ThreadPoolExecutor(max_workers=settings.upsert_concurrency)
+
+    in_flight: Deque[Future] = deque()
+    upserted = 0
+    # New chunks handed to the vector store or lexical index by this run
+    written_ids: List[str] = []
+
+    def drain(limit: int) -> None:
+        nonlocal upserted
+        while len(in_flight) > limit:
+            count = in_flight.popleft().result()
+            upserted += count
+            progress.add("chunks_upserted", count)
+
+    def new_chunks(
+        chunks: Iterable[ChunkRecord],
+    ) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        # Assign ids, drop repeats within this file and chunks already indexed
+        for text, metadata in chunks:
+            id_ = chunk_id(source, chunk_sha256(text))
+            if id_ in seen_ids:
+                continue
+            seen_ids[id_] = None
+            if id_ in known_ids:
+                progress.add("chunks_skipped", 1)
+                if lexical_index is not None:
+                    known_chunks.append((id_, text, {**metadata, "document": document}))
+                    if len(known_chunks) >= settings.embedding_batch_size:
+                        _add_missing_lexical_rows(lexical_index, index_name, known_chunks)
+                        known_chunks.clear()
+                continue
+            yield id_, text, {**metadata, "document": document}
+
+    try:
+        pages = iter_pdf_pages(file_path, progress, parse_executor)
+        for batch in batched(new_chunks(iter_chunks(pages)), settings.embedding_batch_size):
+            progress.check_cancelled()
+            ids = [id_ for id_, _, _ in batch]
+            texts = [text for _, text, _ in batch]
+            metadatas = [metadata for _, _, metadata in batch]
+            vectors = embeddings.embed_documents(texts)
+            progress.add("chunks_embedded", len(texts))
+            written_ids.extend(ids)
+            if lexical_index is not None:
+                # Local and cheap: done inline while the previous upserts run
+                lexical_index.add(index_name, ids, texts, metadatas)
+
+            # Backpressure: wait for the oldest upsert before queueing more
+            drain(settings.upsert_concurrency - 1)
+            in_flight.append(
+                upsert_executor.submit(_upsert_with_retry, ids, texts, vectors, metadatas)
+            )
+        drain(0)
+        if lexical_index is not None and known_chunks:
+            _add_missing_lexical_rows(lexical_index, index_name, known_chunks)
+    except BaseException:
+        # Never leave writes running behind the caller's back, and wait for
+        # those already started so the cleanup cannot race them
+        for future in in_flight:
+            future.cancel()
+        wait(in_flight)
+        _discard_partial_run(index_name, written_ids, lexical_index)
+        raise
+    finally:
+        if own_executor:
+            upsert_executor.shutdown(wait=True)
+
+    # Only a completed run may retire the previous version's chunks
+    stale_ids = sorted(known_ids.difference(seen_ids))
+    progress.add("chunks_deleted", delete_vectors(stale_ids))
+    if lexical_index is not None and stale_ids:
+        lexical_index.delete(index_name, stale_ids)
+    manifest.replace(index_name, source, file_hash, seen_ids)
+
+    return upserted
 
-from langchain_community.document_loaders import PyMuPDFLoader 
-from ..core.retrieval.vector_store import index_documents
 
 def index_pdf_file(file_path: Path) -> int:
-    """Load a PDF and index its pages using PyMuPDF."""
-    
-    # 1. Load the PDF using PyMuPDF (fitz)
-    loader = PyMuPDFLoader(str(file_path))
-    
-    # 2. Split into pages
-    docs = loader.load()
-    
-    # 3. Index them using our core vector store logic
-    return index_documents(docs)
\ No newline at end of file
+    """Load a PDF and index its chunks using PyMuPDF."""
+    return run_indexing_pipeline(file_path)
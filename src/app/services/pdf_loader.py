@@ -0,0 +1,60 @@
+"""Lightweight PDF page extraction with PyMuPDF.
+
+This module is cheap to load in worker processes: indexing parses PDFs in a
+process pool to keep the CPU-bound text extraction off the API's event loop
+and threads. PyMuPDF itself is imported inside the functions, so importing
+the API (which imports the indexing service) does not require it.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# (page_text, metadata) pairs; plain tuples pickle cheaply across processes
+PageRecord = Tuple[str, Dict[str, Any]]
+
+
+def count_pdf_pages(file_path: str) -> int:
+    """Return the number of pages in a PDF."""
+    import pymupdf
+
+    with pymupdf.open(file_path) as pdf:
+        return pdf.page_count
+
+
+def load_pdf_pages(
+    file_path: str, start: int = 0, stop: Optional[int] = None
+) -> List[PageRecord]:
+    """Extract the text of pages `[start, stop)` from a PDF.
+
+    Metadata mirrors what `PyMuPDFLoader` produced (0-based `page`,
+    `total_pages`, `source`, document info fields).
+
+    Args:
+        file_path: Path of the PDF on disk.
+        start: First page index to extract.
+        stop: Page index to stop before (default: end of document).
+
+    Returns:
+        List of (text, metadata) tuples, one per page.
+    """
+    import pymupdf
+
+    records: List[PageRecord] = []
+    with pymupdf.open(file_path) as pdf:
+        total_pages = pdf.page_count
+        info = {
+            key: value
+            for key, value in (pdf.metadata or {}).items()
+            if isinstance(value, str) and value
+        }
+        stop = total_pages if stop is None else min(stop, total_pages)
+        for page_index in range(start, stop):
+            text = pdf[page_index].get_text()
+            metadata = {
+                **info,
+                "source": file_path,
+                "file_path": file_path,
+                "page": page_index,
+                "total_pages": total_pages,
+            }
+            records.append((text, metadata))
+    return records
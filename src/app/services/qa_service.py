@@ -5,9 +5,19 @@ with the multi-agent RAG pipeline without depending directly on LangGraph
 or agent implementation details.
 """
 
-from typing import Dict, Any
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from ..core.agents.graph import run_qa_flow
+from ..core.agents.graph import arun_conversational_qa_flow, arun_qa_flow, run_qa_flow
+from ..core.config import get_settings
+from ..core.retrieval.clients import get_clients
+from ..core.retrieval.embedding_cache import CachedQueryEmbeddings, normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Reported for a failed batch question; details stay in the server log
+BATCH_ERROR_MESSAGE = "The question could not be answered."
 
 
 def answer_question(question: str) -> Dict[str, Any]:
@@ -20,3 +30,106 @@ def answer_question(question: str) -> Dict[str, Any]:
         Dictionary containing at least `answer` and `context` keys.
     """
     return run_qa_flow(question)
+
+
+async def aanswer_question(question: str) -> Dict[str, Any]:
+    """Async variant of `answer_question` for use inside an event loop."""
+    return await arun_qa_flow(question)
+
+
+def _questions_are_embedded() -> bool:
+    """Whether graph runs embed the question text itself.
+
+    Direct and multi-query retrieval search with the question (batch
+    questions have no history to rewrite them against), and similarity
+    lookups in the answer cache embed it. The tool-calling agent writes its
+    own search queries, so in agent mode a primed question embedding would
+    never be read.
+    """
+    settings = get_settings()
+    if settings.retrieval_mode in ("direct", "multi_query"):
+        return True
+    return settings.answer_cache_enabled and settings.answer_cache_similarity_enabled
+
+
+async def _prime_query_embeddings(questions: List[str]) -> None:
+    """Embed all questions with one batched request, filling the query cache.
+
+    Each graph run then gets its question embedding (retrieval, answer cache
+    lookup) from the cache instead of its own API call.
+    """
+    if not _questions_are_embedded():
+        return
+    embeddings = get_clients().embeddings
+    if isinstance(embeddings, CachedQueryEmbeddings) and questions:
+        await embeddings.aembed_queries(questions)
+
+
+async def run_qa_batch(
+    questions: List[str],
+    max_concurrency: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Answer many independent questions, yielding results as they finish.
+
+    1. Identical questions (after whitespace/case normalization) run the
+       graph once and share the result. Nothing else (retrievals, query
+       rewrites) is shared between runs.
+    2. When the runs will embed their question (see
+       `_questions_are_embedded`), all questions are embedded up front in
+       one batched embeddings call.
+    3. At most `max_concurrency` graph runs are in flight at a time.
+
+    Args:
+        questions: Questions to answer (no shared conversation history).
+        max_concurrency: Limit on concurrent graph runs; `qa_batch_concurrency`
+            from settings is both the default and the maximum.
+
+    Yields:
+        One dict per input question, in completion order, with its `index`
+        in `questions`, the `question`, and either the final state's
+        `answer`, `context`, `verification_decision`, `grounding_score` and
+        `cache_hit`, or a generic `error` message.
+    """
+    limit = get_settings().qa_batch_concurrency
+    if max_concurrency is not None:
+        limit = max(1, min(max_concurrency, limit))
+    semaphore = asyncio.Semaphore(limit)
+
+    # Positions of every input question, grouped by normalized text
+    groups: Dict[str, List[int]] = {}
+    for index, question in enumerate(questions):
+        groups.setdefault(normalize_query(question), []).append(index)
+    unique = [questions[indexes[0]] for indexes in groups.values()]
+
+    try:
+        await _prime_query_embeddings(unique)
+    except Exception:
+        # Only an optimization: each run falls back to its own embedding call
+        logger.warning("Batch query embedding failed", exc_info=True)
+
+    async def answer(indexes: List[int]) -> Tuple[List[int], Dict[str, Any]]:
+        question = questions[indexes[0]]
+        async with semaphore:
+            try:
+                result = await arun_conversational_qa_flow(question)
+            except Exception:
+                logger.exception("Batch question failed: %r", question)
+                return indexes, {"error": BATCH_ERROR_MESSAGE}
+        return indexes, {
+            "answer": result.get("answer") or "",
+            "context": result.get("context") or "",
+            "verification_decision": result.get("verification_decision"),
+            "grounding_score": result.get("grounding_score"),
+            "cache_hit": bool(result.get("cache_hit")),
+        }
+
+    tasks = [asyncio.create_task(answer(indexes)) for indexes in groups.values()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            indexes, outcome = await finished
+            for index in indexes:
+                yield {"index": index, "question": questions[index], **outcome}
+    finally:
+        # Client went away or the caller stopped iterating: stop the rest
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,378 @@
+"""Pluggable storage for conversation sessions.
+
+The API keeps every conversation's turns and memory metadata (rolling
+summary) in a `SessionStore`. Two backends are provided:
+
+- `InMemorySessionStore`: per-process LRU with idle TTL, bounded in both the
+  number of sessions and the number of stored turns per session.
+- `SQLiteSessionStore`: a local SQLite database in WAL mode, which survives
+  restarts and can be shared by several uvicorn workers on the same host.
+  It applies the same TTL and session cap (least recently used first).
+
+Turns are append-only: each write adds one row / list entry and assigns the
+next turn number, and history reads can be capped to the last N turns.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from ..core.config import get_settings
+
+
+class SessionStore(ABC):
+    """Interface shared by all session backends."""
+
+    @abstractmethod
+    def exists(self, session_id: str) -> bool:
+        """Return True if the session is known and not expired."""
+
+    @abstractmethod
+    def get_history(
+        self, session_id: str, last_n: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the session's turns, oldest first, optionally only the last N."""
+
+    @abstractmethod
+    def append_turn(self, session_id: str, turn: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a turn, assign its `turn` number and return the stored turn."""
+
+    @abstractmethod
+    def get_metadata(self, session_id: str) -> Dict[str, Any]:
+        """Return the session's metadata (empty dict if none)."""
+
+    @abstractmethod
+    def set_metadata(self, session_id: str, metadata: Dict[str, Any]) -> None:
+        """Replace the session's metadata."""
+
+    @abstractmethod
+    def expire(self) -> int:
+        """Delete sessions idle for longer than the TTL; return how many."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+@dataclass
+class _Session:
+    turns: Deque[Dict[str, Any]]
+    turn_count: int = 0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    last_access: float = field(default_factory=time.time)
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local LRU session store with idle-time expiry.
+
+    Args:
+        ttl_seconds: Idle time after which a session is dropped (`None` = never).
+        max_sessions: Least recently used sessions are evicted beyond this.
+        max_stored_turns: Older turns of a session are dropped beyond this.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_sessions: int = 10_000,
+        max_stored_turns: int = 200,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds or None
+        self.max_sessions = max_sessions
+        self.max_stored_turns = max_stored_turns
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, session_id: str) -> Optional[_Session]:
+        # Caller holds the lock
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        now = time.time()
+        if self.ttl_seconds is not None and now - session.last_access > self.ttl_seconds:
+            del self._sessions[session_id]
+            return None
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _get_or_create(self, session_id: str) -> _Session:
+        # Caller holds the lock
+        session = self._touch(session_id)
+        if session is None:
+            session = _Session(turns=deque(maxlen=self.max_stored_turns))
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def exists(self, session_id: str) -> bool:
+        with self._lock:
+            return self._touch(session_id) is not None
+
+    def get_history(
+        self, session_id: str, last_n: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            session = self._touch(session_id)
+            if session is None:
+                return []
+            turns = list(session.turns)
+        return turns[-last_n:] if last_n else turns
+
+    def append_turn(self, session_id: str, turn: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            session = self._get_or_create(session_id)
+            session.turn_count += 1
+            stored = {"turn": session.turn_count, **turn}
+            session.turns.append(stored)
+            return stored
+
+    def get_metadata(self, session_id: str) -> Dict[str, Any]:
+        with self._lock:
+            session = self._touch(session_id)
+            return dict(session.metadata) if session is not None else {}
+
+    def set_metadata(self, session_id: str, metadata: Dict[str, Any]) -> None:
+        with self._lock:
+            self._get_or_create(session_id).metadata = dict(metadata)
+
+    def expire(self) -> int:
+        if self.ttl_seconds is None:
+            return 0
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [
+                session_id
+                for session_id, session in self._sessions.items()
+                if session.last_access < cutoff
+            ]
+            for session_id in expired:
+                del self._sessions[session_id]
+        return len(expired)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session store backed by a local SQLite database in WAL mode.
+
+    Args:
+        path: Database file; created (with parent directories) if missing.
+        ttl_seconds: Idle time after which a session is deleted (`None` = never).
+        max_sessions: Least recently used sessions are deleted beyond this.
+        max_stored_turns: Older turns of a session are pruned beyond this.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: Optional[float] = None,
+        max_sessions: int = 10_000,
+        max_stored_turns: int = 200,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds or None
+        self.max_sessions = max_sessions
+        self.max_stored_turns = max_stored_turns
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves
+        self._db = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, "
+                "turn_count INTEGER NOT NULL DEFAULT 0, "
+                "metadata TEXT NOT NULL DEFAULT '{}', "
+                "last_access REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS turns ("
+                "session_id TEXT NOT NULL, "
+                "turn INTEGER NOT NULL, "
+                "data TEXT NOT NULL, "
+                "PRIMARY KEY (session_id, turn))"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access)"
+            )
+
+    def _live_row(self, session_id: str) -> Optional[tuple]:
+        # Caller holds the lock
+        row = self._db.execute(
+            "SELECT turn_count, metadata, last_access FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        if self.ttl_seconds is not None and time.time() - row[2] > self.ttl_seconds:
+            return None
+        return row
+
+    def _start_if_not_live(self, session_id: str, now: float) -> None:
+        # Caller holds the lock inside a write transaction. An expired
+        # session that was not swept yet starts over: its turns and summary
+        # must not come back
+        if self._live_row(session_id) is not None:
+            return
+        self._db.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions "
+            "(session_id, turn_count, metadata, last_access) "
+            "VALUES (?, 0, '{}', ?)",
+            (session_id, now),
+        )
+        # Over the cap: drop the least recently used other sessions
+        overflow = (
+            "SELECT session_id FROM sessions WHERE session_id != ? "
+            "ORDER BY last_access DESC LIMIT -1 OFFSET ?"
+        )
+        params = (session_id, self.max_sessions - 1)
+        self._db.execute(f"DELETE FROM turns WHERE session_id IN ({overflow})", params)
+        self._db.execute(f"DELETE FROM sessions WHERE session_id IN ({overflow})", params)
+
+    def _touch(self, session_id: str) -> None:
+        # Caller holds the lock
+        self._db.execute(
+            "UPDATE sessions SET last_access = ? WHERE session_id = ?",
+            (time.time(), session_id),
+        )
+
+    def exists(self, session_id: str) -> bool:
+        with self._lock:
+            return self._live_row(session_id) is not None
+
+    def get_history(
+        self, session_id: str, last_n: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._live_row(session_id) is None:
+                return []
+            self._touch(session_id)
+            rows = self._db.execute(
+                "SELECT data FROM turns WHERE session_id = ? "
+                "ORDER BY turn DESC LIMIT ?",
+                (session_id, last_n or -1),
+            ).fetchall()
+        return [json.loads(data) for (data,) in reversed(rows)]
+
+    def append_turn(self, session_id: str, turn: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so concurrent workers
+            # cannot hand out the same turn number
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._start_if_not_live(session_id, now)
+                self._db.execute(
+                    "UPDATE sessions SET turn_count = turn_count + 1, last_access = ? "
+                    "WHERE session_id = ?",
+                    (now, session_id),
+                )
+                (turn_number,) = self._db.execute(
+                    "SELECT turn_count FROM sessions WHERE session_id = ?",
+                    (session_id,),
+                ).fetchone()
+                stored = {"turn": turn_number, **turn}
+                self._db.execute(
+                    "INSERT INTO turns (session_id, turn, data) VALUES (?, ?, ?)",
+                    (session_id, turn_number, json.dumps(stored)),
+                )
+                self._db.execute(
+                    "DELETE FROM turns WHERE session_id = ? AND turn <= ?",
+                    (session_id, turn_number - self.max_stored_turns),
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return stored
+
+    def get_metadata(self, session_id: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self._live_row(session_id)
+        return json.loads(row[1]) if row is not None else {}
+
+    def set_metadata(self, session_id: str, metadata: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._start_if_not_live(session_id, now)
+                self._db.execute(
+                    "UPDATE sessions SET metadata = ?, last_access = ? WHERE session_id = ?",
+                    (json.dumps(metadata), now, session_id),
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def expire(self) -> int:
+        if self.ttl_seconds is None:
+            return 0
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "DELETE FROM turns WHERE session_id IN "
+                    "(SELECT session_id FROM sessions WHERE last_access < ?)",
+                    (cutoff,),
+                )
+                expired = self._db.execute(
+                    "DELETE FROM sessions WHERE last_access < ?", (cutoff,)
+                ).rowcount
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return expired
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_store: SessionStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Get the process-wide session store selected by settings."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = get_settings()
+                if settings.session_backend == "sqlite":
+                    _store = SQLiteSessionStore(
+                        path=settings.session_db_path,
+                        ttl_seconds=settings.session_ttl_seconds,
+                        max_sessions=settings.session_max_sessions,
+                        max_stored_turns=settings.session_max_stored_turns,
+                    )
+                else:
+                    _store = InMemorySessionStore(
+                        ttl_seconds=settings.session_ttl_seconds,
+                        max_sessions=settings.session_max_sessions,
+                        max_stored_turns=settings.session_max_stored_turns,
+                    )
+    return _store
+
+
+def close_session_store() -> None:
+    """Close and forget the process-wide session store."""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = None
@@ -0,0 +1,109 @@
+"""Content-addressed storage for uploaded PDFs.
+
+Uploads are copied to disk in fixed-size blocks while their SHA-256 is
+computed, so memory use per upload is one block regardless of file size,
+and the hash the indexing pipeline needs is known without reading the file
+again. Files are stored as `<upload_dir>/<sha256>.pdf`: the client's
+filename never becomes a path, and two uploads with the same name no longer
+overwrite each other (identical content is stored once).
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+PDF_MAGIC = b"%PDF-"
+
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w.\- ()]+")
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeded the configured maximum size."""
+
+
+class InvalidUpload(Exception):
+    """The upload is not a PDF."""
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    """A PDF written to the upload store."""
+
+    path: Path
+    sha256: str
+    size: int
+    filename: str
+
+
+def sanitize_filename(filename: Optional[str], default: str = "upload.pdf") -> str:
+    """Reduce a client-supplied filename to a safe display name.
+
+    Directory components and unusual characters are dropped; the result is
+    used as the document's name, never as a path.
+    """
+    name = Path((filename or "").replace("\\", "/")).name
+    name = _UNSAFE_FILENAME_CHARS.sub("_", name).strip(" .")
+    return name[:255] or default
+
+
+def store_upload(
+    source: BinaryIO,
+    filename: Optional[str],
+    upload_dir: Path,
+    max_bytes: int,
+    block_size: int = 1024 * 1024,
+) -> StoredUpload:
+    """Copy an uploaded PDF into the store, hashing it on the way.
+
+    The data goes to a temporary file in `upload_dir` first and is renamed
+    to its content address once complete, so a partial upload never shows
+    up under a valid name.
+
+    Args:
+        source: Readable binary file object positioned at the start.
+        filename: Name the client sent.
+        upload_dir: Directory of the store.
+        max_bytes: Largest accepted upload; the copy stops as soon as it is exceeded.
+        block_size: Bytes read and written per step.
+
+    Returns:
+        Where the file was stored, its hash, size and sanitized name.
+
+    Raises:
+        UploadTooLarge: The upload is larger than `max_bytes`.
+        InvalidUpload: The data does not start with a PDF header.
+    """
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while block := source.read(block_size):
+                if size == 0 and not block.startswith(PDF_MAGIC):
+                    raise InvalidUpload("File is not a PDF.")
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes} byte upload limit.")
+                digest.update(block)
+                out.write(block)
+        if size == 0:
+            raise InvalidUpload("File is empty.")
+
+        sha256 = digest.hexdigest()
+        path = upload_dir / f"{sha256}.pdf"
+        # Same content uploaded before: keep the stored copy
+        if path.exists():
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return StoredUpload(path=path, sha256=sha256, size=size, filename=sanitize_filename(filename))
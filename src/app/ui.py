@@ -1,4 +1,6 @@
 # src/app/ui.py
+import json
+import time
 import streamlit as st
 import requests
 import uuid
@@ -6,6 +8,30 @@ import uuid
 # Configuration
 API_URL = "http://127.0.0.1:8000"
 
+STAGE_LABELS = {
+    "retrieval": "Searching documents...",
+    "summarization": "Drafting answer...",
+    "grounding_check": "Checking answer against sources...",
+    "verification": "Verifying answer...",
+    "verification_light": "Verifying answer...",
+    "finalize_draft": "Answer grounded in sources...",
+    "memory_summarizer": "Updating conversation memory...",
+}
+
+
+def iter_sse(response):
+    """Yield (event, data) pairs from a Server-Sent Events response."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
 st.set_page_config(page_title="IKMS RAG Assistant", page_icon="🤖", layout="wide")
 
 st.title("🤖 IKMS Multi-Agent Conversational RAG")
@@ -38,8 +64,27 @@ with st.sidebar:
             files = {"file": (uploaded_file.name, uploaded_file, "application/pdf")}
             try:
                 response = requests.post(f"{API_URL}/index-pdf", files=files)
-                if response.status_code == 200:
-                    st.success("✅ Document indexed successfully!")
+                if response.status_code == 202:
+                    # Indexing runs in the background; poll the job until it finishes
+                    job = response.json()
+                    progress = st.progress(0.0, text="Queued...")
+                    while job["status"] in ("queued", "running"):
+                        time.sleep(1)
+                        job = requests.get(f"{API_URL}/index-pdf/jobs/{job['job_id']}").json()
+                        total = max(job["total_pages"], 1)
+                        progress.progress(
+                            min(job["pages_parsed"] / total, 1.0),
+                            text=f"Parsed {job['pages_parsed']} pages, "
+                                 f"embedded {job['chunks_embedded']}, "
+                                 f"upserted {job['chunks_upserted']} chunks",
+                        )
+
+                    if job["status"] == "completed" and job.get("file_unchanged"):
+                        st.info("ℹ️ Document already indexed; nothing changed.")
+                    elif job["status"] == "completed":
+                        st.success("✅ Document indexed successfully!")
+                    else:
+                        st.error(f"Indexing {job['status']}: {'; '.join(job['errors'])}")
                 else:
                     st.error(f"Error: {response.text}")
             except Exception as e:
@@ -72,10 +117,11 @@ if prompt := st.chat_input("Ask a question about your PDF..."):
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # 2. Call API
+    # 2. Call API (streamed)
     with st.chat_message("assistant"):
+        status_placeholder = st.empty()
         message_placeholder = st.empty()
-        message_placeholder.markdown("🤔 *Thinking and searching...*")
+        status_placeholder.markdown("🤔 *Thinking and searching...*")
         
         payload = {
             "question": prompt,
@@ -83,10 +129,27 @@ if prompt := st.chat_input("Ask a question about your PDF..."):
         }
         
         try:
-            response = requests.post(f"{API_URL}/qa/conversation", json=payload)
+            response = requests.post(
+                f"{API_URL}/qa/conversation/stream", json=payload, stream=True
+            )
             if response.status_code == 200:
-                data = response.json()
-                answer = data.get("answer", "No answer received.")
+                answer = ""
+                data = {}
+
+                for event, event_data in iter_sse(response):
+                    if event == "stage":
+                        label = STAGE_LABELS.get(event_data.get("node"), event_data.get("node"))
+                        status_placeholder.markdown(f"⏳ *{label}*")
+                    elif event == "token":
+                        answer += event_data.get("text", "")
+                        message_placeholder.markdown(answer + "▌")
+                    elif event == "done":
+                        data = event_data
+                    elif event == "error":
+                        raise RuntimeError(event_data.get("detail", "Unknown error"))
+
+                status_placeholder.empty()
+                answer = data.get("answer") or answer or "No answer received."
                 context = data.get("context", "")
                 summary = data.get("conversation_summary", "")
 
@@ -111,6 +174,8 @@ if prompt := st.chat_input("Ask a question about your PDF..."):
                     st.rerun()
                     
             else:
+                status_placeholder.empty()
                 message_placeholder.error(f"API Error: {response.text}")
         except Exception as e:
-            message_placeholder.error(f"Connection error. Is the backend running? {e}")
\ No newline at end of file
+            status_placeholder.empty()
+            message_placeholder.error(f"Connection error. Is the backend running? {e}")
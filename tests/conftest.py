@@ -0,0 +1,67 @@
+"""Shared test setup.
+
+Settings require API keys and default to files under `data/`; tests get
+placeholder keys and a scratch directory instead, and a fresh settings
+instance per test so `monkeypatch.setenv` takes effect.
+"""
+
+import pytest
+
+from src.app.core import config
+
+
+@pytest.fixture(autouse=True)
+def isolated_settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("PINECONE_API_KEY", "test")
+    monkeypatch.setenv("SESSION_DB_PATH", str(tmp_path / "sessions.sqlite3"))
+    monkeypatch.setenv("INDEX_MANIFEST_PATH", str(tmp_path / "manifest.sqlite3"))
+    monkeypatch.setenv("LEXICAL_INDEX_PATH", str(tmp_path / "lexical.sqlite3"))
+    monkeypatch.setenv("LOCAL_INDEX_PATH", str(tmp_path / "local_index"))
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(config, "_settings", None)
+    yield
+    config._settings = None
+
+
+@pytest.fixture
+def local_clients(monkeypatch):
+    """Retrieval clients on the local vector backend with fake embeddings.
+
+    Nothing leaves the process: the store, lexical index and manifest live
+    in the test's scratch directory.
+    """
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    from src.app.core.retrieval import clients, lexical_index
+    from src.app.services import index_manifest
+
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    monkeypatch.setenv("EMBEDDING_CACHE_ENABLED", "false")
+    monkeypatch.setattr(
+        clients, "create_embeddings_model", lambda: DeterministicFakeEmbedding(size=32)
+    )
+    monkeypatch.setattr(index_manifest, "_manifest", None)
+    monkeypatch.setattr(lexical_index, "_lexical_index", None)
+    yield clients.reload_clients()
+    clients.close_clients()
+    if index_manifest._manifest is not None:
+        index_manifest._manifest.close()
+    if lexical_index._lexical_index is not None:
+        lexical_index._lexical_index.close()
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Write a PDF with one page per given text and return its path."""
+    import pymupdf
+
+    def make(name, pages):
+        path = tmp_path / name
+        with pymupdf.open() as pdf:
+            for text in pages:
+                pdf.new_page().insert_text((72, 72), text)
+            pdf.save(path)
+        return path
+
+    return make
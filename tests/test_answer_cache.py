@@ -0,0 +1,52 @@
+import pytest
+
+from src.app.core.agents import answer_cache, graph
+
+
+class FakeGraph:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, state):
+        self.calls += 1
+        return {
+            **state,
+            "answer": "Refunds are accepted within 30 days.",
+            "context": "ctx",
+            "conversation_summary": f"summary of {state['session_id']}",
+            "summarized_turns": 7,
+        }
+
+
+@pytest.fixture
+def fake_graph(monkeypatch):
+    monkeypatch.setenv("ANSWER_CACHE_ENABLED", "true")
+    monkeypatch.setattr(answer_cache, "_cache", None)
+    fake = FakeGraph()
+    monkeypatch.setattr(graph, "get_qa_graph", lambda: fake)
+    return fake
+
+
+def test_cache_hit_keeps_the_sessions_own_memory(fake_graph):
+    question = "What is the refund policy?"
+    graph.run_conversational_qa_flow(question, session_id="a")
+
+    hit = graph.run_conversational_qa_flow(
+        question, session_id="b", conversation_summary="summary of b", summarized_turns=2
+    )
+
+    assert fake_graph.calls == 1
+    assert hit["cache_hit"]
+    assert hit["answer"] == "Refunds are accepted within 30 days."
+    assert (hit["conversation_summary"], hit["summarized_turns"]) == ("summary of b", 2)
+
+
+def test_cache_hit_on_a_new_session_carries_no_summary(fake_graph):
+    question = "What is the refund policy?"
+    graph.run_conversational_qa_flow(question, session_id="a")
+
+    hit = graph.run_conversational_qa_flow(question, session_id="b")
+
+    assert hit["cache_hit"]
+    assert "conversation_summary" not in hit
+    assert "history_text" not in hit
@@ -0,0 +1,79 @@
+from langchain_core.documents import Document
+
+from src.app.core.retrieval.context import assemble_context, fit_to_budget, select_chunks
+from src.app.core.tokens import count_tokens
+
+TOPICS = [
+    "vector stores keep embeddings for similarity search",
+    "pinecone is a managed service hosting vector indexes",
+    "bm25 ranks documents by term frequency and rarity",
+    "langgraph wires agents into a state machine graph",
+    "fastapi serves the question answering endpoints",
+    "sqlite stores sessions in a local database file",
+]
+
+
+def _doc(id_, text, page=1):
+    return Document(id=id_, page_content=text, metadata={"page": page, "source": "doc.pdf"})
+
+
+def test_near_duplicates_keep_the_better_ranked_copy():
+    docs = [
+        _doc("a", TOPICS[0]),
+        _doc("b", TOPICS[1]),
+        _doc("a-copy", TOPICS[0] + " search"),
+    ]
+
+    selected = select_chunks(docs, max_chunks=3, duplicate_threshold=0.85)
+
+    assert [doc.id for doc in selected] == ["a", "b"]
+
+
+def test_mmr_prefers_a_different_chunk_over_a_similar_one():
+    docs = [
+        _doc("a", TOPICS[0]),
+        _doc("a-variant", TOPICS[0].replace("similarity search", "nearest neighbour lookup")),
+        _doc("b", TOPICS[2]),
+    ]
+
+    by_rank = select_chunks(docs, max_chunks=2, mmr_lambda=1.0)
+    diverse = select_chunks(docs, max_chunks=2, mmr_lambda=0.5)
+
+    assert [doc.id for doc in by_rank] == ["a", "a-variant"]
+    assert [doc.id for doc in diverse] == ["a", "b"]
+
+
+def test_budget_truncates_the_last_chunk_and_keeps_its_metadata():
+    long_text = " ".join(TOPICS * 20)
+    docs = [_doc("short", TOPICS[0], page=1), _doc("long", long_text, page=7)]
+    budget = count_tokens(TOPICS[0]) + 10 + 60
+
+    kept = fit_to_budget(docs, budget)
+
+    assert [doc.id for doc in kept] == ["short", "long"]
+    assert kept[1].metadata["page"] == 7
+    assert count_tokens(kept[1].page_content) <= 50
+    assert long_text.startswith(kept[1].page_content)
+
+
+def test_budget_drops_a_chunk_that_would_be_cut_too_short():
+    docs = [_doc("short", TOPICS[0]), _doc("long", " ".join(TOPICS * 20))]
+
+    kept = fit_to_budget(docs, count_tokens(TOPICS[0]) + 10 + 20)
+
+    assert [doc.id for doc in kept] == ["short"]
+
+
+def test_assemble_context_serializes_selected_chunks():
+    docs = [_doc(str(i), text, page=i) for i, text in enumerate(TOPICS, start=1)]
+
+    context, kept = assemble_context(docs, max_chunks=3, token_budget=10_000)
+
+    assert [doc.id for doc in kept] == ["1", "2", "3"]
+    assert context.startswith(f"Chunk 1 (page=1):\n{TOPICS[0]}")
+    assert "Chunk 3 (page=3):" in context
+    assert "Chunk 4" not in context
+
+
+def test_assemble_context_of_nothing_is_empty():
+    assert assemble_context([]) == ("", [])
@@ -0,0 +1,47 @@
+from langchain_core.documents import Document
+
+from src.app.core.retrieval.fusion import reciprocal_rank_fusion
+
+
+def _docs(*ids):
+    return [Document(id=id_, page_content=f"text {id_}") for id_ in ids]
+
+
+def test_documents_found_by_several_searches_rank_first():
+    dense = _docs("a", "b", "c")
+    lexical = _docs("c", "d", "b")
+
+    fused = reciprocal_rank_fusion([dense, lexical], k=4)
+
+    assert [doc.id for doc in fused] == ["c", "b", "a", "d"]
+
+
+def test_each_document_appears_once_and_k_caps_the_result():
+    fused = reciprocal_rank_fusion([_docs("a", "b"), _docs("b", "a"), _docs("e")], k=2)
+
+    assert len(fused) == 2
+    assert len({doc.id for doc in fused}) == 2
+
+
+def test_rrf_k_dampens_rank_differences():
+    # "a" is first in one list, "b" third in two lists
+    lists = [_docs("a", "x", "b"), _docs("y", "z", "b")]
+
+    # With the usual constant, agreement between searches wins...
+    assert reciprocal_rank_fusion(lists, k=1, rrf_k=60)[0].id == "b"
+    # ...without damping, a single top rank does
+    assert reciprocal_rank_fusion(lists, k=1, rrf_k=0)[0].id == "a"
+
+
+def test_documents_without_ids_are_matched_by_content():
+    dense = [Document(page_content="same"), Document(page_content="only dense")]
+    lexical = [Document(page_content="same")]
+
+    fused = reciprocal_rank_fusion([dense, lexical], k=3)
+
+    assert [doc.page_content for doc in fused] == ["same", "only dense"]
+
+
+def test_empty_inputs():
+    assert reciprocal_rank_fusion([], k=3) == []
+    assert reciprocal_rank_fusion([[], []], k=3) == []
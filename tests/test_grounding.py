@@ -0,0 +1,113 @@
+from src.app.core.agents.grounding import (
+    DECISION_FULL,
+    DECISION_LIGHT,
+    DECISION_SKIPPED,
+    GroundingReport,
+    check_grounding,
+    grounding_decision,
+    split_sentences,
+)
+
+CONTEXT = (
+    "Chunk 1 (page=2):\n"
+    "Project Phoenix migrates the billing platform to Kubernetes. "
+    "The migration budget is 250,000 dollars and the deadline is March 2025."
+)
+
+
+def test_split_sentences_handles_punctuation_and_list_items():
+    text = "First sentence. Second one!\n- item one\n\n- item two"
+
+    assert split_sentences(text) == ["First sentence.", "Second one!", "- item one", "- item two"]
+
+
+def test_supported_answer_scores_one():
+    answer = (
+        "Project Phoenix migrates the billing platform to Kubernetes. "
+        "The migration budget is 250,000 dollars."
+    )
+
+    report = check_grounding(answer, CONTEXT)
+
+    assert report.score == 1.0
+    assert (report.sentences, report.supported) == (2, 2)
+    assert not report.abstained
+
+
+def test_unsupported_sentence_lowers_the_score():
+    answer = (
+        "Project Phoenix migrates the billing platform to Kubernetes. "
+        "Marketing approved quarterly travel reimbursements yesterday."
+    )
+
+    report = check_grounding(answer, CONTEXT)
+
+    assert report.score == 0.5
+    assert report.supported == 1
+
+
+def test_numbers_missing_from_the_context_are_unsupported():
+    answer = "The migration budget is 300,000 dollars."
+
+    assert check_grounding(answer, CONTEXT).score == 0.0
+    assert check_grounding("The migration budget is 250,000 dollars.", CONTEXT).score == 1.0
+
+
+def test_support_threshold_controls_partial_overlap():
+    # Three of five content words (phoenix, billing, kubernetes) are in the context
+    answer = "Phoenix moves billing to Kubernetes with Terraform."
+
+    assert check_grounding(answer, CONTEXT, support_threshold=0.6).score == 1.0
+    assert check_grounding(answer, CONTEXT, support_threshold=0.7).score == 0.0
+
+
+def test_abstention_is_flagged():
+    report = check_grounding("The context does not contain information about pricing.", CONTEXT)
+
+    assert report.abstained
+
+
+def test_abstention_followed_by_a_claim_is_not_an_abstention():
+    answer = (
+        "The context does not mention the launch date. "
+        "However, Project Phoenix launched in 2019 with a budget of 9 million dollars."
+    )
+
+    report = check_grounding(answer, CONTEXT)
+
+    assert not report.abstained
+    assert report.score == 0.0
+    assert grounding_decision(report, skip_threshold=0.9, light_threshold=0.6) == DECISION_FULL
+
+
+def test_empty_draft_gets_full_verification():
+    report = check_grounding("", CONTEXT)
+
+    assert report.score == 0.0
+    assert report.sentences == 0
+    assert not report.abstained
+    assert grounding_decision(report, skip_threshold=0.9, light_threshold=0.6) == DECISION_FULL
+
+
+def test_decision_thresholds():
+    def decide(score):
+        report = GroundingReport(score=score, sentences=4, supported=0, abstained=False)
+        return grounding_decision(report, skip_threshold=0.9, light_threshold=0.6)
+
+    assert decide(0.95) == DECISION_SKIPPED
+    assert decide(0.9) == DECISION_SKIPPED
+    assert decide(0.75) == DECISION_LIGHT
+    assert decide(0.6) == DECISION_LIGHT
+    assert decide(0.2) == DECISION_FULL
+
+
+def test_pure_abstention_skips_verification():
+    answer = (
+        "The context does not mention pricing. "
+        "I cannot find any information about discounts either."
+    )
+
+    report = check_grounding(answer, CONTEXT)
+
+    assert report.abstained
+    assert grounding_decision(report, skip_threshold=0.9, light_threshold=0.6) == DECISION_SKIPPED
@@ -0,0 +1,26 @@
+from src.app.services.index_manifest import IndexManifest, chunk_id, chunk_sha256
+
+
+def test_chunk_id_depends_on_source_and_content():
+    first = chunk_id("a.pdf", chunk_sha256("text"))
+
+    assert first == chunk_id("a.pdf", chunk_sha256("text"))
+    assert first != chunk_id("b.pdf", chunk_sha256("text"))
+    assert first != chunk_id("a.pdf", chunk_sha256("other text"))
+
+
+def test_replace_records_file_and_chunks(tmp_path):
+    manifest = IndexManifest(str(tmp_path / "manifest.sqlite3"))
+    try:
+        assert manifest.file_hash("index", "a.pdf") is None
+        assert manifest.chunk_ids("index", "a.pdf") == set()
+
+        manifest.replace("index", "a.pdf", "hash-1", ["c1", "c2"])
+        manifest.replace("index", "a.pdf", "hash-2", ["c2", "c3"])
+        manifest.replace("other-index", "a.pdf", "hash-9", ["c9"])
+
+        assert manifest.file_hash("index", "a.pdf") == "hash-2"
+        assert manifest.chunk_ids("index", "a.pdf") == {"c2", "c3"}
+        assert manifest.chunk_ids("other-index", "a.pdf") == {"c9"}
+    finally:
+        manifest.close()
@@ -0,0 +1,48 @@
+import pytest
+
+from src.app.services.index_manifest import file_sha256, get_index_manifest
+from src.app.services.indexing_jobs import COMPLETED, IndexingJobManager, upload_source
+
+
+@pytest.fixture
+def manager():
+    manager = IndexingJobManager(max_workers=1, parse_processes=1, upsert_threads=1)
+    yield manager
+    manager.shutdown()
+
+
+def _index(manager, path, filename):
+    job = manager.submit(path, filename, file_hash=file_sha256(path))
+    job.future.result(timeout=60)
+    assert job.status == COMPLETED, job.errors
+    return job
+
+
+def test_same_named_uploads_with_different_content_both_stay(local_clients, make_pdf, manager):
+    from src.app.core.retrieval.vector_store import lexical_search
+
+    first = make_pdf("first.pdf", ["Quarterly report about Phoenix budgets."])
+    second = make_pdf("second.pdf", ["Annual report about Hermes hiring."])
+
+    _index(manager, first, "report.pdf")
+    _index(manager, second, "report.pdf")
+
+    manifest = get_index_manifest()
+    index_name = local_clients.index_name
+    first_ids = manifest.chunk_ids(index_name, upload_source(file_sha256(first)))
+    second_ids = manifest.chunk_ids(index_name, upload_source(file_sha256(second)))
+    assert first_ids and second_ids
+    assert set(local_clients.vector_store._row_of) == first_ids | second_ids
+    for query in ("Phoenix", "Hermes"):
+        [hit] = lexical_search(query, k=1)
+        assert hit.metadata["document"] == "report.pdf"
+
+
+def test_reuploading_the_same_content_is_unchanged(local_clients, make_pdf, manager):
+    path = make_pdf("report.pdf", ["Quarterly report about Phoenix budgets."])
+
+    _index(manager, path, "report.pdf")
+    again = _index(manager, path, "copy of report.pdf")
+
+    assert again.progress.file_unchanged
+    assert again.progress.chunks_embedded == 0
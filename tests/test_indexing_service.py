@@ -0,0 +1,212 @@
+import pytest
+import urllib3
+from pinecone.exceptions import PineconeApiException, ServiceException, UnauthorizedException
+
+from src.app.services.index_manifest import get_index_manifest
+from src.app.services.indexing_service import (
+    IndexingCancelled,
+    IndexingProgress,
+    run_indexing_pipeline,
+)
+
+PAGES = ["Alpha page about vector stores.", "Beta page about embeddings.", "Gamma page."]
+
+
+def _live_ids(clients):
+    return set(clients.vector_store._row_of)
+
+
+def _lexical_ids(index_name):
+    from src.app.core.retrieval.lexical_index import get_lexical_index
+
+    rows = get_lexical_index()._db.execute(
+        "SELECT chunk_id FROM chunks WHERE index_name = ?", (index_name,)
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def test_first_run_indexes_every_chunk(local_clients, make_pdf):
+    path = make_pdf("doc.pdf", PAGES)
+
+    upserted = run_indexing_pipeline(path)
+
+    ids = get_index_manifest().chunk_ids(local_clients.index_name, "doc.pdf")
+    assert upserted == len(PAGES)
+    assert _live_ids(local_clients) == ids
+    assert _lexical_ids(local_clients.index_name) == ids
+
+
+def test_unchanged_file_is_skipped(local_clients, make_pdf):
+    path = make_pdf("doc.pdf", PAGES)
+    run_indexing_pipeline(path)
+
+    progress = IndexingProgress()
+    assert run_indexing_pipeline(path, progress) == 0
+    assert progress.file_unchanged
+    assert progress.chunks_embedded == 0
+
+
+def test_reindex_embeds_new_chunks_and_deletes_vanished(local_clients, make_pdf):
+    run_indexing_pipeline(make_pdf("doc.pdf", PAGES))
+    before = get_index_manifest().chunk_ids(local_clients.index_name, "doc.pdf")
+
+    progress = IndexingProgress()
+    edited = make_pdf("doc.pdf", [PAGES[0], PAGES[1], "Delta page replaces gamma."])
+    upserted = run_indexing_pipeline(edited, progress)
+
+    after = get_index_manifest().chunk_ids(local_clients.index_name, "doc.pdf")
+    assert upserted == 1
+    assert progress.chunks_skipped == 2
+    assert progress.chunks_deleted == 1
+    assert len(before & after) == 2
+    assert _live_ids(local_clients) == after
+    assert _lexical_ids(local_clients.index_name) == after
+
+
+def test_failed_run_discards_its_writes(local_clients, make_pdf, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BATCH_SIZE", "1")
+    from src.app.core.config import reload_settings
+
+    reload_settings()
+    run_indexing_pipeline(make_pdf("doc.pdf", PAGES[:1]))
+    manifest = get_index_manifest()
+    index_name = local_clients.index_name
+    before = manifest.chunk_ids(index_name, "doc.pdf")
+    before_hash = manifest.file_hash(index_name, "doc.pdf")
+
+    embeddings = local_clients.embeddings
+    calls = []
+
+    def failing_embed_documents(texts):
+        calls.append(texts)
+        if len(calls) == 2:
+            raise RuntimeError("embedding service down")
+        return type(embeddings).embed_documents(embeddings, texts)
+
+    monkeypatch.setattr(embeddings, "embed_documents", failing_embed_documents)
+    with pytest.raises(RuntimeError):
+        run_indexing_pipeline(make_pdf("doc.pdf", PAGES))
+
+    assert manifest.chunk_ids(index_name, "doc.pdf") == before
+    assert manifest.file_hash(index_name, "doc.pdf") == before_hash
+    assert _live_ids(local_clients) == before
+    assert _lexical_ids(index_name) == before
+
+
+def test_cancelled_run_discards_its_writes(local_clients, make_pdf, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BATCH_SIZE", "1")
+    from src.app.core.config import reload_settings
+
+    reload_settings()
+    progress = IndexingProgress()
+    embeddings = local_clients.embeddings
+
+    def cancelling_embed_documents(texts):
+        progress.cancel_event.set()
+        return type(embeddings).embed_documents(embeddings, texts)
+
+    monkeypatch.setattr(embeddings, "embed_documents", cancelling_embed_documents)
+    with pytest.raises(IndexingCancelled):
+        run_indexing_pipeline(make_pdf("doc.pdf", PAGES), progress)
+
+    assert progress.chunks_embedded == 1
+    assert get_index_manifest().file_hash(local_clients.index_name, "doc.pdf") is None
+    assert _live_ids(local_clients) == set()
+    assert _lexical_ids(local_clients.index_name) == set()
+
+
+def _drop_lexical_rows(index_name):
+    from src.app.core.retrieval.lexical_index import get_lexical_index
+
+    lexical_index = get_lexical_index()
+    ids = sorted(_lexical_ids(index_name))
+    lexical_index.delete(index_name, ids)
+    return ids
+
+
+def test_unchanged_file_backfills_missing_lexical_rows(local_clients, make_pdf):
+    path = make_pdf("doc.pdf", PAGES)
+    run_indexing_pipeline(path)
+    # As if indexed before the lexical index was enabled
+    ids = _drop_lexical_rows(local_clients.index_name)
+
+    run_indexing_pipeline(path)
+
+    assert sorted(_lexical_ids(local_clients.index_name)) == ids
+
+
+def test_changed_file_backfills_lexical_rows_of_known_chunks(local_clients, make_pdf):
+    run_indexing_pipeline(make_pdf("doc.pdf", PAGES))
+    _drop_lexical_rows(local_clients.index_name)
+
+    run_indexing_pipeline(make_pdf("doc.pdf", PAGES + ["Epsilon page."]))
+
+    ids = get_index_manifest().chunk_ids(local_clients.index_name, "doc.pdf")
+    assert len(ids) == len(PAGES) + 1
+    assert _lexical_ids(local_clients.index_name) == ids
+
+
+def test_backfill_lexical_index_covers_every_manifest_source(local_clients, make_pdf):
+    from src.app.core.retrieval.vector_store import lexical_search
+    from src.app.services.indexing_service import backfill_lexical_index
+
+    run_indexing_pipeline(make_pdf("one.pdf", PAGES[:2]))
+    run_indexing_pipeline(make_pdf("two.pdf", ["Zeta page about Phoenix."]))
+    _drop_lexical_rows(local_clients.index_name)
+
+    assert backfill_lexical_index() == 3
+    assert backfill_lexical_index() == 0
+    hits = lexical_search("Phoenix", k=3)
+    assert [doc.metadata["document"] for doc in hits] == ["two.pdf"]
+
+
+def _flaky_upsert(monkeypatch, errors):
+    from src.app.services import indexing_service
+
+    calls = []
+
+    def upsert(texts, vectors, metadatas, ids=None):
+        calls.append(ids)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return len(ids)
+
+    monkeypatch.setattr(indexing_service, "upsert_embeddings", upsert)
+    monkeypatch.setattr(indexing_service.time, "sleep", lambda seconds: None)
+    return calls
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        urllib3.exceptions.ProtocolError("connection reset"),
+        urllib3.exceptions.ReadTimeoutError(None, "/vectors/upsert", "read timed out"),
+        PineconeApiException(status=429, reason="Too Many Requests"),
+        ServiceException(status=503, reason="Service Unavailable"),
+    ],
+)
+def test_upsert_retries_transient_errors(monkeypatch, error):
+    from src.app.services.indexing_service import _upsert_with_retry
+
+    calls = _flaky_upsert(monkeypatch, [error, error])
+
+    assert _upsert_with_retry(["a"], ["text"], [[0.0]], [{}]) == 1
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ValueError("Vector dimension 3 does not match the dimension of the index 1536"),
+        UnauthorizedException(status=401, reason="Unauthorized"),
+        PineconeApiException(status=400, reason="Bad Request"),
+    ],
+)
+def test_upsert_raises_permanent_errors_at_once(monkeypatch, error):
+    from src.app.services.indexing_service import _upsert_with_retry
+
+    calls = _flaky_upsert(monkeypatch, [error])
+
+    with pytest.raises(type(error)):
+        _upsert_with_retry(["a"], ["text"], [[0.0]], [{}])
+    assert len(calls) == 1
@@ -0,0 +1,120 @@
+import json
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.app.core.retrieval import local_store
+from src.app.core.retrieval.local_store import LocalVectorStore
+
+DIM = 8
+
+
+def _vectors(count, offset=0):
+    return [[float(offset + i + 1)] + [float(j) for j in range(DIM - 1)] for i in range(count)]
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    def open_():
+        return LocalVectorStore(str(tmp_path / "index"), DeterministicFakeEmbedding(size=DIM))
+
+    return open_
+
+
+def _ids(store):
+    return sorted(store._row_of)
+
+
+def test_reopen_replays_records_and_tombstones(open_store):
+    store = open_store()
+    store.add_embeddings(["a", "b", "c"], _vectors(3), ids=["a", "b", "c"])
+    store.delete(["b"])
+    store.add_embeddings(["a2"], _vectors(1, 10), ids=["a"])
+
+    reopened = open_store()
+    assert _ids(reopened) == ["a", "c"]
+    assert len(reopened) == 2
+    top = reopened.similarity_search_by_vector(_vectors(1, 10)[0], k=1)
+    assert top[0].page_content == "a2"
+
+
+def test_vectors_without_records_are_truncated(open_store, tmp_path):
+    store = open_store()
+    store.add_embeddings(["a", "b"], _vectors(2), ids=["a", "b"])
+    # Crash after the vectors of the next batch were written, before its records
+    with open(tmp_path / "index" / "vectors.bin", "ab") as handle:
+        handle.write(np.ones((3, DIM), dtype=np.float32).tobytes())
+
+    reopened = open_store()
+    reopened.add_embeddings(["c"], _vectors(1, 5), ids=["c"])
+
+    again = open_store()
+    assert _ids(again) == ["a", "b", "c"]
+    top = again.similarity_search_by_vector(_vectors(1, 5)[0], k=1)
+    assert top[0].id == "c"
+
+
+def test_partial_last_record_is_ignored(open_store, tmp_path):
+    store = open_store()
+    store.add_embeddings(["a", "b"], _vectors(2), ids=["a", "b"])
+    records = tmp_path / "index" / "records.jsonl"
+    # Torn write of the last line, and a partial vector row
+    records.write_bytes(records.read_bytes()[:-5])
+    with open(tmp_path / "index" / "vectors.bin", "ab") as handle:
+        handle.write(b"\x00" * 3)
+
+    reopened = open_store()
+    assert _ids(reopened) == ["a"]
+    reopened.add_embeddings(["b"], _vectors(1, 1), ids=["b"])
+
+    again = open_store()
+    assert _ids(again) == ["a", "b"]
+    lines = records.read_text().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["a", "b"]
+
+
+def test_compact_drops_dead_rows(open_store, tmp_path):
+    store = open_store()
+    store.add_embeddings(["a", "b", "c"], _vectors(3), ids=["a", "b", "c"])
+    store.delete(["a"])
+    store.add_embeddings(["c2"], _vectors(1, 7), ids=["c"])
+
+    assert store.compact() == 2
+    assert _ids(store) == ["b", "c"]
+    assert (tmp_path / "index" / "vectors.bin").stat().st_size == 2 * DIM * 4
+    assert "delete" not in (tmp_path / "index" / "records.jsonl").read_text()
+
+    reopened = open_store()
+    assert _ids(reopened) == ["b", "c"]
+    top = reopened.similarity_search_by_vector(_vectors(1, 7)[0], k=1)
+    assert top[0].page_content == "c2"
+
+
+def test_interrupted_compaction_is_completed_on_load(open_store, tmp_path, monkeypatch):
+    store = open_store()
+    store.add_embeddings(["a", "b"], _vectors(2), ids=["a", "b"])
+    store.delete(["a"])
+
+    # Crash right after the compacted files were marked complete
+    monkeypatch.setattr(LocalVectorStore, "_finish_compaction", lambda self: None)
+    store.compact()
+    monkeypatch.undo()
+
+    reopened = open_store()
+    assert _ids(reopened) == ["b"]
+    assert not (tmp_path / "index" / "compact.ready").exists()
+    assert (tmp_path / "index" / "vectors.bin").stat().st_size == DIM * 4
+
+
+def test_compacts_automatically_when_mostly_dead(open_store, monkeypatch):
+    monkeypatch.setattr(local_store, "_COMPACT_MIN_DEAD_ROWS", 2)
+    store = open_store()
+    store.add_embeddings(list("abcd"), _vectors(4), ids=list("abcd"))
+
+    store.delete(["a", "b"])
+    assert len(store._ids) == 4
+
+    store.delete(["c"])
+    assert len(store._ids) == 1
+    assert _ids(store) == ["d"]
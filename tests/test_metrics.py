@@ -0,0 +1,67 @@
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.app.core.llm.response_cache import LLMResponseCache
+from src.app.core.metrics import LLM_COST, LLM_SECONDS, LLM_TOKENS, MetricsCallbackHandler
+
+# Dated name of a priced model, unique to this module so its series start empty
+MODEL = "gpt-4o-mini-metrics-test"
+
+
+class UsageChatModel(BaseChatModel):
+    """Chat model answering "ok" and reporting 100 prompt + 20 completion tokens."""
+
+    model: str = MODEL
+
+    @property
+    def _llm_type(self) -> str:
+        return "usage-test"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model}
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = AIMessage(
+            "ok",
+            usage_metadata={"input_tokens": 100, "output_tokens": 20, "total_tokens": 120},
+        )
+        usage = {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120}
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"token_usage": usage},
+        )
+
+
+def _tokens(kind: str) -> float:
+    return LLM_TOKENS._values.get((MODEL, kind), 0.0)
+
+
+def _calls() -> int:
+    series = LLM_SECONDS._series.get((MODEL,))
+    return series[2] if series else 0
+
+
+def test_cache_hits_are_not_counted_as_model_calls():
+    model = UsageChatModel(cache=LLMResponseCache(), callbacks=[MetricsCallbackHandler()])
+    prompt = [HumanMessage("What is the refund policy?")]
+    before = (_tokens("prompt"), _tokens("completion"), _calls())
+
+    model.invoke(prompt)
+    model.invoke(prompt)
+    model.invoke(prompt)
+
+    assert model.cache.stats()["hits"] == 2
+    assert _tokens("prompt") - before[0] == 100
+    assert _tokens("completion") - before[1] == 20
+    assert _calls() - before[2] == 1
+    assert LLM_COST._values[(MODEL,)] > 0
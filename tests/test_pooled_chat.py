@@ -0,0 +1,154 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+
+from src.app.core.llm import pooled, rate_limit
+from src.app.core.llm.pooled import PooledChatOpenAI
+from src.app.core.llm.rate_limit import PRIORITY_INTERACTIVE, LLMScheduler
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.settled = []
+        self.refunded = []
+
+    def acquire(self, tokens, priority):
+        return 0.0
+
+    async def aacquire(self, tokens, priority):
+        return 0.0
+
+    def settle(self, reserved_tokens, used_tokens):
+        self.settled.append((reserved_tokens, used_tokens))
+
+    def refund(self, reserved_tokens):
+        self.refunded.append(reserved_tokens)
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    recorder = RecordingScheduler()
+    monkeypatch.setattr(pooled, "get_llm_scheduler", lambda: recorder)
+    return recorder
+
+
+def _chunks(usage):
+    yield ChatGenerationChunk(message=AIMessageChunk("Hello"))
+    yield ChatGenerationChunk(message=AIMessageChunk(" world", usage_metadata=usage))
+
+
+def _fake_stream(monkeypatch, usage=None):
+    def stream(self, messages, *args, **kwargs):
+        return _chunks(usage)
+
+    async def astream(self, messages, *args, **kwargs):
+        for chunk in _chunks(usage):
+            yield chunk
+
+    monkeypatch.setattr(ChatOpenAI, "_stream", stream)
+    monkeypatch.setattr(ChatOpenAI, "_astream", astream)
+
+
+def _model():
+    return PooledChatOpenAI(model="gpt-4o-mini", api_key="test", max_tokens=500)
+
+
+def test_stream_settles_reported_usage(monkeypatch, scheduler):
+    usage = {"input_tokens": 30, "output_tokens": 12, "total_tokens": 42}
+    _fake_stream(monkeypatch, usage)
+    model = _model()
+    messages = [HumanMessage("Say hello")]
+
+    text = "".join(chunk.text for chunk in model._stream(messages))
+
+    assert text == "Hello world"
+    assert scheduler.settled == [(model._estimate_tokens(messages), 42)]
+
+
+def test_astream_counts_streamed_text_without_reported_usage(monkeypatch, scheduler):
+    _fake_stream(monkeypatch)
+    model = _model()
+    messages = [HumanMessage("Say hello")]
+
+    async def consume():
+        return [chunk async for chunk in model._astream(messages)]
+
+    asyncio.run(consume())
+
+    expected = model._prompt_tokens(messages) + pooled.count_tokens("Hello world", "gpt-4o-mini")
+    assert scheduler.settled == [(model._estimate_tokens(messages), expected)]
+
+
+def test_stream_closed_early_still_settles(monkeypatch, scheduler):
+    _fake_stream(monkeypatch)
+    model = _model()
+    stream = model._stream([HumanMessage("Say hello")])
+
+    next(stream)
+    stream.close()
+
+    assert len(scheduler.settled) == 1
+
+
+def _connection_error():
+    return openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com"))
+
+
+def _fake_generate(monkeypatch, failures):
+    """Make the parent `_generate` raise each of `failures`, then succeed."""
+    pending = list(failures)
+
+    def generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if pending:
+            raise pending.pop(0)
+        usage = {"prompt_tokens": 30, "completion_tokens": 12, "total_tokens": 42}
+        generation = ChatGeneration(message=AIMessage("Hello"))
+        return ChatResult(generations=[generation], llm_output={"token_usage": usage})
+
+    monkeypatch.setattr(ChatOpenAI, "_generate", generate)
+    monkeypatch.setattr(pooled, "_retry_delay", lambda attempt: 0.0)
+
+
+def test_failed_attempts_refund_their_reservation(monkeypatch, scheduler):
+    _fake_generate(monkeypatch, [_connection_error(), _connection_error()])
+    model = _model()
+    messages = [HumanMessage("Say hello")]
+    tokens = model._estimate_tokens(messages)
+
+    model._generate(messages)
+
+    assert scheduler.refunded == [tokens, tokens]
+    assert scheduler.settled == [(tokens, 42)]
+
+
+@pytest.mark.parametrize("error", [ValueError("bad request"), _connection_error()])
+def test_giving_up_refunds_the_last_reservation(monkeypatch, scheduler, error):
+    monkeypatch.setenv("LLM_MAX_RETRIES", "0")
+    _fake_generate(monkeypatch, [error])
+    model = _model()
+    messages = [HumanMessage("Say hello")]
+
+    with pytest.raises(type(error)):
+        model._generate(messages)
+
+    assert scheduler.refunded == [model._estimate_tokens(messages)]
+    assert scheduler.settled == []
+
+
+def test_interrupted_wait_does_not_block_background_calls(monkeypatch):
+    limiter = LLMScheduler(tokens_per_minute=60)
+    limiter.acquire(60)
+
+    def interrupt(seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(rate_limit.time, "sleep", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        limiter.acquire(30, PRIORITY_INTERACTIVE)
+
+    assert limiter._interactive_waiting == 0
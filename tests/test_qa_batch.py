@@ -0,0 +1,163 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from pydantic import ValidationError
+
+from src.app.core.retrieval.embedding_cache import CachedQueryEmbeddings, QueryEmbeddingCache
+from src.app.models import BatchQARequest
+from src.app.services import qa_service
+
+
+@pytest.mark.parametrize("value", [0, -1])
+def test_batch_request_rejects_non_positive_concurrency(value):
+    with pytest.raises(ValidationError):
+        BatchQARequest(questions=["q"], max_concurrency=value)
+
+
+def test_batch_request_concurrency_is_optional():
+    assert BatchQARequest(questions=["q"]).max_concurrency is None
+
+
+@pytest.fixture
+def client():
+    from src.app.api import app
+
+    # No `with`: the lifespan (warm-up, expiry task) is not needed here
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"questions": []},
+        {"questions": ["fine", "   "]},
+    ],
+)
+def test_batch_endpoint_rejects_empty_questions(client, payload):
+    assert client.post("/qa/batch", json=payload).status_code == 400
+
+
+def test_batch_endpoint_rejects_too_many_questions(client, monkeypatch):
+    monkeypatch.setenv("QA_BATCH_MAX_QUESTIONS", "2")
+
+    response = client.post("/qa/batch", json={"questions": ["a", "b", "c"]})
+
+    assert response.status_code == 400
+
+
+def test_batch_endpoint_rejects_invalid_concurrency(client):
+    response = client.post("/qa/batch", json={"questions": ["a"], "max_concurrency": 0})
+
+    assert response.status_code == 422
+
+
+@pytest.fixture
+def fake_flow(monkeypatch):
+    state = {"running": 0, "peak": 0, "calls": []}
+
+    async def flow(question):
+        state["calls"].append(question)
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        try:
+            await asyncio.sleep(0.01)
+            if question.startswith("fail"):
+                raise RuntimeError("upstream said: secret-key-123 is invalid")
+            return {"answer": f"answer to {question}", "context": "ctx"}
+        finally:
+            state["running"] -= 1
+
+    async def no_priming(questions):
+        return None
+
+    monkeypatch.setattr(qa_service, "arun_conversational_qa_flow", flow)
+    monkeypatch.setattr(qa_service, "_prime_query_embeddings", no_priming)
+    return state
+
+
+def _run_batch(questions, max_concurrency=None):
+    async def collect():
+        return [r async for r in qa_service.run_qa_batch(questions, max_concurrency)]
+
+    return sorted(asyncio.run(collect()), key=lambda result: result["index"])
+
+
+def test_requested_concurrency_is_capped_by_settings(fake_flow, monkeypatch):
+    monkeypatch.setenv("QA_BATCH_CONCURRENCY", "2")
+
+    results = _run_batch([f"q{i}" for i in range(8)], max_concurrency=100)
+
+    assert len(results) == 8
+    assert fake_flow["peak"] == 2
+
+
+def test_requested_concurrency_can_lower_the_limit(fake_flow):
+    _run_batch([f"q{i}" for i in range(6)], max_concurrency=1)
+
+    assert fake_flow["peak"] == 1
+
+
+def test_duplicate_questions_run_once(fake_flow):
+    results = _run_batch(["What is X?", "what is  x?", "Other"])
+
+    assert len(fake_flow["calls"]) == 2
+    assert results[0]["answer"] == results[1]["answer"] == "answer to What is X?"
+    assert [result["question"] for result in results] == ["What is X?", "what is  x?", "Other"]
+
+
+def test_failures_are_reported_without_exception_details(fake_flow):
+    results = _run_batch(["fail me", "fine"])
+
+    assert results[0]["error"] == qa_service.BATCH_ERROR_MESSAGE
+    assert "secret" not in results[0]["error"]
+    assert results[1]["answer"] == "answer to fine"
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    document_calls: list = []
+    query_calls: list = []
+
+    def embed_documents(self, texts):
+        self.document_calls.append(list(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.query_calls.append(text)
+        return super().embed_query(text)
+
+
+@pytest.fixture
+def cached_embeddings(monkeypatch):
+    inner = CountingEmbeddings(size=8)
+    embeddings = CachedQueryEmbeddings(inner, "test-model", QueryEmbeddingCache())
+
+    async def flow(question):
+        # What direct-mode retrieval does with the question
+        await embeddings.aembed_query(question)
+        return {"answer": f"answer to {question}", "context": "ctx"}
+
+    monkeypatch.setattr(qa_service, "get_clients", lambda: SimpleNamespace(embeddings=embeddings))
+    monkeypatch.setattr(qa_service, "arun_conversational_qa_flow", flow)
+    return embeddings
+
+
+def test_primed_question_embeddings_are_read_by_the_runs(cached_embeddings, monkeypatch):
+    monkeypatch.setenv("RETRIEVAL_MODE", "direct")
+
+    _run_batch(["What is X?", "what is  x?", "Other"])
+
+    inner = cached_embeddings.embeddings
+    assert inner.document_calls == [["What is X?", "Other"]]
+    assert inner.query_calls == []
+    assert cached_embeddings.cache.stats()["hits"] == 2
+
+
+def test_agent_mode_does_not_prime_embeddings(cached_embeddings, monkeypatch):
+    monkeypatch.setenv("RETRIEVAL_MODE", "agent")
+
+    _run_batch(["What is X?", "Other"])
+
+    assert cached_embeddings.embeddings.document_calls == []
@@ -0,0 +1,121 @@
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from src.app.core import tiered_cache
+from src.app.core.llm.response_cache import (
+    LLMResponseCache,
+    canonical_prompt,
+    response_cache_key,
+)
+from src.app.core.metrics import CACHED_GENERATION_FLAG
+
+LLM_STRING = "gpt-4o-mini\x000.0\x00[]"
+
+
+def _prompt(answer_id, usage, question="What is the refund policy?"):
+    return dumps([
+        HumanMessage("Earlier question"),
+        AIMessage(
+            "Earlier answer",
+            id=answer_id,
+            usage_metadata=usage,
+            response_metadata={"system_fingerprint": answer_id},
+        ),
+        HumanMessage(question),
+    ])
+
+
+def _generations(text="Refunds within 30 days."):
+    return [ChatGeneration(message=AIMessage(text))]
+
+
+def test_volatile_message_fields_do_not_change_the_key():
+    first = _prompt("run-1", {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15})
+    second = _prompt("run-2", {"input_tokens": 99, "output_tokens": 1, "total_tokens": 100})
+
+    assert first != second
+    assert canonical_prompt(first) == canonical_prompt(second)
+    assert response_cache_key(first, LLM_STRING) == response_cache_key(second, LLM_STRING)
+
+
+def test_content_and_model_change_the_key():
+    usage = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+    prompt = _prompt("run-1", usage)
+
+    assert response_cache_key(prompt, LLM_STRING) != response_cache_key(
+        _prompt("run-1", usage, question="What is the warranty?"), LLM_STRING
+    )
+    assert response_cache_key(prompt, LLM_STRING) != response_cache_key(
+        prompt, LLM_STRING.replace("gpt-4o-mini", "gpt-4o")
+    )
+
+
+def test_non_json_prompts_are_used_verbatim():
+    assert canonical_prompt("plain text prompt") == "plain text prompt"
+
+
+def test_hits_survive_a_restart_and_are_flagged(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite3")
+    cache = LLMResponseCache(path=path)
+    cache.update("prompt", LLM_STRING, _generations())
+    cache.close()
+
+    reopened = LLMResponseCache(path=path)
+    [generation] = reopened.lookup("prompt", LLM_STRING)
+
+    assert generation.message.content == "Refunds within 30 days."
+    assert generation.generation_info[CACHED_GENERATION_FLAG]
+    assert reopened.stats()["disk_hits"] == 1
+    reopened.close()
+
+
+def test_entries_expire_after_the_ttl(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(tiered_cache.time, "time", lambda: now[0])
+    cache = LLMResponseCache(ttl_seconds=60, path=str(tmp_path / "llm_cache.sqlite3"))
+    cache.update("prompt", LLM_STRING, _generations())
+
+    now[0] += 59
+    assert cache.lookup("prompt", LLM_STRING) is not None
+
+    now[0] += 2
+    assert cache.lookup("prompt", LLM_STRING) is None
+    assert cache._store.persistent_size() == 0
+    cache.close()
+
+
+def test_expired_rows_are_pruned_without_being_looked_up(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(tiered_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "llm_cache.sqlite3")
+    cache = LLMResponseCache(ttl_seconds=60, path=path)
+    cache.update("old", LLM_STRING, _generations())
+    now[0] += 30
+    cache.update("new", LLM_STRING, _generations())
+    cache.close()
+
+    now[0] += 45
+    reopened = LLMResponseCache(ttl_seconds=60, path=path)
+
+    assert reopened._store.persistent_size() == 1
+    reopened.close()
+
+
+def test_persistent_tier_keeps_the_newest_rows_up_to_the_cap(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(tiered_cache.time, "time", lambda: now[0])
+    monkeypatch.setattr(tiered_cache, "_PRUNE_EVERY_WRITES", 4)
+    cache = LLMResponseCache(
+        max_entries=1, path=str(tmp_path / "llm_cache.sqlite3"), max_persistent_entries=3
+    )
+    for number in range(8):
+        now[0] += 1
+        cache.update(f"prompt {number}", LLM_STRING, _generations(f"answer {number}"))
+
+    # Pruned after the 4th and 8th write
+    assert cache._store.persistent_size() == 3
+    assert cache.lookup("prompt 7", LLM_STRING) is not None
+    assert cache.lookup("prompt 5", LLM_STRING) is not None
+    assert cache.lookup("prompt 4", LLM_STRING) is None
+    cache.close()
@@ -0,0 +1,40 @@
+from langchain_core.documents import Document
+from langchain_core.messages import ToolMessage
+
+from src.app.core.agents import tools
+from src.app.core.agents.agents import _merge_tool_results
+
+
+def _docs(prefix, count):
+    return [
+        Document(
+            id=f"{prefix}{i}",
+            page_content=f"{prefix} chunk number {i} about topic {prefix}{i}",
+            metadata={"page": i},
+        )
+        for i in range(count)
+    ]
+
+
+def test_tool_shows_a_short_context_but_returns_every_candidate(monkeypatch):
+    candidates = _docs("a", 10)
+    monkeypatch.setattr(tools, "retrieve", lambda query, k: candidates)
+
+    content, artifact = tools._retrieval("query")
+
+    assert artifact == candidates
+    assert "Chunk 4" in content and "Chunk 5" not in content
+
+
+def test_node_fuses_the_full_candidate_lists_of_every_call():
+    first, second = _docs("a", 6), _docs("b", 6)
+    messages = [
+        ToolMessage(content="...", artifact=first, tool_call_id="1"),
+        ToolMessage(content="...", artifact=second + first[5:], tool_call_id="2"),
+    ]
+
+    merged = _merge_tool_results(messages)
+
+    assert len(merged) == 12
+    # Found by both searches, although ranked last by each
+    assert merged[0].id == "a5"
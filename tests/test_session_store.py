@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+from src.app.services.session_store import InMemorySessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    stores = []
+
+    def make(**kwargs):
+        if request.param == "sqlite":
+            store = SQLiteSessionStore(path=str(tmp_path / "sessions.sqlite3"), **kwargs)
+        else:
+            store = InMemorySessionStore(**kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_unknown_session_is_empty(make_store):
+    store = make_store()
+    assert not store.exists("missing")
+    assert store.get_history("missing") == []
+    assert store.get_metadata("missing") == {}
+
+
+def test_append_assigns_turn_numbers(make_store):
+    store = make_store()
+    first = store.append_turn("s1", {"question": "q1", "answer": "a1"})
+    second = store.append_turn("s1", {"question": "q2", "answer": "a2"})
+    store.append_turn("s2", {"question": "other", "answer": "other"})
+
+    assert (first["turn"], second["turn"]) == (1, 2)
+    assert store.exists("s1")
+    assert [turn["question"] for turn in store.get_history("s1")] == ["q1", "q2"]
+    assert [turn["question"] for turn in store.get_history("s2")] == ["other"]
+
+
+def test_history_last_n_keeps_newest(make_store):
+    store = make_store()
+    for i in range(5):
+        store.append_turn("s", {"question": f"q{i}", "answer": f"a{i}"})
+
+    assert [turn["turn"] for turn in store.get_history("s", last_n=2)] == [4, 5]
+
+
+def test_stored_turns_are_capped(make_store):
+    store = make_store(max_stored_turns=3)
+    for i in range(5):
+        store.append_turn("s", {"question": f"q{i}", "answer": f"a{i}"})
+
+    history = store.get_history("s")
+    assert [turn["turn"] for turn in history] == [3, 4, 5]
+    # Numbering continues past pruned turns
+    assert store.append_turn("s", {"question": "q", "answer": "a"})["turn"] == 6
+
+
+def test_metadata_round_trip(make_store):
+    store = make_store()
+    store.append_turn("s", {"question": "q", "answer": "a"})
+    store.set_metadata("s", {"conversation_summary": "summary", "summarized_turns": 1})
+
+    assert store.get_metadata("s") == {"conversation_summary": "summary", "summarized_turns": 1}
+    assert len(store.get_history("s")) == 1
+
+
+def test_idle_sessions_expire(make_store):
+    store = make_store(ttl_seconds=0.05)
+    store.append_turn("s", {"question": "q", "answer": "a"})
+    time.sleep(0.1)
+
+    assert store.expire() == 1
+    assert not store.exists("s")
+    # A new turn after expiry starts a fresh session
+    assert store.append_turn("s", {"question": "q", "answer": "a"})["turn"] == 1
+
+
+def test_expired_session_is_not_revived_by_new_metadata(make_store):
+    store = make_store(ttl_seconds=0.05)
+    store.append_turn("s", {"question": "old q", "answer": "old a"})
+    store.set_metadata("s", {"conversation_summary": "old summary"})
+    time.sleep(0.1)
+
+    # Not swept yet: writing memory starts a fresh session
+    store.set_metadata("s", {"summarized_turns": 0})
+
+    assert store.get_history("s") == []
+    assert store.get_metadata("s") == {"summarized_turns": 0}
+    assert store.append_turn("s", {"question": "q", "answer": "a"})["turn"] == 1
+
+
+def test_store_evicts_least_recently_used(make_store):
+    store = make_store(max_sessions=2)
+    store.append_turn("a", {"question": "q", "answer": "a"})
+    store.append_turn("b", {"question": "q", "answer": "a"})
+    store.get_history("a")
+    store.append_turn("c", {"question": "q", "answer": "a"})
+
+    assert store.exists("a") and store.exists("c")
+    assert not store.exists("b")
+
+
+def test_sqlite_store_survives_reopen(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    store = SQLiteSessionStore(path=path)
+    store.append_turn("s", {"question": "q", "answer": "a"})
+    store.set_metadata("s", {"summarized_turns": 1})
+    store.close()
+
+    reopened = SQLiteSessionStore(path=path)
+    try:
+        assert [turn["question"] for turn in reopened.get_history("s")] == ["q"]
+        assert reopened.get_metadata("s") == {"summarized_turns": 1}
+        assert reopened.append_turn("s", {"question": "q2", "answer": "a2"})["turn"] == 2
+    finally:
+        reopened.close()
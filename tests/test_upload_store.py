@@ -0,0 +1,115 @@
+import hashlib
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app.services.upload_store import (
+    InvalidUpload,
+    UploadTooLarge,
+    sanitize_filename,
+    store_upload,
+)
+
+PDF = b"%PDF-1.7\n" + b"x" * 100
+
+
+@pytest.mark.parametrize(
+    "filename, expected",
+    [
+        ("report.pdf", "report.pdf"),
+        ("../../etc/passwd", "passwd"),
+        ("C:\\Users\\me\\Q3 report (final).pdf", "Q3 report (final).pdf"),
+        ("in<voice>|?.pdf", "in_voice_.pdf"),
+        (" .hidden.pdf. ", "hidden.pdf"),
+        ("..", "upload.pdf"),
+        ("", "upload.pdf"),
+        (None, "upload.pdf"),
+    ],
+)
+def test_sanitize_filename(filename, expected):
+    assert sanitize_filename(filename) == expected
+
+
+def test_sanitize_filename_caps_length():
+    assert len(sanitize_filename("a" * 300 + ".pdf")) == 255
+
+
+def test_store_upload_is_content_addressed(tmp_path):
+    stored = store_upload(io.BytesIO(PDF), "../report.pdf", tmp_path, max_bytes=1024, block_size=16)
+
+    sha256 = hashlib.sha256(PDF).hexdigest()
+    assert stored.sha256 == sha256
+    assert stored.path == tmp_path / f"{sha256}.pdf"
+    assert stored.path.read_bytes() == PDF
+    assert stored.size == len(PDF)
+    assert stored.filename == "report.pdf"
+
+
+def test_same_content_is_stored_once(tmp_path):
+    first = store_upload(io.BytesIO(PDF), "a.pdf", tmp_path, max_bytes=1024)
+    second = store_upload(io.BytesIO(PDF), "b.pdf", tmp_path, max_bytes=1024)
+
+    assert first.path == second.path
+    assert second.filename == "b.pdf"
+    assert list(tmp_path.iterdir()) == [first.path]
+
+
+def test_upload_over_the_limit_leaves_nothing_behind(tmp_path):
+    with pytest.raises(UploadTooLarge):
+        store_upload(io.BytesIO(PDF), "big.pdf", tmp_path, max_bytes=len(PDF) - 1, block_size=16)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_upload_at_the_limit_is_accepted(tmp_path):
+    stored = store_upload(io.BytesIO(PDF), "a.pdf", tmp_path, max_bytes=len(PDF))
+    assert stored.size == len(PDF)
+
+
+@pytest.mark.parametrize("data", [b"", b"<html>not a pdf</html>"])
+def test_non_pdf_uploads_are_rejected(tmp_path, data):
+    with pytest.raises(InvalidUpload):
+        store_upload(io.BytesIO(data), "a.pdf", tmp_path, max_bytes=1024)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def client():
+    from src.app.api import app
+
+    return TestClient(app)
+
+
+def test_endpoint_rejects_oversized_content_length(client, monkeypatch, tmp_path):
+    monkeypatch.setenv("UPLOAD_MAX_BYTES", "1024")
+    body = PDF + b"x" * (200 * 1024)
+
+    response = client.post(
+        "/index-pdf", files={"file": ("big.pdf", body, "application/pdf")}
+    )
+
+    assert response.status_code == 413
+    assert not (tmp_path / "uploads").exists()
+
+
+def test_endpoint_caps_body_within_multipart_allowance(client, monkeypatch, tmp_path):
+    # Passes the Content-Length check, which allows for multipart overhead,
+    # but is still stopped while being copied to the store
+    monkeypatch.setenv("UPLOAD_MAX_BYTES", "1024")
+
+    response = client.post(
+        "/index-pdf", files={"file": ("big.pdf", PDF + b"x" * 2048, "application/pdf")}
+    )
+
+    assert response.status_code == 413
+    assert list((tmp_path / "uploads").glob("*")) == []
+
+
+def test_endpoint_rejects_non_pdf_content(client):
+    response = client.post(
+        "/index-pdf", files={"file": ("a.pdf", b"not a pdf", "application/pdf")}
+    )
+
+    assert response.status_code == 400